@@ -0,0 +1,85 @@
+"""
+CLI Archivos
+
+- archivar: Mover los turnos de días cerrados y las bitácoras antiguas a sus tablas de archivo,
+  también elimina las llaves de idempotencia de esos días
+
+Las consultas de las pantallas y de las ventanillas sólo usan los turnos de hoy,
+al archivar los días cerrados la tabla turnos se queda con lo que está vivo.
+Desde la administración se puede buscar en el archivo con el botón Archivo de cada listado.
+"""
+
+from datetime import datetime, timedelta
+
+import click
+from pytz import timezone
+from sqlalchemy import delete, insert, select
+
+from tauro.app import create_app
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.bitacoras_archivadas.models import BitacoraArchivada
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_archivados.models import TurnoArchivado
+from tauro.blueprints.turnos_estados.models import TurnoEstado
+from tauro.blueprints.turnos_idempotencias.models import TurnoIdempotencia
+from tauro.extensions import database
+
+app = create_app()
+app.app_context().push()
+database.app = app
+
+
+@click.group()
+def cli():
+    """Archivos"""
+
+
+def mover(modelo, archivo, condiciones: list, lote: int) -> int:
+    """Mover de a lote renglones de la tabla al archivo, cada lote en una sola sentencia y su propio commit"""
+    tabla = modelo.__table__
+    columnas = [columna.name for columna in archivo.__table__.columns]
+    contador = 0
+    while True:
+        # WITH movidos AS (DELETE ... RETURNING ...) INSERT INTO archivo SELECT ... FROM movidos
+        ids = select(tabla.c.id).where(*condiciones).order_by(tabla.c.id).limit(lote).scalar_subquery()
+        movidos = delete(tabla).where(tabla.c.id.in_(ids)).returning(*[tabla.c[columna] for columna in columnas]).cte("movidos")
+        insercion = insert(archivo.__table__).from_select(columnas, select(*[movidos.c[columna] for columna in columnas]))
+        cantidad = database.session.execute(insercion).rowcount
+        database.session.commit()
+        contador += cantidad
+        if cantidad < lote:
+            return contador
+
+
+@click.command()
+@click.option("--dias-turnos", default=1, help="Días que se quedan en turnos, 1 es sólo hoy")
+@click.option("--dias-bitacoras", default=90, help="Días que se quedan en bitacoras")
+@click.option("--lote", default=10000, help="Renglones por sentencia y commit")
+def archivar(dias_turnos, dias_bitacoras, lote):
+    """Mover los turnos de días cerrados y las bitácoras antiguas a sus tablas de archivo"""
+    hoy = datetime.now(tz=timezone(app.config["TZ"])).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+
+    # Sólo se archivan los turnos COMPLETADOS o CANCELADOS, los pendientes los cancela cancelar_turnos_pasados
+    cerrados_ids = [
+        turno_estado.id for turno_estado in TurnoEstado.query.filter(TurnoEstado.nombre.in_(["COMPLETADO", "CANCELADO"])).all()
+    ]
+    turnos_limite = hoy - timedelta(days=max(dias_turnos, 1) - 1)
+    contador_turnos = mover(
+        Turno,
+        TurnoArchivado,
+        [Turno.__table__.c.creado < turnos_limite, Turno.__table__.c.turno_estado_id.in_(cerrados_ids)],
+        lote,
+    )
+    click.echo(f"{contador_turnos} turnos anteriores al {turnos_limite.date()} archivados.")
+
+    # Las llaves de idempotencia sólo sirven para los reintentos del mismo día
+    idempotencias = database.session.execute(delete(TurnoIdempotencia).where(TurnoIdempotencia.creado < turnos_limite))
+    database.session.commit()
+    click.echo(f"{idempotencias.rowcount} llaves de idempotencia anteriores al {turnos_limite.date()} eliminadas.")
+
+    bitacoras_limite = hoy - timedelta(days=dias_bitacoras)
+    contador_bitacoras = mover(Bitacora, BitacoraArchivada, [Bitacora.__table__.c.creado < bitacoras_limite], lote)
+    click.echo(f"{contador_bitacoras} bitácoras anteriores al {bitacoras_limite.date()} archivadas.")
+
+
+cli.add_command(archivar)
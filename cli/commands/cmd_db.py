@@ -51,6 +51,17 @@ def inicializar():
     click.echo("Termina inicializar.")
 
 
+@click.command()
+def migrar():
+    """Migrar, crea las tablas y los índices que falten sin borrar los existentes"""
+    database.create_all()
+    # create_all no agrega índices nuevos a las tablas que ya existían
+    for tabla in database.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            indice.create(bind=database.engine, checkfirst=True)
+    click.echo("Termina migrar.")
+
+
 @click.command()
 def alimentar():
     """Alimentar"""
@@ -91,6 +102,7 @@ def respaldar():
 
 
 cli.add_command(inicializar)
+cli.add_command(migrar)
 cli.add_command(alimentar)
 cli.add_command(reiniciar)
 cli.add_command(respaldar)
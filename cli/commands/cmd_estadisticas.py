@@ -0,0 +1,57 @@
+"""
+CLI Estadisticas
+
+- recalcular: Calcular las estadísticas diarias de los turnos completados, por ejemplo para llenarlas la primera vez
+
+Al completarse un turno se vuelve a calcular la estadística de su grupo, este comando sólo hace falta
+para llenar los días anteriores o corregir los que se editaron fuera de la aplicación.
+"""
+
+from datetime import datetime, timedelta
+
+import click
+from pytz import timezone
+from sqlalchemy import delete, func, select
+
+from tauro.app import create_app
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_archivados.models import TurnoArchivado
+from tauro.extensions import database
+
+app = create_app()
+app.app_context().push()
+database.app = app
+
+
+@click.group()
+def cli():
+    """Estadisticas"""
+
+
+@click.command()
+@click.option(
+    "--desde", type=click.DateTime(formats=["%Y-%m-%d"]), help="Fecha inicial AAAA-MM-DD, por defecto la del primer turno"
+)
+@click.option("--hasta", type=click.DateTime(formats=["%Y-%m-%d"]), help="Fecha final AAAA-MM-DD, por defecto hoy")
+def recalcular(desde, hasta):
+    """Calcular las estadísticas diarias de los turnos completados, un día por sentencia y commit"""
+    hasta = hasta.date() if hasta else datetime.now(tz=timezone(app.config["TZ"])).date()
+    if desde is None:
+        primeros = [database.session.execute(select(func.min(modelo.creado))).scalar() for modelo in (Turno, TurnoArchivado)]
+        primeros = [primero for primero in primeros if primero is not None]
+        if not primeros:
+            click.echo("No hay turnos.")
+            return
+        desde = min(primeros)
+    fecha = desde.date()
+    contador = 0
+    while fecha <= hasta:
+        database.session.execute(delete(EstadisticaDiaria).where(EstadisticaDiaria.fecha == fecha))
+        contador += database.session.execute(EstadisticaDiaria.agregar(fecha, fecha)).rowcount
+        database.session.commit()
+        fecha += timedelta(days=1)
+    click.echo(f"{contador} estadísticas diarias calculadas del {desde.date()} al {hasta}.")
+
+
+cli.add_command(recalcular)
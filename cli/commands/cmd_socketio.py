@@ -0,0 +1,37 @@
+"""
+CLI Socket.IO
+"""
+
+import sys
+
+import click
+
+from config.settings import get_settings
+from lib.cola_mensajes import Distribuidor, es_cola_tauro
+
+settings = get_settings()
+
+
+@click.group()
+def cli():
+    """Socket.IO"""
+
+
+@click.command()
+@click.argument("url", type=str, default="")
+def distribuidor(url):
+    """Arrancar el distribuidor de mensajes para varios workers"""
+    url = url or settings.SOCKETIO_MESSAGE_QUEUE
+    if not es_cola_tauro(url):
+        click.echo(
+            "ERROR: Se necesita una URL tauro://HOST:PUERTO o tauro+unix:///RUTA, como argumento o en SOCKETIO_MESSAGE_QUEUE"
+        )
+        sys.exit(1)
+    click.echo(f"Distribuidor de mensajes en {url}, presione Ctrl-C para terminar")
+    try:
+        Distribuidor(url).iniciar()
+    except KeyboardInterrupt:
+        click.echo("Termina el distribuidor de mensajes.")
+
+
+cli.add_command(distribuidor)
@@ -8,13 +8,22 @@ from pytz import timezone
 
 import click
 from dotenv import load_dotenv
-from sqlalchemy import or_
+from sqlalchemy import func, update
+from sqlalchemy.sql.functions import now
 
+from lib.instantaneas import instantaneas
+from lib.safe_string import safe_message
 from tauro.app import create_app
-from tauro.extensions import database
+from tauro.extensions import database, socketio
 
+from tauro.blueprints.api_v1.schemas import ResponseSchema
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.modulos.models import Modulo
+from tauro.blueprints.roles.models import Rol
 from tauro.blueprints.turnos.models import Turno
 from tauro.blueprints.turnos_estados.models import TurnoEstado
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.blueprints.usuarios_roles.models import UsuarioRol
 
 
 app = create_app()
@@ -30,8 +39,27 @@ def cli():
     """Base de Datos"""
 
 
+def consultar_usuario_bitacora(email: str = None) -> Usuario | None:
+    """Usuario al que se le anota la bitácora, el del email o el primer administrador activo"""
+    if email:
+        return Usuario.query.filter_by(email=email).first()
+    return (
+        Usuario.query.join(UsuarioRol)
+        .join(Rol)
+        .filter(Rol.nombre == "ADMINISTRADOR")
+        .filter(Usuario.estatus == "A")
+        .filter(UsuarioRol.estatus == "A")
+        .order_by(Usuario.id)
+        .first()
+    )
+
+
 @click.command()
-def cancelar_turnos_pasados():
+@click.option("--lote", default=0, help="Cancelar de a este rango de IDs por commit, 0 para una sola sentencia")
+@click.option("--email", default=None, help="Usuario de la bitácora, por defecto el primer administrador")
+@click.option("--desde", default=None, type=int, help="Sólo los turnos con ID mayor o igual a este")
+@click.option("--hasta", default=None, type=int, help="Sólo los turnos con ID menor o igual a este")
+def cancelar_turnos_pasados(lote, email, desde=None, hasta=None):
     """Cancelar turnos pasados"""
 
     # Calcular fecha de hoy
@@ -45,25 +73,58 @@ def cancelar_turnos_pasados():
         second=0,
     )
 
-    # Definir un contador
-    contador = 0
-
     # Consultar TurnosEstados
     turnos_estados = {turno_estado.nombre: turno_estado for turno_estado in TurnoEstado.query.all()}
 
-    # Consultar turnos anteriores a la fecha de hoy que se encuentren en estado diferente a COMPLETADO.
-    turnos = (
-        Turno.query.filter(Turno.creado < timestamp_hoy)
-        .filter(Turno.turno_estado != turnos_estados["COMPLETADO"])
-        .filter(Turno.turno_estado != turnos_estados["CANCELADO"])
-        .all()
-    )
-
-    # Cambiar el estado de los turnos resultantes a CANCELADO
-    for turno in turnos:
-        turno.turno_estado = turnos_estados["CANCELADO"]
-        turno.save()
-        contador += 1
+    # Los estados pendientes son todos menos COMPLETADO y CANCELADO, se filtra con in_ para aprovechar el índice
+    pendientes_ids = [
+        turno_estado.id for nombre, turno_estado in turnos_estados.items() if nombre not in ("COMPLETADO", "CANCELADO")
+    ]
+    condiciones = [Turno.turno_estado_id.in_(pendientes_ids), Turno.creado < timestamp_hoy]
+    if desde is not None:
+        condiciones.append(Turno.id >= desde)
+    if hasta is not None:
+        condiciones.append(Turno.id <= hasta)
+    cambios = {"turno_estado_id": turnos_estados["CANCELADO"].id, "modificado": now()}
+    cancelar = update(Turno).where(*condiciones).values(cambios).execution_options(synchronize_session=False)
+
+    # Cambiar el estado de los turnos anteriores a hoy que sigan pendientes con UPDATE, sin cargarlos en memoria
+    contador = 0
+    if lote <= 0:
+        contador = database.session.execute(cancelar).rowcount
+        database.session.commit()
+    else:
+        # Por rangos de IDs, cada rango en su propio commit para no bloquear muchos renglones a la vez
+        minimo, maximo = database.session.query(func.min(Turno.id), func.max(Turno.id)).filter(*condiciones).one()
+        database.session.commit()
+        inicio = minimo or 0
+        while maximo is not None and inicio <= maximo:
+            contador += database.session.execute(cancelar.where(Turno.id >= inicio, Turno.id < inicio + lote)).rowcount
+            database.session.commit()
+            inicio += lote
+
+    # Una sola bitácora con el resumen y una sola señal para que las pantallas vuelvan a consultar
+    if contador > 0:
+        usuario = consultar_usuario_bitacora(email)
+        if usuario is None:
+            click.echo("AVISO: No se encontró el usuario para la bitácora.")
+        else:
+            Bitacora(
+                modulo_id=Modulo.query.filter_by(nombre="TURNOS").one().id,
+                usuario_id=usuario.id,
+                descripcion=safe_message(f"Se cancelaron {contador} turnos anteriores al {fecha_hoy}"),
+                url="",
+            ).save()
+        instantaneas.invalidar()
+        # Sin SOCKETIO_MESSAGE_QUEUE este proceso no tiene pantallas conectadas, se actualizan con INSTANTANEAS_TTL_SEG
+        socketio.emit(
+            "refresh_screens",
+            ResponseSchema(
+                success=True,
+                message="Señal de actualización de pantallas",
+                data={"signal": True},
+            ).model_dump(),
+        )
 
     click.echo(f"{contador} turnos cancelados.")
 
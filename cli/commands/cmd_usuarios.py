@@ -1,6 +1,7 @@
 """
 CLI Usuarios
 
+- depurar_tokens_renovacion: Eliminar los tokens de renovación expirados
 - mostrar_api_key: Mostrar la API Key de un usuario
 - nueva_api_key: Nueva API Key
 - nueva_contrasena: Nueva contraseña
@@ -13,6 +14,7 @@ import click
 
 from lib.pwgen import generar_api_key
 from tauro.app import create_app
+from tauro.blueprints.tokens_renovacion.models import TokenRenovacion
 from tauro.blueprints.usuarios.models import Usuario
 from tauro.blueprints.ubicaciones.models import Ubicacion
 from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
@@ -28,6 +30,14 @@ def cli():
     """Usuarios"""
 
 
+@click.command()
+def depurar_tokens_renovacion():
+    """Eliminar los tokens de renovación expirados"""
+    contador = TokenRenovacion.query.filter(TokenRenovacion.expiracion < datetime.now()).delete()
+    database.session.commit()
+    click.echo(f"Se han eliminado {contador} tokens de renovación expirados")
+
+
 @click.command()
 @click.argument("email", type=str)
 def mostrar_api_key(email):
@@ -75,6 +85,7 @@ def nueva_contrasena(email):
         click.echo("ERROR: No son iguales las contraseñas. Por favor intente de nuevo.")
         sys.exit(1)
     usuario.contrasena = pwd_context.hash(contrasena_1.strip())
+    TokenRenovacion.revocar_usuario(usuario.id)
     usuario.save()
     click.echo(f"Se ha cambiado la contraseña de {email} en usuarios")
 
@@ -122,6 +133,7 @@ def restablecer_turnos_tipos():
     click.echo(f"Se han desactivado los tipos de turnos que atienden {contador} usuarios")
 
 
+cli.add_command(depurar_tokens_renovacion)
 cli.add_command(mostrar_api_key)
 cli.add_command(nueva_api_key)
 cli.add_command(nueva_contrasena)
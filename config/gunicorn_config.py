@@ -4,6 +4,17 @@
 # Para usarlo, ejecuta:
 #   uv run gunicorn -c config/gunicorn_config.py "tauro.app:create_app()""
 #
+# Perfiles, con la variable de entorno GUNICORN_PERFIL:
+#   gthread (por defecto) cada conexión de Socket.IO abierta ocupa uno de los hilos
+#   gevent  miles de pantallas conectadas en pocos workers, sin quitarle hilos a la API
+#           requiere: uv sync --extra gevent
+#
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # --- Conexión y Red ---
 bind = "0.0.0.0:5020"
@@ -11,41 +22,72 @@ bind = "0.0.0.0:5020"
 timeout = 300
 # Ayuda a mantener las conexiones HTTP persistentes
 keepalive = 2
-max_requests = 500     # Reinicia el worker después de 1000 peticiones
-max_requests_jitter = 50 # Evita que todos los workers reinicien al mismo tiempo
-graceful_timeout = 30   # Tiempo para cerrar conexiones limpiamente
+max_requests_jitter = 50  # Evita que todos los workers reinicien al mismo tiempo
+graceful_timeout = 30  # Tiempo para cerrar conexiones limpiamente
 
 # --- LA SOLUCIÓN AL ERROR DEL EVENT LOOP ---
 # Desactiva el servidor de estadísticas interno que usa asyncio
 bind_stats_server = None
 
 # --- Configuración del Worker ---
-# IMPORTANTE: Usamos el worker específico de gevent para websockets
-# worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
-worker_class = "gthread"
-
-# Para Socket.io sin un servidor de mensajes externo (como Redis), 
-# DEBES usar solo 1 worker para que todos los clientes se vean entre sí.
-workers = 1
-threads = 4
+PERFIL = os.getenv("GUNICORN_PERFIL", "gthread").lower()
+if PERFIL == "gevent":
+    # Cada conexión es un greenlet, las pantallas inactivas casi no cuestan
+    # Flask-SocketIO detecta gevent y atiende los websockets con simple-websocket
+    worker_class = "gevent"
+elif PERFIL == "gthread":
+    worker_class = "gthread"
+else:
+    raise ValueError(f"GUNICORN_PERFIL no soportado: {PERFIL}")
+
+# Para Socket.io sin cola de mensajes DEBES usar solo 1 worker para que todos los clientes se vean entre sí.
+# Con SOCKETIO_MESSAGE_QUEUE (por ejemplo tauro://127.0.0.1:5021 con "cli socketio distribuidor")
+# los envíos llegan a los clientes de todos los workers y se usa uno por núcleo, o WEB_CONCURRENCY si se define.
+# Con varios workers el proxy debe mantener cada cliente en el mismo worker (ip_hash en Nginx)
+# mientras hace long-polling, o las pantallas deben conectarse sólo por websocket.
+if os.getenv("SOCKETIO_MESSAGE_QUEUE"):
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+else:
+    workers = 1
+threads = 4  # Sólo aplica a gthread
+# Reinicia el worker después de 500 peticiones; con gevent no, cada long-polling de las pantallas
+# cuenta como petición y al reiniciar se pierden todas las sesiones de Socket.IO
+max_requests = 0 if PERFIL == "gevent" else 500
 # --- Rendimiento y Estabilidad ---
 # Desactiva sendfile para evitar errores de memoria en algunos entornos WSL/Linux
 sendfile = False
-# Evita que el worker se bloquee si hay mucha carga
-worker_connections = 1000
+# Conexiones simultáneas por worker en gevent, incluye las pantallas inactivas
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 5000 if PERFIL == "gevent" else 1000))
 
-forwarded_allow_ips = '*' # Permite que proxies (como Nginx) le pasen tráfico
+forwarded_allow_ips = "*"  # Permite que proxies (como Nginx) le pasen tráfico
 secure_scheme_headers = {
-	'X-FORWARDED-PROTOCOL': 'ssl',
-	'X-FORWARDED-PROTO': 'https',
-	'X-FORWARDED-SCHEME': 'https',
-	'X-FORWARDED-SSL': 'on'
+    "X-FORWARDED-PROTOCOL": "ssl",
+    "X-FORWARDED-PROTO": "https",
+    "X-FORWARDED-SCHEME": "https",
+    "X-FORWARDED-SSL": "on",
 }
 
-preload_app = True # Carga la app antes de crear hilos
+# Carga la app antes de crear hilos; con gevent no, se debe cargar después de que el worker parcha la biblioteca estándar
+preload_app = PERFIL != "gevent"
+
+
+def post_fork(server, worker):
+    """Con gevent, que psycopg2 ceda el turno a otros greenlets mientras espera a PostgreSQL"""
+    if PERFIL == "gevent":
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+
+def worker_exit(server, worker):
+    """Con BITACORAS_LOTE, insertar las bitácoras que sigan en memoria antes de que termine el worker"""
+    from lib.bitacoras import bitacoras
+
+    bitacoras.vaciar()
+
 
 # --- Logs (Para ver qué pasa en tiempo real) ---
 # '-' significa que los logs saldrán directamente en tu terminal
 accesslog = "-"
 errorlog = "-"
-loglevel = "info"
\ No newline at end of file
+loglevel = "info"
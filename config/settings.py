@@ -30,7 +30,32 @@ class Settings(BaseSettings):
     SQLALCHEMY_DATABASE_URI: str = ""
     TZ: str = "America/Mexico_City"
     LIMITE_DE_TURNOS_LISTADOS: int = 20
+    TURNOS_NUMEROS_POR_UNIDAD: bool = False  # Si es verdadero, cada unidad lleva su propia numeración diaria
+    CATALOGOS_TTL_SEG: int = 5 * 60  # Cinco minutos
+    API_KEYS_TTL_SEG: int = 60  # Con varios workers, lo más que tarda un API key deshabilitado en dejar de servir
+    PRINCIPALES_TTL_SEG: int = 60  # Con varios workers, lo más que tarda un cambio de usuario en verse en la API OAuth2
+    PRINCIPALES_MAXIMO: int = 1000  # Usuarios de la API OAuth2 guardados en memoria por worker
+    DATATABLES_CONTEO_ESTIMADO_MINIMO: int = 100000  # Arriba de esto el total de los listados es el estimado de PostgreSQL
+    DATATABLES_CONTEO_TTL_SEG: int = 10  # Segundos que se guarda el total de un listado con los mismos filtros
+    INSTANTANEAS_TTL_SEG: int = 10  # Con varios workers, lo más que tarda una pantalla en ver un cambio hecho en otro
+    COMPRESION_MINIMO_BYTES: int = 1024  # Las respuestas menores se entregan sin comprimir, vea lib/compresiones.py
+    ESPERAS_ALFA: float = 0.2  # Peso de cada turno completado en la atención promedio, vea lib/esperas.py
+    ESPERAS_ATENCION_INICIAL_SEG: int = 5 * 60  # Atención supuesta de un grupo sin estadísticas
+    ESPERAS_TTL_SEG: int = 60  # Con varios workers, lo más que tarda el estimado en contar los turnos de otro
+    FILAS_TTL_SEG: int = 10  # Con varios workers, lo más que tarda la fila de una unidad en ver los turnos de otro
+    IDEMPOTENCIAS_MAXIMO: int = 10000  # Respuestas de crear_turno por Idempotency-Key guardadas en memoria por worker
+    IDEMPOTENCIAS_TTL_SEG: int = 60 * 60  # Una hora, después se responde desde turnos_idempotencias
+    SOCKETIO_MESSAGE_QUEUE: str = ""  # Vacío para un solo worker, vea lib/cola_mensajes.py
+    SOCKETIO_ASYNC_MODE: str = ""  # Vacío para detectarlo, "gevent" con GUNICORN_PERFIL=gevent
+    BITACORAS_LOTE: int = 0  # Cero para guardarlas con el cambio, mayor a cero para insertarlas por lotes, vea lib/bitacoras.py
+    BITACORAS_LOTE_SEG: float = 2.0  # Con lotes, lo más que espera una bitácora en memoria
+    CONTRASENAS_ESQUEMA: str = "pbkdf2_sha256"  # argon2 o bcrypt requieren instalar argon2-cffi o bcrypt
+    CONTRASENAS_HILOS: int = os.cpu_count() or 1  # Verificaciones de contraseñas al mismo tiempo por worker
+    CONTRASENAS_COLA: int = 200  # Verificaciones que pueden esperar, las siguientes se rechazan
+    INTENTOS_ACCESO_RAFAGA: int = 5  # Intentos de acceso seguidos por correo electrónico
+    INTENTOS_ACCESO_POR_MINUTO: float = 5  # Después de la ráfaga, intentos por minuto por correo electrónico
     TOKEN_OAUTH2_EXPIRES_IN_SEG: int = 24 * 60 * 60  # Un día
+    TOKEN_OAUTH2_RENOVACION_EXPIRES_IN_SEG: int = 7 * 24 * 60 * 60  # Una semana
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     PREFIX: str = os.getenv("PREFIX", "")
 
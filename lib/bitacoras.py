@@ -0,0 +1,115 @@
+"""
+Registro de bitácoras
+
+Las API guardaban el cambio con un commit y después la bitácora con otro, dos escrituras a disco por petición.
+Aquí la bitácora se agrega a la sesión y se confirma en el mismo commit que el cambio, por eso se registra antes de guardar
+
+    bitacoras.agregar("TURNOS", usuario.id, f"El turno {turno.id} ha sido tomado", url_for("turnos.detail", turno_id=turno.id))
+    turno.save()
+
+Con BITACORAS_LOTE mayor a cero se juntan en memoria y se insertan varias en una sola sentencia
+al llegar a esa cantidad, cada BITACORAS_LOTE_SEG segundos y al terminar el proceso.
+A cambio, si el proceso muere de golpe se pierden las que no se habían insertado.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from config.settings import get_settings
+from lib import catalogos
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.extensions import database
+
+settings = get_settings()
+
+REINTENTOS_POR_LOTE = 10  # Si falla la inserción se guardan hasta diez lotes para reintentar, los demás se descartan
+
+registro = logging.getLogger(__name__)
+
+
+class Bitacoras:
+    """Registro de bitácoras en la misma transacción o por lotes"""
+
+    def __init__(self, lote: int = None, segundos: float = None):
+        self.lote = settings.BITACORAS_LOTE if lote is None else lote
+        self.segundos = settings.BITACORAS_LOTE_SEG if segundos is None else segundos
+        self._bloqueo = threading.Lock()
+        self._pendientes = []
+        self._engine = None
+        self._temporizador_pid = None
+        self._detener = threading.Event()
+
+    def agregar(self, modulo_nombre: str, usuario_id: int, descripcion: str, url: str):
+        """Agregar una bitácora, se confirma con el siguiente commit o con el siguiente lote"""
+        modulo = catalogos.modulos.por_nombre(modulo_nombre)
+        if modulo is None:
+            # Sin el módulo no se puede guardar, pero no debe impedir el cambio que la originó
+            registro.warning("No existe el módulo %s, se omite la bitácora: %s", modulo_nombre, descripcion)
+            return
+        modulo_id = modulo.id
+        if self.lote <= 0:
+            database.session.add(Bitacora(modulo_id=modulo_id, usuario_id=usuario_id, descripcion=descripcion, url=url))
+            return
+        ahora = datetime.now()
+        with self._bloqueo:
+            self._engine = database.engine
+            self._pendientes.append(
+                {
+                    "modulo_id": modulo_id,
+                    "usuario_id": usuario_id,
+                    "descripcion": descripcion,
+                    "url": url,
+                    "creado": ahora,
+                    "modificado": ahora,
+                }
+            )
+            lleno = len(self._pendientes) >= self.lote
+        self._iniciar_temporizador()
+        if lleno:
+            self.vaciar()
+
+    def vaciar(self) -> int:
+        """Insertar las bitácoras pendientes en una sola sentencia, entrega cuántas se insertaron"""
+        with self._bloqueo:
+            filas, self._pendientes = self._pendientes, []
+            engine = self._engine
+        if not filas:
+            return 0
+        try:
+            with engine.begin() as conexion:
+                conexion.execute(Bitacora.__table__.insert().values(filas))
+        except SQLAlchemyError:
+            registro.exception("No se pudieron insertar %s bitácoras", len(filas))
+            with self._bloqueo:
+                # Se reintentan en el siguiente vaciado, sin dejar que crezcan sin límite
+                self._pendientes = (filas + self._pendientes)[-self.lote * REINTENTOS_POR_LOTE :]
+            return 0
+        return len(filas)
+
+    def detener(self):
+        """Detener el temporizador e insertar las pendientes"""
+        self._detener.set()
+        self.vaciar()
+
+    def _iniciar_temporizador(self):
+        """Iniciar el hilo que vacía cada BITACORAS_LOTE_SEG segundos, uno por proceso"""
+        with self._bloqueo:
+            # Los hilos no sobreviven al fork de Gunicorn, por eso se compara el PID
+            if self._temporizador_pid == os.getpid():
+                return
+            self._temporizador_pid = os.getpid()
+        threading.Thread(target=self._temporizar, daemon=True).start()
+
+    def _temporizar(self):
+        """Vaciar cada BITACORAS_LOTE_SEG segundos hasta que se detenga"""
+        while not self._detener.wait(self.segundos):
+            self.vaciar()
+
+
+bitacoras = Bitacoras()
+atexit.register(bitacoras.vaciar)  # Solo la instancia del módulo, las de las pruebas se vacían a mano
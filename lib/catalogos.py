@@ -0,0 +1,111 @@
+"""
+Catálogos en memoria
+
+Copias inmutables de los catálogos que casi no cambian, para que los endpoints
+de turnos no los consulten en cada petición.
+
+- Cada catálogo se carga completo con una sola consulta y se indexa por id y por nombre
+- Los registros son namedtuple, no se pueden modificar ni pertenecen a la sesión de SQLAlchemy
+- Por nombre sólo se encuentran los registros con estatus A, por id se encuentran todos
+- Se vuelve a cargar al pasar CATALOGOS_TTL_SEG segundos o al invalidarlo desde las vistas de administración
+- Si un id o nombre no está, se vuelve a cargar una vez, así otro worker encuentra lo que se acaba de crear;
+  si sigue sin estar se recuerda hasta la siguiente carga para no consultar con cada petición inválida
+
+Ejemplo
+    from lib import catalogos
+    en_espera = catalogos.turnos_estados.por_nombre("EN ESPERA")
+    turno.turno_estado_id = en_espera.id
+
+Después de guardar cambios en un catálogo, invalidarlo
+
+    turno_estado.save()
+    catalogos.turnos_estados.invalidar()
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from config.settings import get_settings
+from tauro.blueprints.modulos.models import Modulo
+from tauro.blueprints.turnos_estados.models import TurnoEstado
+from tauro.blueprints.turnos_tipos.models import TurnoTipo
+from tauro.blueprints.ubicaciones.models import Ubicacion
+from tauro.blueprints.unidades.models import Unidad
+from tauro.extensions import database
+
+settings = get_settings()
+
+FALTANTES_MAXIMO = 1000  # Llaves inexistentes que se recuerdan por carga, las demás ya no provocan otra carga
+
+
+class Catalogo:
+    """Catálogo en memoria con tiempo de vida e invalidación explícita"""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.registro = namedtuple(f"{modelo.__name__}Registro", modelo.__table__.columns.keys())
+        self._bloqueo = threading.Lock()
+        self._indices = None  # Tupla con (por_id, por_nombre, cargado, faltantes)
+
+    def _cargar(self) -> tuple:
+        """Consultar todos los registros y elaborar los índices"""
+        por_id = {}
+        por_nombre = {}
+        columnas = [getattr(self.modelo, columna) for columna in self.registro._fields]
+        for renglon in database.session.query(*columnas).order_by(self.modelo.id).all():
+            registro = self.registro(*renglon)
+            por_id[registro.id] = registro
+            if registro.estatus == "A":
+                por_nombre.setdefault(registro.nombre, registro)
+        return por_id, por_nombre, time.monotonic(), set()
+
+    def _obtener_indices(self) -> tuple:
+        """Entregar los índices, cargarlos si no los hay o si ya vencieron"""
+        indices = self._indices
+        if indices is None or time.monotonic() - indices[2] > settings.CATALOGOS_TTL_SEG:
+            with self._bloqueo:
+                indices = self._indices
+                if indices is None or time.monotonic() - indices[2] > settings.CATALOGOS_TTL_SEG:
+                    indices = self._cargar()
+                    self._indices = indices
+        return indices
+
+    def _buscar(self, indice: int, llave):
+        """Buscar en el índice, si no está volver a cargar una vez antes de entregar None"""
+        indices = self._obtener_indices()
+        registro = indices[indice].get(llave)
+        if registro is not None or (indice, llave) in indices[3] or len(indices[3]) >= FALTANTES_MAXIMO:
+            return registro
+        with self._bloqueo:
+            # Si otro hilo ya lo volvió a cargar mientras se esperaba el bloqueo, se usa esa carga
+            if self._indices is indices or self._indices is None:
+                self._indices = self._cargar()
+            indices = self._indices
+        registro = indices[indice].get(llave)
+        if registro is None:
+            indices[3].add((indice, llave))
+        return registro
+
+    def por_id(self, registro_id: int):
+        """Entregar el registro con ese id o None si no existe"""
+        return self._buscar(0, registro_id)
+
+    def por_nombre(self, nombre: str):
+        """Entregar el registro activo con ese nombre o None si no existe"""
+        return self._buscar(1, nombre)
+
+    def todos(self) -> list:
+        """Entregar todos los registros ordenados por id"""
+        return list(self._obtener_indices()[0].values())
+
+    def invalidar(self):
+        """Descartar la copia para que la siguiente consulta la vuelva a cargar"""
+        self._indices = None
+
+
+modulos = Catalogo(Modulo)
+turnos_estados = Catalogo(TurnoEstado)
+turnos_tipos = Catalogo(TurnoTipo)
+ubicaciones = Catalogo(Ubicacion)
+unidades = Catalogo(Unidad)
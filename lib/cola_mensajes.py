@@ -0,0 +1,244 @@
+"""
+Cola de mensajes para Socket.IO
+
+Con varios workers de Gunicorn cada proceso tiene sus propios clientes de Socket.IO,
+para que un envío hecho en un worker llegue a las pantallas conectadas a los demás
+se necesita una cola de mensajes que comparta los envíos entre procesos.
+
+SOCKETIO_MESSAGE_QUEUE acepta
+
+- Vacío, un solo proceso, sin cola de mensajes (como antes)
+- tauro://127.0.0.1:5021 el distribuidor de este repositorio por TCP
+- tauro+unix:///tmp/tauro_socketio.sock el distribuidor de este repositorio por un socket UNIX
+- redis://, kafka://, zmq+tcp://, amqp:// los que ya soporta Flask-SocketIO
+
+El distribuidor es un pub/sub mínimo: reenvía cada mensaje recibido a todas las conexiones suscritas.
+Cada mensaje va precedido por su longitud; el primero de cada conexión dice si sólo publica o también se suscribe.
+Para arrancarlo
+
+    cli socketio distribuidor tauro://127.0.0.1:5021
+
+En las pruebas se puede levantar en un hilo con Distribuidor(url).iniciar_en_hilo()
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+ESQUEMAS = ("tauro", "tauro+unix")
+ENCABEZADO = struct.Struct("!I")  # Longitud del mensaje, entero sin signo de 4 bytes
+TAMANO_MAXIMO = 16 * 1024 * 1024  # Un envío de Socket.IO nunca debería acercarse a esto
+ESPERA_RECONECTAR_SEG = 1
+SUSCRIBIR = b"suscribir"
+PUBLICAR = b"publicar"
+
+bitacora = logging.getLogger(__name__)
+
+
+def es_cola_tauro(url: str) -> bool:
+    """Verificar si la URL es del distribuidor de este repositorio"""
+    return urlparse(url).scheme in ESQUEMAS
+
+
+def _direccion(url: str):
+    """Entregar la familia y la dirección del socket a partir de la URL"""
+    partes = urlparse(url)
+    if partes.scheme == "tauro+unix":
+        return socket.AF_UNIX, partes.path
+    if partes.scheme == "tauro":
+        return socket.AF_INET, (partes.hostname or "127.0.0.1", partes.port or 5021)
+    raise ValueError(f"Esquema de cola de mensajes no soportado: {partes.scheme}")
+
+
+def _escribir(conexion: socket.socket, mensaje: bytes):
+    """Enviar un mensaje precedido por su longitud"""
+    conexion.sendall(ENCABEZADO.pack(len(mensaje)) + mensaje)
+
+
+def _leer_exacto(archivo, cantidad: int) -> bytes:
+    """Leer exactamente esa cantidad de bytes, entrega vacío si se cerró la conexión"""
+    datos = archivo.read(cantidad)
+    if datos is None or len(datos) < cantidad:
+        return b""
+    return datos
+
+
+def _leer(archivo) -> bytes:
+    """Leer el siguiente mensaje, entrega vacío si se cerró la conexión"""
+    encabezado = _leer_exacto(archivo, ENCABEZADO.size)
+    if not encabezado:
+        return b""
+    (longitud,) = ENCABEZADO.unpack(encabezado)
+    if longitud > TAMANO_MAXIMO:
+        raise ValueError(f"Mensaje de {longitud} bytes excede el máximo")
+    return _leer_exacto(archivo, longitud)
+
+
+def opciones_socketio(url: str) -> dict:
+    """Entregar los parámetros para socketio.init_app según SOCKETIO_MESSAGE_QUEUE"""
+    if not url:
+        return {}
+    if es_cola_tauro(url):
+        return {"client_manager": ColaMensajesManager(url)}
+    return {"message_queue": url}
+
+
+class ColaMensajesManager(PubSubManager):
+    """Administrador de clientes de Socket.IO que comparte los envíos por el distribuidor"""
+
+    name = "tauro"
+
+    def __init__(self, url: str, channel: str = "flask-socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.url = url
+        self._familia, self._direccion = _direccion(url)
+        self._conexion = None
+        self._bloqueo = threading.Lock()
+
+    def _conectar(self) -> socket.socket:
+        """Entregar la conexión con el distribuidor, abrirla si no la hay"""
+        if self._conexion is None:
+            conexion = socket.socket(self._familia, socket.SOCK_STREAM)
+            conexion.connect(self._direccion)
+            if self._familia == socket.AF_INET:
+                conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Si sólo escribe no se suscribe, así el distribuidor no le reenvía mensajes que nadie leería
+            _escribir(conexion, PUBLICAR if self.write_only else SUSCRIBIR)
+            self._conexion = conexion
+        return self._conexion
+
+    def _cerrar(self):
+        """Cerrar la conexión para que se vuelva a abrir en el siguiente uso"""
+        conexion, self._conexion = self._conexion, None
+        if conexion is not None:
+            try:
+                conexion.close()
+            except OSError:
+                pass
+
+    def _publish(self, data):
+        """Publicar un mensaje, si falla la conexión se intenta una vez más"""
+        mensaje = json.dumps({"channel": self.channel, "data": data}).encode("utf-8")
+        for _ in range(2):
+            with self._bloqueo:
+                try:
+                    _escribir(self._conectar(), mensaje)
+                    return
+                except OSError:
+                    self._cerrar()
+        self._get_logger().error("No se pudo publicar en la cola de mensajes %s", self.url)
+
+    def _listen(self):
+        """Entregar los mensajes del canal conforme llegan, se reconecta si se pierde la conexión"""
+        while True:
+            try:
+                with self._bloqueo:
+                    conexion = self._conectar()
+                archivo = conexion.makefile("rb")
+                while True:
+                    mensaje = _leer(archivo)
+                    if not mensaje:
+                        break
+                    contenido = json.loads(mensaje)
+                    if contenido.get("channel") == self.channel:
+                        yield contenido["data"]
+            except (OSError, ValueError) as error:
+                self._get_logger().warning("Cola de mensajes %s: %s", self.url, error)
+            with self._bloqueo:
+                self._cerrar()
+            time.sleep(ESPERA_RECONECTAR_SEG)
+
+
+class _Manejador(socketserver.BaseRequestHandler):
+    """Atiende una conexión: la suscribe si lo pide y reenvía cada mensaje que llegue"""
+
+    def handle(self):
+        try:
+            archivo = self.request.makefile("rb")
+            if _leer(archivo) == SUSCRIBIR:
+                self.server.agregar(self.request)
+            while True:
+                mensaje = _leer(archivo)
+                if not mensaje:
+                    break
+                self.server.reenviar(mensaje)
+        except (OSError, ValueError) as error:
+            bitacora.warning("Conexión descartada: %s", error)
+        finally:
+            self.server.quitar(self.request)
+
+
+class _ServidorBase:
+    """Lista de conexiones y reenvío compartidos por los servidores TCP y UNIX"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def iniciar_conexiones(self):
+        self._conexiones = {}
+        self._bloqueo = threading.Lock()
+
+    def agregar(self, conexion: socket.socket):
+        with self._bloqueo:
+            self._conexiones[conexion] = threading.Lock()
+
+    def quitar(self, conexion: socket.socket):
+        with self._bloqueo:
+            self._conexiones.pop(conexion, None)
+
+    def reenviar(self, mensaje: bytes):
+        """Enviar el mensaje a todas las conexiones, descartar las que fallen"""
+        with self._bloqueo:
+            conexiones = list(self._conexiones.items())
+        for conexion, bloqueo in conexiones:
+            try:
+                with bloqueo:
+                    _escribir(conexion, mensaje)
+            except OSError:
+                self.quitar(conexion)
+
+
+class _ServidorTCP(_ServidorBase, socketserver.ThreadingTCPServer):
+    pass
+
+
+class _ServidorUNIX(_ServidorBase, socketserver.ThreadingUnixStreamServer):
+    pass
+
+
+class Distribuidor:
+    """Distribuidor pub/sub de mensajes entre los workers"""
+
+    def __init__(self, url: str):
+        self.url = url
+        familia, direccion = _direccion(url)
+        if familia == socket.AF_UNIX:
+            if os.path.exists(direccion):
+                os.remove(direccion)
+            self.servidor = _ServidorUNIX(direccion, _Manejador)
+        else:
+            self.servidor = _ServidorTCP(direccion, _Manejador)
+        self.servidor.iniciar_conexiones()
+
+    def iniciar(self):
+        """Atender conexiones hasta que se detenga"""
+        self.servidor.serve_forever()
+
+    def iniciar_en_hilo(self) -> threading.Thread:
+        """Atender conexiones en un hilo, para las pruebas"""
+        hilo = threading.Thread(target=self.iniciar, daemon=True)
+        hilo.start()
+        return hilo
+
+    def detener(self):
+        """Dejar de atender conexiones"""
+        self.servidor.shutdown()
+        self.servidor.server_close()
@@ -0,0 +1,74 @@
+"""
+Compresión de las respuestas
+
+Las pantallas de las salas consultan los turnos cada pocos segundos y la administración descarga
+los listados de datatable_json, todo se enviaba sin comprimir desde el worker gthread de Gunicorn.
+
+- create_app registra comprimir_respuesta con after_request, sólo comprime JSON
+- El HTML no se comprime, lleva el token CSRF junto a lo que escribe el usuario y se expondría a BREACH
+- Se negocia con Accept-Encoding: Brotli si el cliente lo acepta y está instalado (uv add brotli), si no gzip
+- Las respuestas menores a COMPRESION_MINIMO_BYTES, las de archivos y las ya comprimidas se entregan tal cual
+- Las instantáneas se comprimen una vez por codificación y se guardan comprimidas, vea lib/instantaneas.py
+
+Ejemplo
+
+    codificacion = negociar(len(cuerpo))
+    if codificacion:
+        cuerpo = comprimir(cuerpo, codificacion)
+"""
+
+import gzip
+
+from flask import request
+
+from config.settings import get_settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+settings = get_settings()
+
+CODIFICACIONES = ("br", "gzip") if brotli is not None else ("gzip",)  # En orden de preferencia
+COMPRIMIBLES = {"application/json"}
+GZIP_NIVEL = 6  # Equilibrio entre tamaño y CPU para respuestas que se comprimen en cada petición
+BROTLI_CALIDAD = 5
+GZIP_NIVEL_INSTANTANEAS = 9  # Las instantáneas se comprimen una sola vez, conviene el menor tamaño
+BROTLI_CALIDAD_INSTANTANEAS = 9
+
+
+def negociar(tamano: int) -> str | None:
+    """Elegir la codificación que acepta el cliente, None si no acepta ninguna o es menor al mínimo"""
+    if tamano < settings.COMPRESION_MINIMO_BYTES:
+        return None
+    return request.accept_encodings.best_match(CODIFICACIONES)
+
+
+def comprimir(cuerpo: bytes, codificacion: str, instantanea: bool = False) -> bytes:
+    """Comprimir con br o gzip, con más nivel si es una instantánea"""
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=BROTLI_CALIDAD_INSTANTANEAS if instantanea else BROTLI_CALIDAD)
+    return gzip.compress(cuerpo, compresslevel=GZIP_NIVEL_INSTANTANEAS if instantanea else GZIP_NIVEL, mtime=0)
+
+
+def comprimir_respuesta(response):
+    """Comprimir la respuesta si el cliente lo acepta, para registrar con app.after_request"""
+    if response.mimetype not in COMPRIMIBLES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    cuerpo = response.get_data()
+    codificacion = negociar(len(cuerpo))
+    if codificacion is None:
+        return response
+    response.set_data(comprimir(cuerpo, codificacion))
+    response.headers["Content-Encoding"] = codificacion
+    return response
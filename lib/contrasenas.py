@@ -0,0 +1,85 @@
+"""
+Verificación de contraseñas
+
+Verificar una contraseña con PBKDF2 toma decenas de milisegundos de CPU. A las 8:00, cuando cientos
+de usuarios ingresan al mismo tiempo, eso acaparaba los hilos (o con gevent, todo el worker).
+
+- Se verifica en un grupo de CONTRASENAS_HILOS hilos del sistema operativo, PBKDF2 suelta el GIL
+- Como mucho esperan CONTRASENAS_COLA verificaciones más, las siguientes se rechazan con ContrasenasOcupadas
+- Si la contraseña es correcta pero su hash usa un esquema anterior, se entrega el hash nuevo con CONTRASENAS_ESQUEMA
+- Los intentos de acceso por identidad se limitan con intentos_acceso, una cubeta de fichas
+
+Ejemplo
+
+    es_valida, hash_nuevo = verificar(contrasena, usuario.contrasena)
+    if es_valida and hash_nuevo:
+        usuario.contrasena = hash_nuevo
+        usuario.save()
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import get_settings
+from lib.cubetas import Cubetas
+from tauro.extensions import pwd_context
+
+settings = get_settings()
+
+intentos_acceso = Cubetas(capacidad=settings.INTENTOS_ACCESO_RAFAGA, por_minuto=settings.INTENTOS_ACCESO_POR_MINUTO)
+
+
+class ContrasenasOcupadas(Exception):
+    """Hay demasiadas verificaciones de contraseñas esperando"""
+
+
+class Verificador:
+    """Grupo acotado de hilos para verificar contraseñas"""
+
+    def __init__(self, hilos: int, cola: int):
+        self.hilos = hilos
+        self._lugares = threading.BoundedSemaphore(hilos + cola)
+        self._bloqueo = threading.Lock()
+        self._grupo = None
+        self._grupo_pid = None
+
+    def _ejecutar(self, funcion, *args):
+        """Ejecutar la función en el grupo de hilos y esperar su resultado"""
+        with self._bloqueo:
+            # Los hilos no sobreviven al fork de Gunicorn, por eso se compara el PID
+            if self._grupo_pid != os.getpid():
+                self._grupo = self._crear_grupo()
+                self._grupo_pid = os.getpid()
+        if hasattr(self._grupo, "submit"):
+            return self._grupo.submit(funcion, *args).result()
+        return self._grupo.spawn(funcion, *args).get()
+
+    def _crear_grupo(self):
+        """Con gevent, los hilos de ThreadPoolExecutor serían greenlets, se usa el grupo de hilos reales de gevent"""
+        try:
+            from gevent import monkey
+            from gevent.threadpool import ThreadPool
+
+            if monkey.is_module_patched("threading"):
+                return ThreadPool(self.hilos)
+        except ImportError:
+            pass
+        return ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="contrasenas")
+
+    def verificar(self, contrasena: str, hash_guardado: str | None) -> tuple[bool, str | None]:
+        """Verificar la contraseña, entrega si es válida y el hash nuevo si hay que actualizarlo"""
+        if not self._lugares.acquire(blocking=False):
+            raise ContrasenasOcupadas("Hay demasiados accesos en este momento")
+        try:
+            return self._ejecutar(pwd_context.verify_and_update, contrasena, hash_guardado)
+        finally:
+            self._lugares.release()
+
+
+verificador = Verificador(hilos=settings.CONTRASENAS_HILOS, cola=settings.CONTRASENAS_COLA)
+
+
+def verificar(contrasena: str, hash_guardado: str | None) -> tuple[bool, str | None]:
+    """Verificar la contraseña en el grupo de hilos"""
+    return verificador.verificar(contrasena, hash_guardado)
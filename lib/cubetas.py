@@ -0,0 +1,63 @@
+"""
+Cubetas de fichas para limitar intentos por identidad
+
+Cada identidad (por ejemplo el correo electrónico) tiene una cubeta con capacidad para unas fichas,
+cada intento gasta una y se rellenan poco a poco. Si la cubeta está vacía el intento se rechaza.
+
+- Permite ráfagas de hasta la capacidad y después un ritmo constante de fichas por minuto
+- Vive en la memoria del proceso, con varios workers cada uno lleva sus propias cubetas
+- Guarda como mucho MAXIMO_IDENTIDADES cubetas, al llenarse se olvida la que lleva más tiempo sin usarse
+
+Ejemplo
+
+    intentos_acceso = Cubetas(capacidad=5, por_minuto=5)
+    if not intentos_acceso.permitir(email):
+        return "Demasiados intentos"
+    if contrasena_correcta:
+        intentos_acceso.devolver(email)  # Solo cuentan los intentos fallidos
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+MAXIMO_IDENTIDADES = 10000
+
+
+class Cubetas:
+    """Cubetas de fichas por identidad"""
+
+    def __init__(self, capacidad: int, por_minuto: float):
+        self.capacidad = capacidad
+        self.por_segundo = por_minuto / 60
+        self._bloqueo = threading.Lock()
+        self._cubetas = OrderedDict()  # Identidad: (fichas, actualizado)
+
+    def permitir(self, identidad: str) -> bool:
+        """Gastar una ficha de la identidad, entrega falso si no le quedan"""
+        ahora = time.monotonic()
+        with self._bloqueo:
+            fichas, actualizado = self._cubetas.pop(identidad, (self.capacidad, ahora))
+            fichas = min(self.capacidad, fichas + (ahora - actualizado) * self.por_segundo)
+            permitido = fichas >= 1
+            if permitido:
+                fichas -= 1
+            self._cubetas[identidad] = (fichas, ahora)
+            while len(self._cubetas) > MAXIMO_IDENTIDADES:
+                self._cubetas.popitem(last=False)
+        return permitido
+
+    def devolver(self, identidad: str):
+        """Regresar la ficha gastada por la identidad, sin pasar de la capacidad"""
+        with self._bloqueo:
+            if identidad in self._cubetas:
+                fichas, actualizado = self._cubetas[identidad]
+                self._cubetas[identidad] = (min(self.capacidad, fichas + 1), actualizado)
+
+    def reiniciar(self, identidad: str = None):
+        """Llenar la cubeta de la identidad, sin identidad se llenan todas"""
+        with self._bloqueo:
+            if identidad is None:
+                self._cubetas.clear()
+            else:
+                self._cubetas.pop(identidad, None)
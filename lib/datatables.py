@@ -1,8 +1,46 @@
 """
 Datatables
+
+Motor de consultas para los listados de DataTables del lado del servidor.
+
+- Paginación por llave (keyset): al entregar una página se guarda, para ese cliente y esa consulta,
+  el valor de orden de su último renglón; si el mismo cliente pide la página siguiente se consulta con
+  WHERE (orden) > (marcador) en lugar de OFFSET, que recorría todos los anteriores
+- Cualquier otra página (saltar, regresar, otro cliente, otro worker o sin sesión) se consulta con OFFSET
+- Al orden se le agrega la clave primaria para que no haya empates
+- El total se estima con las estadísticas de PostgreSQL cuando pasa de DATATABLES_CONTEO_ESTIMADO_MINIMO
+- Los totales se guardan en memoria por firma del filtro durante DATATABLES_CONTEO_TTL_SEG segundos
+
+Si entre una página y la siguiente se agregan renglones, la siguiente continúa justo después del último que vio
+el cliente, sin repetir renglones como pasaría con OFFSET.
+
+Ejemplo
+
+    draw, start, rows_per_page = get_datatable_parameters()
+    consulta = Bitacora.query.filter(Bitacora.estatus == "A")
+    registros, total = paginar_datatable(consulta, [Bitacora.id.desc()], start, rows_per_page)
+    ...
+    return output_datatable_json(draw, total, data)
 """
 
+import threading
+import time
+from collections import OrderedDict
+
 from flask import request
+from flask_login import current_user
+from sqlalchemy import and_, inspect, or_, tuple_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from config.settings import get_settings
+from tauro.extensions import database
+
+settings = get_settings()
+
+MARCADORES_MAXIMO = 1000  # Clientes y consultas distintas con marcador en memoria
+MARCADORES_TTL_SEG = 300  # Después de este tiempo la página siguiente vuelve a consultarse con OFFSET
+CONTEOS_MAXIMO = 1000  # Firmas distintas con total en memoria
 
 
 def get_datatable_parameters():
@@ -26,3 +64,130 @@ def output_datatable_json(draw, total, data):
         "iTotalDisplayRecords": total,
         "aaData": data,
     }
+
+
+class MotorDataTables:
+    """Paginación por llave y totales baratos para DataTables"""
+
+    def __init__(self, estimado_minimo: int = None, conteo_ttl_seg: int = None):
+        self.estimado_minimo = settings.DATATABLES_CONTEO_ESTIMADO_MINIMO if estimado_minimo is None else estimado_minimo
+        self.conteo_ttl_seg = settings.DATATABLES_CONTEO_TTL_SEG if conteo_ttl_seg is None else conteo_ttl_seg
+        self._bloqueo = threading.Lock()
+        self._marcadores = OrderedDict()  # (cliente, firma, orden): (start siguiente, valores, guardado)
+        self._conteos = OrderedDict()  # firma: (total, contado)
+
+    @staticmethod
+    def _compilar(consulta):
+        """Compilar la consulta sin orden para PostgreSQL, con los parámetros de IN ya expandidos"""
+        return consulta.statement.compile(dialect=database.engine.dialect, compile_kwargs={"render_postcompile": True})
+
+    @staticmethod
+    def _columnas_orden(consulta, orden: list) -> list:
+        """Entregar [(columna, descendente)], terminando con la clave primaria de la entidad"""
+        columnas = []
+        for expresion in orden:
+            if hasattr(expresion, "__clause_element__"):
+                expresion = expresion.__clause_element__()
+            if isinstance(expresion, UnaryExpression) and expresion.modifier in (operators.desc_op, operators.asc_op):
+                columnas.append((expresion.element, expresion.modifier is operators.desc_op))
+            else:
+                columnas.append((expresion, False))
+        llave = inspect(consulta.column_descriptions[0]["entity"]).primary_key[0]
+        if not any(columna.compare(llave) for columna, _ in columnas):
+            columnas.append((llave, columnas[-1][1] if columnas else False))
+        return columnas
+
+    @staticmethod
+    def _despues_de(columnas: list, valores: tuple):
+        """Condición para los renglones que van después del marcador"""
+        if all(descendente == columnas[0][1] for _, descendente in columnas):
+            fila = tuple_(*[columna for columna, _ in columnas])
+            marcador = tuple_(*valores)
+            return fila < marcador if columnas[0][1] else fila > marcador
+        condiciones = []
+        for posicion, (columna, descendente) in enumerate(columnas):
+            iguales = [anterior == valor for (anterior, _), valor in zip(columnas[:posicion], valores[:posicion])]
+            condiciones.append(and_(*iguales, columna < valores[posicion] if descendente else columna > valores[posicion]))
+        return or_(*condiciones)
+
+    def _marcador(self, llave: tuple, start: int) -> tuple | None:
+        """Entregar los valores del marcador si start es la página siguiente a la última que vio el cliente"""
+        with self._bloqueo:
+            marcador = self._marcadores.pop(llave, None)
+        if marcador is None or marcador[0] != start or time.monotonic() - marcador[2] > MARCADORES_TTL_SEG:
+            return None
+        return marcador[1]
+
+    def _guardar_marcador(self, llave: tuple, siguiente: int, valores: tuple):
+        """Guardar el marcador de la última página que vio el cliente, reemplaza al anterior"""
+        with self._bloqueo:
+            self._marcadores[llave] = (siguiente, valores, time.monotonic())
+            self._marcadores.move_to_end(llave)
+            while len(self._marcadores) > MARCADORES_MAXIMO:
+                self._marcadores.popitem(last=False)
+
+    def _estimar(self, compilado) -> int | None:
+        """Estimar los renglones con el plan de PostgreSQL, sin recorrer la tabla"""
+        if database.engine.dialect.name != "postgresql":
+            return None
+        plan = (
+            database.session.connection()
+            .exec_driver_sql("EXPLAIN (FORMAT JSON) " + compilado.string, compilado.params)
+            .scalar()
+        )
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def contar(self, consulta, compilado=None) -> int:
+        """Entregar el total de la consulta, estimado si es grande y guardado en memoria por firma"""
+        compilado = compilado if compilado is not None else self._compilar(consulta)
+        firma = (compilado.string, repr(sorted(compilado.params.items())))
+        with self._bloqueo:
+            conteo = self._conteos.get(firma)
+            if conteo is not None and time.monotonic() - conteo[1] <= self.conteo_ttl_seg:
+                self._conteos.move_to_end(firma)
+                return conteo[0]
+        total = None
+        if self.estimado_minimo > 0:
+            total = self._estimar(compilado)
+            if total is not None and total < self.estimado_minimo:
+                total = None
+        if total is None:
+            total = consulta.count()
+        if self.conteo_ttl_seg > 0:
+            with self._bloqueo:
+                self._conteos[firma] = (total, time.monotonic())
+                self._conteos.move_to_end(firma)
+                while len(self._conteos) > CONTEOS_MAXIMO:
+                    self._conteos.popitem(last=False)
+        return total
+
+    def paginar(self, consulta, orden: list, start: int, rows_per_page: int, cliente=None) -> tuple[list, int]:
+        """Entregar los registros de la página y el total, sin cliente siempre con OFFSET"""
+        consulta = consulta.order_by(None)
+        compilado = self._compilar(consulta)
+        columnas = self._columnas_orden(consulta, orden)
+        firma = (compilado.string, repr(sorted(compilado.params.items())), tuple((str(c), d) for c, d in columnas))
+        llave = (cliente, *firma)
+        start = max(start, 0)
+        valores = self._marcador(llave, start) if cliente is not None else None
+        pagina = consulta.add_columns(*[columna for columna, _ in columnas])
+        pagina = pagina.order_by(*[columna.desc() if descendente else columna.asc() for columna, descendente in columnas])
+        if valores is not None:
+            pagina = pagina.filter(self._despues_de(columnas, valores))
+        elif start > 0:
+            pagina = pagina.offset(start)
+        if rows_per_page >= 0:
+            pagina = pagina.limit(rows_per_page)
+        renglones = pagina.all()
+        if renglones and cliente is not None:
+            self._guardar_marcador(llave, start + len(renglones), tuple(renglones[-1][1:]))
+        return [renglon[0] for renglon in renglones], self.contar(consulta, compilado)
+
+
+motor = MotorDataTables()
+
+
+def paginar_datatable(consulta, orden: list, start: int, rows_per_page: int) -> tuple[list, int]:
+    """Entregar los registros de la página y el total para el usuario en sesión, vea MotorDataTables"""
+    cliente = current_user.get_id() if current_user.is_authenticated else None
+    return motor.paginar(consulta, orden, start, rows_per_page, cliente)
@@ -0,0 +1,164 @@
+"""
+Esperas estimadas
+
+Estimación en línea de cuánto esperará un turno, sin consultar la base de datos en cada petición.
+
+Por cada (unidad, tipo de turno) se lleva en memoria
+- La atención, promedio exponencial (EWMA) de los segundos del inicio al término de los turnos completados
+- Las ventanillas, usuarios activos de la unidad que atienden ese tipo de turno (UsuarioTurnoTipo)
+- Los turnos EN ESPERA
+
+La tasa de servicio del grupo es ventanillas / atención, así un turno con N turnos adelante
+espera N * atención / ventanillas segundos. Sin ventanillas no hay estimado.
+
+- Cada evento se aplica en O(1): formar al crear, salir al tomarlo o cambiarlo de estado, completar con su atención
+- Las ventanillas y los turnos en espera se consultan agrupados al pasar ESPERAS_TTL_SEG o al invalidar,
+  así con varios workers cada uno corrige lo que cambiaron los demás
+- La atención de un grupo empieza con el promedio de los últimos días de estadisticas_diarias,
+  o con ESPERAS_ATENCION_INICIAL_SEG si no hay; cada turno completado pesa ESPERAS_ALFA
+
+Ejemplo, después de guardar un turno nuevo
+
+    turno.save()
+    espera = esperas.formar(turno.unidad_id, turno.turno_tipo_id)
+
+Después de cambiar los tipos de turno o la unidad de un usuario, invalidar
+
+    esperas.invalidar()
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import distinct, func
+
+from config.settings import get_settings
+from lib import catalogos
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
+from tauro.extensions import database
+
+settings = get_settings()
+
+DIAS_ESTADISTICAS = 7  # Días de estadisticas_diarias para la atención inicial de cada grupo
+
+
+class Esperas:
+    """Atención promedio, ventanillas y turnos en espera por unidad y tipo de turno"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._atenciones = {}  # (unidad_id, turno_tipo_id): segundos
+        self._ventanillas = {}  # (unidad_id, turno_tipo_id): cantidad
+        self._en_espera = {}  # (unidad_id, turno_tipo_id): cantidad
+        self._cargado = None
+
+    def _cargar(self) -> tuple[dict, dict, dict]:
+        """Consultar agrupados las ventanillas, los turnos en espera y las atenciones de los últimos días"""
+        ventanillas = (
+            database.session.query(Usuario.unidad_id, UsuarioTurnoTipo.turno_tipo_id, func.count(distinct(Usuario.id)))
+            .join(UsuarioTurnoTipo, UsuarioTurnoTipo.usuario_id == Usuario.id)
+            .filter(Usuario.estatus == "A")
+            .filter(UsuarioTurnoTipo.es_activo.is_(True))
+            .filter(UsuarioTurnoTipo.estatus == "A")
+            .group_by(Usuario.unidad_id, UsuarioTurnoTipo.turno_tipo_id)
+            .all()
+        )
+        en_espera = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        turnos = (
+            database.session.query(Turno.unidad_id, Turno.turno_tipo_id, func.count())
+            .filter(Turno.turno_estado_id == (en_espera.id if en_espera else None))
+            .filter(Turno.estatus == "A")
+            .group_by(Turno.unidad_id, Turno.turno_tipo_id)
+            .all()
+        )
+        atenciones = (
+            database.session.query(
+                EstadisticaDiaria.unidad_id,
+                EstadisticaDiaria.turno_tipo_id,
+                func.sum(EstadisticaDiaria.atencion_promedio * EstadisticaDiaria.cantidad)
+                / func.sum(EstadisticaDiaria.cantidad),
+            )
+            .filter(EstadisticaDiaria.fecha >= date.today() - timedelta(days=DIAS_ESTADISTICAS))
+            .filter(EstadisticaDiaria.atencion_promedio.is_not(None))
+            .filter(EstadisticaDiaria.estatus == "A")
+            .group_by(EstadisticaDiaria.unidad_id, EstadisticaDiaria.turno_tipo_id)
+            .all()
+        )
+        return (
+            {(unidad_id, turno_tipo_id): cantidad for unidad_id, turno_tipo_id, cantidad in ventanillas},
+            {(unidad_id, turno_tipo_id): cantidad for unidad_id, turno_tipo_id, cantidad in turnos},
+            {(unidad_id, turno_tipo_id): segundos for unidad_id, turno_tipo_id, segundos in atenciones if segundos},
+        )
+
+    def _asegurar(self):
+        """Consultar las ventanillas y los turnos en espera si no los hay o si ya vencieron"""
+        cargado = self._cargado
+        if cargado is not None and time.monotonic() - cargado <= settings.ESPERAS_TTL_SEG:
+            return
+        ventanillas, en_espera, atenciones = self._cargar()
+        with self._bloqueo:
+            self._ventanillas = ventanillas
+            self._en_espera = en_espera
+            for grupo, segundos in atenciones.items():
+                self._atenciones.setdefault(grupo, float(segundos))
+            self._cargado = time.monotonic()
+
+    def _estimar(self, grupo: tuple, adelante: int) -> int | None:
+        """Segundos de espera con adelante turnos antes, se llama con el bloqueo tomado"""
+        ventanillas = self._ventanillas.get(grupo, 0)
+        if ventanillas == 0:
+            return None
+        return round(adelante * self._atenciones.get(grupo, settings.ESPERAS_ATENCION_INICIAL_SEG) / ventanillas)
+
+    def estimar_fila(self, turnos: list, en_espera_id: int) -> dict:
+        """Entregar {turno_id: segundos} de los turnos en espera de una fila ordenada, según cuántos de su grupo van antes"""
+        self._asegurar()
+        adelante = {}
+        estimados = {}
+        with self._bloqueo:
+            for turno in turnos:
+                if turno.turno_estado_id != en_espera_id:
+                    continue
+                grupo = (turno.unidad_id, turno.turno_tipo_id)
+                estimados[turno.id] = self._estimar(grupo, adelante.get(grupo, 0))
+                adelante[grupo] = adelante.get(grupo, 0) + 1
+        return estimados
+
+    def formar(self, unidad_id: int, turno_tipo_id: int) -> int | None:
+        """Formar un turno nuevo y entregar los segundos que esperará"""
+        self._asegurar()
+        grupo = (unidad_id, turno_tipo_id)
+        with self._bloqueo:
+            adelante = self._en_espera.get(grupo, 0)
+            self._en_espera[grupo] = adelante + 1
+            return self._estimar(grupo, adelante)
+
+    def salir(self, unidad_id: int, turno_tipo_id: int):
+        """Quitar de la espera un turno que se tomó o cambió de estado"""
+        grupo = (unidad_id, turno_tipo_id)
+        with self._bloqueo:
+            if self._en_espera.get(grupo, 0) > 0:
+                self._en_espera[grupo] -= 1
+
+    def completar(self, unidad_id: int, turno_tipo_id: int, segundos: float):
+        """Agregar al promedio exponencial los segundos de atención de un turno completado"""
+        if segundos is None or segundos < 0:
+            return
+        grupo = (unidad_id, turno_tipo_id)
+        with self._bloqueo:
+            atencion = self._atenciones.get(grupo)
+            if atencion is None:
+                self._atenciones[grupo] = float(segundos)
+            else:
+                self._atenciones[grupo] = settings.ESPERAS_ALFA * segundos + (1 - settings.ESPERAS_ALFA) * atencion
+
+    def invalidar(self):
+        """Descartar las ventanillas y los turnos en espera para que se vuelvan a consultar, la atención se conserva"""
+        self._cargado = None
+
+
+esperas = Esperas()
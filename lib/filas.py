@@ -0,0 +1,228 @@
+"""
+Filas de despacho por unidad
+
+TomarTurno consultaba en cada clic los turnos EN ESPERA de la unidad ordenados por el nombre del tipo de turno.
+Aquí cada unidad tiene en memoria un montículo (heapq) por tipo de turno con sus turnos en espera.
+El siguiente turno de una ventanilla es el menor (nivel, numero) entre las cimas de sus tipos de turno,
+así se atiende primero el tipo de turno de menor nivel, por ejemplo ATENCION URGENTE antes que NORMAL.
+
+- Una unidad se carga con una consulta la primera vez que se toma de ella, al pasar FILAS_TTL_SEG o al invalidarla
+- Agregar un turno y sacar el siguiente cuestan O(log n); al quitarlo sólo se marca y se descarta al llegar a la cima
+- La fila sólo propone, el turno se bloquea con FOR UPDATE SKIP LOCKED y se confirma que siga EN ESPERA;
+  si otra ventanilla u otro worker ya lo tomó se descarta y se propone el siguiente,
+  si sólo estaba bloqueado y sigue EN ESPERA se regresa a la fila al terminar, por si aquella transacción no lo toma
+- Si la fila se queda sin candidatos se consulta la base de datos en el mismo orden, por si hay turnos
+  creados en otro worker; si ahí aparece uno la unidad se invalida para volver a cargarse
+- verificar compara la fila contra la consulta SQL, al volver a cargar una unidad se registran las diferencias;
+  /turnos/verificar_filas lo hace con las unidades cargadas en el worker que atiende la petición
+
+Ejemplo
+
+    turno = filas.tomar(usuario.unidad_id, usuario.turnos_tipos_ids, en_espera.id)
+
+Después de guardar un turno que entra a EN ESPERA, o de cambiar uno que sale
+
+    filas.agregar(turno)
+    filas.quitar(turno)
+"""
+
+import heapq
+import logging
+import threading
+import time
+
+from config.settings import get_settings
+from lib import catalogos
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_tipos.models import TurnoTipo
+from tauro.extensions import database
+
+settings = get_settings()
+
+bitacora = logging.getLogger(__name__)
+
+
+class Filas:
+    """Turnos en espera por unidad, en montículos por tipo de turno ordenados por número"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._montones = {}  # unidad_id: {turno_tipo_id: [(numero, turno_id), ...]}
+        self._en_espera = {}  # unidad_id: {turno_id, ...} los que siguen en la fila
+        self._cargados = {}  # unidad_id: time.monotonic() de la carga
+
+    @staticmethod
+    def consulta(unidad_id: int, en_espera_id: int, turnos_tipos_ids: list = None):
+        """Consulta de los turnos en espera de la unidad en el orden de despacho (nivel, numero)"""
+        consulta = (
+            Turno.query.join(TurnoTipo)
+            .filter(Turno.turno_estado_id == en_espera_id)
+            .filter(Turno.unidad_id == unidad_id)
+            .filter(Turno.estatus == "A")
+        )
+        if turnos_tipos_ids is not None:
+            consulta = consulta.filter(Turno.turno_tipo_id.in_(turnos_tipos_ids))
+        return consulta.order_by(TurnoTipo.nivel, Turno.numero, Turno.id)
+
+    @staticmethod
+    def _nivel(turno_tipo_id: int) -> int:
+        """Nivel del tipo de turno, menor se atiende primero"""
+        turno_tipo = catalogos.turnos_tipos.por_id(turno_tipo_id)
+        return turno_tipo.nivel if turno_tipo else 0
+
+    @classmethod
+    def _ordenar(cls, montones: dict, en_espera: set) -> list:
+        """Entregar los turno_id de la fila en el orden de despacho"""
+        llaves = []
+        for turno_tipo_id, monton in montones.items():
+            nivel = cls._nivel(turno_tipo_id)
+            llaves += [(nivel, numero, turno_id) for numero, turno_id in monton if turno_id in en_espera]
+        return [turno_id for _, _, turno_id in sorted(llaves)]
+
+    @staticmethod
+    def _diferencias(fila: list, base: list) -> list:
+        """Describir en qué difiere el orden de la fila del de la base de datos"""
+        diferencias = [f"Turno {turno_id} en la fila pero no en espera" for turno_id in sorted(set(fila) - set(base))]
+        diferencias += [f"Turno {turno_id} en espera pero no en la fila" for turno_id in sorted(set(base) - set(fila))]
+        comunes = set(fila) & set(base)
+        fila = [turno_id for turno_id in fila if turno_id in comunes]
+        base = [turno_id for turno_id in base if turno_id in comunes]
+        for posicion, (propuesto, esperado) in enumerate(zip(fila, base)):
+            if propuesto != esperado:
+                diferencias.append(f"En la posición {posicion} la fila tiene el turno {propuesto} y la base el {esperado}")
+                break
+        return diferencias
+
+    def _cargar(self, unidad_id: int, en_espera_id: int) -> tuple[dict, set]:
+        """Consultar los turnos en espera de la unidad y formar sus montículos"""
+        turnos = (
+            database.session.query(Turno.id, Turno.turno_tipo_id, Turno.numero)
+            .filter(Turno.turno_estado_id == en_espera_id)
+            .filter(Turno.unidad_id == unidad_id)
+            .filter(Turno.estatus == "A")
+            .all()
+        )
+        montones = {}
+        for turno_id, turno_tipo_id, numero in turnos:
+            montones.setdefault(turno_tipo_id, []).append((numero, turno_id))
+        for monton in montones.values():
+            heapq.heapify(monton)
+        return montones, {turno_id for turno_id, _, _ in turnos}
+
+    def _asegurar(self, unidad_id: int, en_espera_id: int):
+        """Cargar la unidad si no lo está o si ya venció, registrar en qué difería la fila anterior"""
+        cargado = self._cargados.get(unidad_id)
+        if cargado is not None and time.monotonic() - cargado <= settings.FILAS_TTL_SEG:
+            return
+        montones, en_espera = self._cargar(unidad_id, en_espera_id)
+        with self._bloqueo:
+            if unidad_id in self._montones:
+                fila = self._ordenar(self._montones[unidad_id], self._en_espera[unidad_id])
+                for diferencia in self._diferencias(fila, self._ordenar(montones, en_espera)):
+                    bitacora.info("Unidad %s: %s", unidad_id, diferencia)
+            self._montones[unidad_id] = montones
+            self._en_espera[unidad_id] = en_espera
+            self._cargados[unidad_id] = time.monotonic()
+
+    def _sacar(self, unidad_id: int, niveles: dict) -> int | None:
+        """Sacar de la fila el turno_id de menor (nivel, numero) de los tipos de turno dados"""
+        with self._bloqueo:
+            montones = self._montones.get(unidad_id, {})
+            en_espera = self._en_espera.get(unidad_id, set())
+            mejor = None
+            for turno_tipo_id, nivel in niveles.items():
+                monton = montones.get(turno_tipo_id)
+                while monton and monton[0][1] not in en_espera:
+                    heapq.heappop(monton)
+                if monton and (mejor is None or (nivel, *monton[0]) < mejor[0]):
+                    mejor = ((nivel, *monton[0]), monton)
+            if mejor is None:
+                return None
+            _, turno_id = heapq.heappop(mejor[1])
+            en_espera.discard(turno_id)
+            return turno_id
+
+    def _regresar(self, unidad_id: int, saltados: list):
+        """Regresar a la fila los turnos que estaban bloqueados por otra transacción y siguen en espera"""
+        with self._bloqueo:
+            montones = self._montones.get(unidad_id)
+            en_espera = self._en_espera.get(unidad_id)
+            if montones is None:
+                return
+            for turno_id, turno_tipo_id, numero in saltados:
+                if turno_id not in en_espera:
+                    heapq.heappush(montones.setdefault(turno_tipo_id, []), (numero, turno_id))
+                    en_espera.add(turno_id)
+
+    def tomar(self, unidad_id: int, turnos_tipos_ids: list, en_espera_id: int) -> Turno | None:
+        """Entregar bloqueado el siguiente turno en espera de la unidad para los tipos de turno de la ventanilla"""
+        self._asegurar(unidad_id, en_espera_id)
+        niveles = {turno_tipo_id: self._nivel(turno_tipo_id) for turno_tipo_id in turnos_tipos_ids}
+        saltados = []
+        try:
+            while (turno_id := self._sacar(unidad_id, niveles)) is not None:
+                turno = (
+                    Turno.query.filter(Turno.id == turno_id)
+                    .filter(Turno.turno_estado_id == en_espera_id)
+                    .filter(Turno.estatus == "A")
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if turno is not None:
+                    return turno
+                # Sin bloquear, si sigue en espera es que otra transacción lo tiene bloqueado
+                saltado = (
+                    database.session.query(Turno.turno_tipo_id, Turno.numero)
+                    .filter(Turno.id == turno_id)
+                    .filter(Turno.turno_estado_id == en_espera_id)
+                    .filter(Turno.estatus == "A")
+                    .first()
+                )
+                if saltado is not None:
+                    saltados.append((turno_id, *saltado))
+        finally:
+            self._regresar(unidad_id, saltados)
+        turno = self.consulta(unidad_id, en_espera_id, turnos_tipos_ids).with_for_update(skip_locked=True, of=Turno).first()
+        if turno is not None:
+            self.invalidar(unidad_id)
+        return turno
+
+    def agregar(self, turno: Turno):
+        """Agregar a la fila de su unidad un turno que entró a EN ESPERA, si la unidad está cargada"""
+        with self._bloqueo:
+            en_espera = self._en_espera.get(turno.unidad_id)
+            if en_espera is None or turno.id in en_espera:
+                return
+            heapq.heappush(self._montones[turno.unidad_id].setdefault(turno.turno_tipo_id, []), (turno.numero, turno.id))
+            en_espera.add(turno.id)
+
+    def quitar(self, turno: Turno):
+        """Quitar de la fila de su unidad un turno que salió de EN ESPERA"""
+        with self._bloqueo:
+            self._en_espera.get(turno.unidad_id, set()).discard(turno.id)
+
+    def verificar(self, unidad_id: int, en_espera_id: int) -> list:
+        """Comparar la fila de la unidad contra la consulta SQL, entregar las diferencias o una lista vacía"""
+        base = [turno.id for turno in self.consulta(unidad_id, en_espera_id)]
+        with self._bloqueo:
+            if unidad_id not in self._montones:
+                return []
+            fila = self._ordenar(self._montones[unidad_id], self._en_espera[unidad_id])
+        return self._diferencias(fila, base)
+
+    def verificar_cargadas(self, en_espera_id: int) -> dict:
+        """Verificar las unidades cargadas en este proceso, entregar {unidad_id: diferencias} de las que difieren"""
+        with self._bloqueo:
+            unidades_ids = sorted(self._montones)
+        diferencias = {unidad_id: self.verificar(unidad_id, en_espera_id) for unidad_id in unidades_ids}
+        return {unidad_id: lista for unidad_id, lista in diferencias.items() if lista}
+
+    def invalidar(self, unidad_id: int = None):
+        """Descartar la fila de la unidad, o todas, para que se vuelva a consultar"""
+        if unidad_id is None:
+            self._cargados.clear()
+        else:
+            self._cargados.pop(unidad_id, None)
+
+
+filas = Filas()
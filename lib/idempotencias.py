@@ -0,0 +1,100 @@
+"""
+Idempotencia de la creación de turnos
+
+Los kioscos vuelven a enviar crear_turno cuando se les acaba el tiempo de espera y cada reintento imprimía otro turno.
+Si la petición trae el encabezado Idempotency-Key, los reintentos con la misma llave reciben la respuesta original
+sin volver a validar, numerar, insertar, escribir la bitácora ni enviar a las salas.
+
+- La llave es el SHA-256 del endpoint, del cliente (API key o usuario) y del encabezado,
+  así dos clientes no comparten respuestas aunque manden la misma
+- En memoria se guardan como mucho IDEMPOTENCIAS_MAXIMO respuestas por IDEMPOTENCIAS_TTL_SEG,
+  al llenarse se olvida la más antigua
+- En la tabla turnos_idempotencias la llave es única y se inserta en el mismo commit que el turno,
+  un reintento que llega a otro worker, o al mismo tiempo que el original, choca con ella y recibe el turno que ya existe
+
+Ejemplo
+
+    llave = idempotencias.llave(g.current_user)
+    respuesta = idempotencias.obtener(llave, elaborar)
+    if respuesta is not None:
+        return respuesta
+    ...
+    idempotencias.agregar(llave, turno)
+    turno.save()
+    idempotencias.guardar(llave, respuesta)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from flask import request
+from pydantic import BaseModel
+
+from config.settings import get_settings
+from lib.exceptions import MyNotValidParamError
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_idempotencias.models import TurnoIdempotencia
+from tauro.extensions import database
+
+settings = get_settings()
+
+ENCABEZADO = "Idempotency-Key"
+LARGO_MAXIMO = 255
+
+
+class Idempotencias:
+    """Respuestas por llave de idempotencia con tiempo de vida y tamaño máximo"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._respuestas = OrderedDict()  # llave: (respuesta, guardado)
+
+    @staticmethod
+    def llave(cliente) -> str | None:
+        """Entregar la llave del encabezado Idempotency-Key para el endpoint y el cliente, None si no viene"""
+        encabezado = request.headers.get(ENCABEZADO, "").strip()
+        if encabezado == "":
+            return None
+        if len(encabezado) > LARGO_MAXIMO:
+            raise MyNotValidParamError(f"El encabezado {ENCABEZADO} no debe pasar de {LARGO_MAXIMO} caracteres")
+        return hashlib.sha256(f"{request.path}\n{cliente}\n{encabezado}".encode("utf8")).hexdigest()
+
+    def obtener(self, llave: str | None, elaborar: Callable[[Turno], BaseModel]) -> BaseModel | None:
+        """Entregar la respuesta de la llave, de memoria o elaborada con el turno que la tiene en la base de datos"""
+        if llave is None:
+            return None
+        with self._bloqueo:
+            guardada = self._respuestas.get(llave)
+            if guardada is not None and time.monotonic() - guardada[1] <= settings.IDEMPOTENCIAS_TTL_SEG:
+                return guardada[0]
+        turno_id = database.session.query(TurnoIdempotencia.turno_id).filter_by(llave=llave).scalar()
+        if turno_id is None:
+            return None
+        turno = database.session.get(Turno, turno_id)
+        if turno is None:
+            return None
+        respuesta = elaborar(turno)
+        self.guardar(llave, respuesta)
+        return respuesta
+
+    @staticmethod
+    def agregar(llave: str | None, turno: Turno):
+        """Agregar a la sesión la llave del turno, se confirma en el mismo commit que el turno"""
+        if llave is not None:
+            database.session.add(TurnoIdempotencia(llave=llave, turno_id=turno.id))
+
+    def guardar(self, llave: str | None, respuesta: BaseModel):
+        """Guardar en memoria el modelo de la respuesta de la llave, se serializa al entregarlo"""
+        if llave is None:
+            return
+        with self._bloqueo:
+            self._respuestas[llave] = (respuesta, time.monotonic())
+            self._respuestas.move_to_end(llave)
+            while len(self._respuestas) > settings.IDEMPOTENCIAS_MAXIMO:
+                self._respuestas.popitem(last=False)
+
+
+idempotencias = Idempotencias()
@@ -0,0 +1,114 @@
+"""
+Instantáneas de las filas de turnos
+
+Las pantallas de las salas consultan los turnos cada pocos segundos y sin autenticación.
+En lugar de consultar la base de datos en cada petición, aquí se guarda la respuesta ya
+serializada de cada unidad y la global, y sólo se vuelve a elaborar cuando cambia un turno.
+
+- Cada clave tiene una versión que sube al invalidarla; si cambia mientras se elabora, no se guarda como vigente
+- El ETag es el hash del contenido, si una pantalla manda If-None-Match igual recibe 304 sin cuerpo
+- El cuerpo se comprime una sola vez por codificación y se sirve comprimido, vea lib/compresiones.py
+- Con varios workers cada uno tiene su copia, INSTANTANEAS_TTL_SEG limita cuánto puede tardar en enterarse de cambios ajenos
+
+Ejemplo
+
+    return instantaneas.responder(unidad.id, lambda: self.consultar(unidad))
+
+Después de guardar cambios en un turno, invalidar su unidad (también se invalida la global)
+
+    turno.save()
+    instantaneas.invalidar(turno.unidad_id)
+"""
+
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from typing import Callable
+
+from flask import current_app, request
+from pydantic import BaseModel
+
+from config.settings import get_settings
+from lib.compresiones import comprimir, negociar
+from lib.representaciones import a_json
+
+settings = get_settings()
+
+GLOBAL = 0  # Clave de la instantánea con los turnos de todas las unidades
+
+Instantanea = namedtuple("Instantanea", ["version", "cuerpo", "etag", "elaborado", "comprimidos"])
+
+
+class Instantaneas:
+    """Respuestas serializadas y versionadas por unidad"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._versiones = {}
+        self._instantaneas = {}
+
+    def obtener(self, clave: int, elaborar: Callable[[], BaseModel | dict]) -> Instantanea:
+        """Entregar la instantánea vigente de la clave, elaborarla si no la hay"""
+        instantanea = self._instantaneas.get(clave)
+        if self._vigente(clave, instantanea):
+            return instantanea
+        with self._bloqueo:
+            instantanea = self._instantaneas.get(clave)
+            if self._vigente(clave, instantanea):
+                return instantanea
+            version = self._versiones.get(clave, 0)
+        # Elaborar fuera del bloqueo, así una unidad no detiene a las demás
+        cuerpo = a_json(elaborar())
+        instantanea = Instantanea(
+            version=version,
+            cuerpo=cuerpo,
+            etag=hashlib.blake2b(cuerpo, digest_size=16).hexdigest(),
+            elaborado=time.monotonic(),
+            comprimidos={},  # Codificación: cuerpo comprimido, se llena al pedirlo
+        )
+        with self._bloqueo:
+            # Si la invalidaron mientras se elaboraba, se entrega pero la siguiente petición la vuelve a elaborar
+            if version == self._versiones.get(clave, 0):
+                self._instantaneas[clave] = instantanea
+        return instantanea
+
+    def _vigente(self, clave: int, instantanea: Instantanea) -> bool:
+        """Verificar que la instantánea sea de la versión actual y no haya vencido"""
+        if instantanea is None or instantanea.version != self._versiones.get(clave, 0):
+            return False
+        return time.monotonic() - instantanea.elaborado <= settings.INSTANTANEAS_TTL_SEG
+
+    def invalidar(self, unidad_id: int = None):
+        """Invalidar la instantánea de la unidad y la global, sin unidad se invalidan todas"""
+        with self._bloqueo:
+            if unidad_id is None:
+                claves = set(self._versiones) | set(self._instantaneas) | {GLOBAL}
+            else:
+                claves = {unidad_id, GLOBAL}
+            for clave in claves:
+                self._versiones[clave] = self._versiones.get(clave, 0) + 1
+                self._instantaneas.pop(clave, None)
+
+    def responder(self, clave: int, elaborar: Callable[[], BaseModel | dict]):
+        """Entregar la instantánea como respuesta HTTP, comprimida si el cliente lo acepta y con 304 si ya la tiene"""
+        instantanea = self.obtener(clave, elaborar)
+        codificacion = negociar(len(instantanea.cuerpo))
+        if codificacion is None:
+            response = current_app.response_class(instantanea.cuerpo, mimetype="application/json")
+            response.set_etag(instantanea.etag)
+        else:
+            # Si dos peticiones la comprimen al mismo tiempo, ambas obtienen lo mismo y se queda una
+            cuerpo = instantanea.comprimidos.get(codificacion)
+            if cuerpo is None:
+                cuerpo = comprimir(instantanea.cuerpo, codificacion, instantanea=True)
+                instantanea.comprimidos[codificacion] = cuerpo
+            response = current_app.response_class(cuerpo, mimetype="application/json")
+            response.headers["Content-Encoding"] = codificacion
+            response.set_etag(f"{instantanea.etag}-{codificacion}")  # Cada codificación es otra representación
+        response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+
+instantaneas = Instantaneas()
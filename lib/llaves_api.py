@@ -0,0 +1,75 @@
+"""
+API keys verificadas en memoria
+
+Los kioscos mandan su API key en cada petición, en lugar de consultarla cada vez
+aquí se guarda el resultado de la verificación por unos segundos.
+
+- La clave del diccionario es el SHA-256 del API key, así el API key no queda guardado en memoria
+- Se guarda el ID, si está activo y su expiración; la expiración se revisa en cada petición
+- Sólo se guardan los API keys que existen con estatus A, los inválidos siempre se consultan
+- Se vuelve a consultar al pasar API_KEYS_TTL_SEG segundos o al invalidarlo desde las vistas de administración
+
+Ejemplo
+
+    llave = llaves_api.obtener(request.headers.get("X-Api-Key"))
+    if llave is None or not llave.es_activo or llave.expiracion < datetime.now():
+        ...
+
+Después de guardar cambios en un API key, invalidar
+
+    api_key.save()
+    llaves_api.invalidar()
+"""
+
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from config.settings import get_settings
+from tauro.blueprints.api_keys.models import APIKey
+
+settings = get_settings()
+
+LlaveVerificada = namedtuple("LlaveVerificada", ["id", "es_activo", "expiracion", "verificado"])
+
+
+class LlavesAPI:
+    """API keys verificadas con tiempo de vida e invalidación explícita"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._llaves = {}
+
+    @staticmethod
+    def digesto(api_key: str) -> str:
+        """SHA-256 del API key"""
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def obtener(self, api_key: str) -> LlaveVerificada | None:
+        """Entregar la verificación del API key, consultarla si no la hay o si ya venció"""
+        digesto = self.digesto(api_key)
+        llave = self._llaves.get(digesto)
+        if llave is not None and time.monotonic() - llave.verificado <= settings.API_KEYS_TTL_SEG:
+            return llave
+        registro = APIKey.query.filter_by(api_key=api_key).filter_by(estatus="A").first()
+        with self._bloqueo:
+            if registro is None:
+                self._llaves.pop(digesto, None)
+                return None
+            llave = LlaveVerificada(
+                id=registro.id,
+                es_activo=registro.es_activo,
+                expiracion=registro.api_key_expiracion,
+                verificado=time.monotonic(),
+            )
+            self._llaves[digesto] = llave
+        return llave
+
+    def invalidar(self):
+        """Olvidar todas las verificaciones, la siguiente petición de cada API key se consulta"""
+        with self._bloqueo:
+            self._llaves = {}
+
+
+llaves_api = LlavesAPI()
@@ -0,0 +1,109 @@
+"""
+Principales de la API OAuth2 en memoria
+
+Después de validar el token, cada endpoint de la API OAuth2 consultaba el usuario por su email
+y luego sus tipos de turno y su rol. Aquí se guarda lo que necesitan los endpoints
+en un registro ligero, el principal, por email (el sub del token).
+
+- Los principales son namedtuple, no se pueden modificar ni pertenecen a la sesión de SQLAlchemy
+- Se guardan como mucho PRINCIPALES_MAXIMO, al llenarse se olvida el que lleva más tiempo sin usarse
+- Se vuelve a consultar al pasar PRINCIPALES_TTL_SEG segundos o al invalidarlo
+
+Ejemplo, token_required lo deja en g
+
+    usuario = g.principal
+    turno.usuario_id = usuario.id
+
+Después de guardar cambios en un usuario, sus roles o sus tipos de turno, invalidar
+
+    usuario.save()
+    principales.invalidar(usuario.email)
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from config.settings import get_settings
+from tauro.blueprints.roles.models import Rol
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.blueprints.usuarios_roles.models import UsuarioRol
+from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
+from tauro.extensions import database
+
+settings = get_settings()
+
+Principal = namedtuple(
+    "Principal",
+    ["id", "email", "nombre", "unidad_id", "ubicacion_id", "rol_id", "rol_nombre", "turnos_tipos_ids", "cargado"],
+)
+
+
+class Principales:
+    """Principales por email con tiempo de vida, tamaño máximo e invalidación explícita"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._principales = OrderedDict()
+
+    def _cargar(self, email: str) -> Principal | None:
+        """Consultar el usuario activo, su rol y sus tipos de turno activos"""
+        usuario = Usuario.query.filter_by(email=email).filter_by(estatus="A").first()
+        if usuario is None:
+            return None
+        rol = (
+            database.session.query(Rol.id, Rol.nombre)
+            .join(UsuarioRol)
+            .filter(UsuarioRol.usuario_id == usuario.id)
+            .filter(UsuarioRol.estatus == "A")
+            .order_by(UsuarioRol.id)
+            .first()
+        )
+        turnos_tipos_ids = (
+            database.session.query(UsuarioTurnoTipo.turno_tipo_id)
+            .filter_by(usuario_id=usuario.id)
+            .filter_by(es_activo=True)
+            .filter_by(estatus="A")
+            .order_by(UsuarioTurnoTipo.id)
+            .all()
+        )
+        return Principal(
+            id=usuario.id,
+            email=usuario.email,
+            nombre=usuario.nombre,
+            unidad_id=usuario.unidad_id,
+            ubicacion_id=usuario.ubicacion_id,
+            rol_id=rol.id if rol else None,
+            rol_nombre=rol.nombre if rol else None,
+            turnos_tipos_ids=tuple(turno_tipo_id for (turno_tipo_id,) in turnos_tipos_ids),
+            cargado=time.monotonic(),
+        )
+
+    def obtener(self, email: str) -> Principal | None:
+        """Entregar el principal del email, consultarlo si no lo hay o si ya venció"""
+        with self._bloqueo:
+            principal = self._principales.get(email)
+            if principal is not None and time.monotonic() - principal.cargado <= settings.PRINCIPALES_TTL_SEG:
+                self._principales.move_to_end(email)
+                return principal
+        principal = self._cargar(email)
+        with self._bloqueo:
+            if principal is None:
+                self._principales.pop(email, None)
+                return None
+            self._principales[email] = principal
+            self._principales.move_to_end(email)
+            while len(self._principales) > settings.PRINCIPALES_MAXIMO:
+                self._principales.popitem(last=False)
+        return principal
+
+    def invalidar(self, email: str = None):
+        """Olvidar el principal del email, sin email se olvidan todos"""
+        with self._bloqueo:
+            if email is None:
+                self._principales.clear()
+            else:
+                self._principales.pop(email, None)
+
+
+principales = Principales()
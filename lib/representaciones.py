@@ -0,0 +1,42 @@
+"""
+Representación JSON de las API
+
+flask_restful volvía a codificar con el módulo json de la biblioteca estándar los diccionarios de model_dump().
+Con esta representación los recursos entregan el modelo de pydantic tal cual y pydantic-core lo serializa
+a bytes en una sola pasada, sin diccionarios intermedios; model_dump() sólo se llama para enviar por Socket.IO.
+Lo que siga siendo diccionario, como los errores de flask_restful, se codifica con orjson si está instalado
+y si no también con pydantic-core.
+
+Se registra en cada Api
+
+    api = Api(api_oauth2_v1)
+    api.representations["application/json"] = representar_json
+
+Y el recurso entrega el modelo
+
+    return OneTurnoOut(success=True, message="...", data=turno_out)
+"""
+
+import pydantic_core
+from flask import current_app, make_response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def a_json(datos) -> bytes:
+    """Serializar a bytes JSON un modelo de pydantic, un diccionario o una lista"""
+    indent = 4 if current_app.debug else None
+    if orjson is not None and indent is None and not isinstance(datos, BaseModel):
+        return orjson.dumps(datos, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(datos, indent=indent)
+
+
+def representar_json(datos, code, headers=None):
+    """Representación application/json de flask_restful, termina con salto de línea como la original"""
+    respuesta = make_response(a_json(datos) + b"\n", code)
+    respuesta.headers.extend(headers or {})
+    return respuesta
@@ -0,0 +1,103 @@
+"""
+Salas de Socket.IO
+
+Cada pantalla se une a la sala de su unidad y sólo recibe los turnos de esa unidad.
+Los clientes que no indican unidad (monitoreo o pantallas anteriores) se unen a la sala global,
+que recibe los turnos de todas las unidades.
+
+Para unirse a la sala de una unidad al conectarse
+
+    const socket = io("https://tauro.example", { query: { unidad_id: 2 } });
+
+o después de conectarse, con el evento "unirse"
+
+    socket.emit("unirse", { unidad_id: 2 });
+
+Para enviar un turno sólo a su unidad y a la sala global
+
+    enviar_turno(one_turno_out, turno.unidad_id)
+
+Si el turno cambió de unidad, también a la anterior
+
+    enviar_turno(one_turno_out, unidad_id_anterior, turno.unidad_id)
+
+Al crear varios turnos a la vez, una sola señal para que las pantallas de sus unidades vuelvan a consultar
+
+    actualizar_pantallas(*unidades_ids)
+"""
+
+from flask import request
+from flask_socketio import join_room, leave_room, rooms
+
+from lib import catalogos
+from tauro.blueprints.api_v1.schemas import ResponseSchema
+from tauro.extensions import socketio
+
+SALA_GLOBAL = "global"
+
+
+def sala_unidad(unidad_id: int) -> str:
+    """Nombre de la sala de una unidad"""
+    return f"unidad_{unidad_id}"
+
+
+def _validar_unidad_id(valor) -> int | None:
+    """Entregar el ID de la unidad si existe, si no None"""
+    try:
+        unidad_id = int(valor)
+    except TypeError, ValueError:
+        return None
+    if catalogos.unidades.por_id(unidad_id) is None:
+        return None
+    return unidad_id
+
+
+def _salas(unidades_ids: tuple) -> list:
+    """Salas de las unidades y la sala global, sin repetir"""
+    salas = [SALA_GLOBAL]
+    for unidad_id in unidades_ids:
+        if unidad_id is not None and sala_unidad(unidad_id) not in salas:
+            salas.append(sala_unidad(unidad_id))
+    return salas
+
+
+def enviar_turno(datos: dict, *unidades_ids: int | None):
+    """Enviar el mensaje de un turno a las salas de sus unidades y a la sala global"""
+    socketio.send(datos, to=_salas(unidades_ids))
+
+
+def actualizar_pantallas(*unidades_ids: int | None):
+    """Enviar una sola señal refresh_screens a las salas de las unidades y a la global, para los cambios de varios turnos"""
+    datos = ResponseSchema(
+        success=True,
+        message="Señal de actualización de pantallas",
+        data={"signal": True},
+    ).model_dump()
+    socketio.emit("refresh_screens", datos, to=_salas(unidades_ids))
+
+
+@socketio.on("connect")
+def conectar(auth=None):
+    """Al conectarse, unirse a la sala de la unidad indicada o a la global"""
+    valor = request.args.get("unidad_id")
+    if valor is None and isinstance(auth, dict):
+        valor = auth.get("unidad_id")
+    unidad_id = _validar_unidad_id(valor)
+    if unidad_id is None:
+        join_room(SALA_GLOBAL)
+    else:
+        join_room(sala_unidad(unidad_id))
+
+
+@socketio.on("unirse")
+def unirse(datos):
+    """Cambiar de sala, sin unidad_id se une a la global"""
+    for sala in rooms():
+        if sala != request.sid:
+            leave_room(sala)
+    unidad_id = _validar_unidad_id(datos.get("unidad_id") if isinstance(datos, dict) else None)
+    if unidad_id is None:
+        join_room(SALA_GLOBAL)
+        return {"success": True, "sala": SALA_GLOBAL}
+    join_room(sala_unidad(unidad_id))
+    return {"success": True, "sala": sala_unidad(unidad_id)}
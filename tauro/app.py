@@ -6,11 +6,14 @@ from flask import Flask
 from werkzeug.wrappers import Response
 
 from config.settings import Settings
+from lib.cola_mensajes import opciones_socketio
+from lib.compresiones import comprimir_respuesta
 from tauro.blueprints.api_key_v1.resources import api_key_v1
 from tauro.blueprints.api_keys.views import api_keys
 from tauro.blueprints.api_oauth2_v1.resources import api_oauth2_v1
 from tauro.blueprints.bitacoras.views import bitacoras
 from tauro.blueprints.entradas_salidas.views import entradas_salidas
+from tauro.blueprints.estadisticas_diarias.views import estadisticas_diarias
 from tauro.blueprints.modulos.views import modulos
 from tauro.blueprints.permisos.views import permisos
 from tauro.blueprints.roles.views import roles
@@ -60,6 +63,7 @@ def create_app():
     app.register_blueprint(api_keys)
     app.register_blueprint(bitacoras)
     app.register_blueprint(entradas_salidas)
+    app.register_blueprint(estadisticas_diarias)
     app.register_blueprint(modulos)
     app.register_blueprint(permisos)
     app.register_blueprint(roles)
@@ -82,6 +86,9 @@ def create_app():
     app.register_blueprint(api_key_v1)
     csrf.exempt(api_key_v1)
 
+    # Comprimir las respuestas con gzip o Brotli según Accept-Encoding
+    app.after_request(comprimir_respuesta)
+
     # Inicializar extensiones
     extensions(app)
 
@@ -98,7 +105,11 @@ def extensions(app):
     database.init_app(app)
     login_manager.init_app(app)
     moment.init_app(app)
-    socketio.init_app(app)
+    socketio.init_app(
+        app,
+        async_mode=app.config["SOCKETIO_ASYNC_MODE"] or None,
+        **opciones_socketio(app.config["SOCKETIO_MESSAGE_QUEUE"]),
+    )
 
 
 def authentication(user_model):
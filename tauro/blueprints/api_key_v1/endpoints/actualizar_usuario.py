@@ -2,11 +2,14 @@
 API-Key v1 Endpoint: Actualizar Usuario
 """
 
-from flask import request, url_for
+from flask import url_for
 from flask_restful import Resource
 from sqlalchemy import or_
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.principales import principales
 from lib.safe_string import safe_message
 
 from tauro.blueprints.api_key_v1.endpoints.autenticar import api_key_required
@@ -19,6 +22,7 @@ from tauro.blueprints.api_v1.schemas import (
     ConfiguracionUsuarioOut,
     OneConfiguracionUsuarioOut,
 )
+from tauro.blueprints.api_v1.decorators import payload_required
 from tauro.blueprints.api_key_v1.schemas import ActualizarUsuarioIn
 from tauro.blueprints.turnos.models import Turno
 from tauro.blueprints.turnos_estados.models import TurnoEstado
@@ -28,21 +32,16 @@ from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
 from tauro.blueprints.ubicaciones.models import Ubicacion
 from tauro.blueprints.unidades.models import Unidad
 from tauro.blueprints.usuarios_roles.models import UsuarioRol
-from tauro.blueprints.bitacoras.models import Bitacora
-from tauro.blueprints.modulos.models import Modulo
 
 
 class ActualizarUsuario(Resource):
     """Actualizar un usuario"""
 
     @api_key_required
-    def post(self) -> OneConfiguracionUsuarioOut:
+    @payload_required(ActualizarUsuarioIn)
+    def post(self, actualizar_usuario_in: ActualizarUsuarioIn) -> OneConfiguracionUsuarioOut:
         """Actualizar un usuario"""
 
-        # Recibir y validar el payload
-        payload = request.get_json()
-        actualizar_usuario_in = ActualizarUsuarioIn.model_validate(payload)
-
         # Consultar el usuario
         try:
             usuario = Usuario.query.filter_by(id=actualizar_usuario_in.usuario_id).filter_by(estatus="A").one()
@@ -50,7 +49,7 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
         # Actualizar TODOS los tipos de turnos que el usuario ESTA atendiendo con es_activo a falso
         for usuario_turno_tipo in UsuarioTurnoTipo.query.filter_by(usuario_id=usuario.id).all():
@@ -95,17 +94,17 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion no encontrada",
-            ).model_dump()
+            )
         if ubicacion.estatus != "A":
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion eliminada",
-            ).model_dump()
+            )
         if ubicacion.es_activo is False:
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion no activa",
-            ).model_dump()
+            )
 
         # Consultar la ubicacion NO DEFINIDA
         ubicacion_nd = Ubicacion.query.filter_by(nombre="NO DEFINIDO").first()
@@ -113,7 +112,7 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion NO DEFINIDA no encontrada",
-            ).model_dump()
+            )
 
         # Consultar los usuarios por la ubicacion, si la ubicacion la tiene otro usuario, se le manda un error
         usuarios = Usuario.query.filter_by(ubicacion_id=ubicacion.id).filter_by(estatus="A").first()
@@ -121,21 +120,25 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message=f"Ubicacion ocupada por {usuarios.nombre}",
-            ).model_dump()
+            )
 
         # Actualizar la ubicacion del usuario
         usuario.ubicacion_id = ubicacion.id
 
+        # Crear registro en bitácora, se confirma en el mismo commit que el cambio
+        bitacoras.agregar(
+            "USUARIOS",
+            usuario.id,
+            descripcion=safe_message(f"El usuario {usuario.id}: {usuario.nombre} ha sido actualizado por Api-Key"),
+            url=url_for("usuarios.detail", usuario_id=usuario.id),
+        )
+
         # Guardar
         usuario.save()
 
-        # Crear registro en bitácora
-        Bitacora(
-            modulo=Modulo.query.filter_by(nombre="USUARIOS").first(),
-            usuario=usuario,
-            descripcion=safe_message(f"El usuario {usuario.id}: {usuario.nombre} ha sido actualizado por Api-Key"),
-            url=url_for("usuarios.detail", usuario_id=usuario.id),
-        ).save()
+        # La siguiente petición del usuario por la API OAuth2 debe ver su nueva ubicación y sus tipos de turnos
+        principales.invalidar(usuario.email)
+        esperas.invalidar()
 
         # Consultar Ubicacion
         ubicacion = None
@@ -190,7 +193,7 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="El usuario no tiene un rol asignado",
-            ).model_dump()
+            )
         rol = usuarios_roles.rol
         # Consultar la unidad
         unidad_sql = Unidad.query.get(usuario.unidad_id)
@@ -216,4 +219,4 @@ class ActualizarUsuario(Resource):
                 usuario_nombre_completo=usuario.nombre,
                 ultimo_turno=ultimo_turno,
             ),
-        ).model_dump()
+        )
@@ -4,23 +4,24 @@ Autenticar API Key v1 Endpoints
 This module provides the endpoints for authenticating users via API keys.
 
 - Take the api key from the request header X-Api-Key
-- Validate the API key against the database, querying the APIKey model.
-- With a decorator, check if the API key is valid and active.
+- Validate the API key against the verified keys in memory, querying the APIKey model only when needed.
+- With a decorator, check if the API key is valid, active and not expired.
 """
 
+from datetime import datetime
 from functools import wraps
 
 from flask import g, request
 
+from lib.llaves_api import llaves_api
 from tauro.blueprints.api_v1.schemas import ResponseSchema
-from tauro.blueprints.api_keys.models import APIKey
 
 
 def api_key_required(f):
     """
     Checks for 'X-Api-Key' in request headers, validates it against the
-    APIKey model, and ensures the key is active.
-    If valid, stores the APIKey object in flask.g.api_key.
+    verified keys, and ensures the key is active and not expired.
+    If valid, stores the verified key (id, es_activo, expiracion) in flask.g.api_key.
     Otherwise, returns a ResponseSchema object with the error details.
     """
 
@@ -29,21 +30,25 @@ def api_key_required(f):
         # Get the API key from the request header
         api_key_value = request.headers.get("X-Api-Key")
         if not api_key_value:
-            return (ResponseSchema(success=False, message="Falta el API key", status_code=401).model_dump(), 401)
+            return (ResponseSchema(success=False, message="Falta el API key", status_code=401), 401)
 
-        # Validates it against the APIKey model
-        api_key = APIKey.query.filter_by(api_key=api_key_value).filter_by(estatus="A").first()
+        # Validates it against the verified keys, the APIKey model is queried only when it is not in memory
+        api_key = llaves_api.obtener(api_key_value)
         if api_key is None:
             return (
-                ResponseSchema(success=False, message="El API key no es válido o no existe", status_code=401).model_dump(),
+                ResponseSchema(success=False, message="El API key no es válido o no existe", status_code=401),
                 401,
             )
 
         # Si el API key esta deshabilitado
         if not api_key.es_activo:
-            return (ResponseSchema(success=False, message="El API key está deshabilitado", status_code=403).model_dump(), 403)
+            return (ResponseSchema(success=False, message="El API key está deshabilitado", status_code=403), 403)
 
-        # Store the APIKey object for use in the endpoint
+        # Si el API key ya expiró
+        if api_key.expiracion < datetime.now():
+            return (ResponseSchema(success=False, message="El API key ha expirado", status_code=403), 403)
+
+        # Store the verified key for use in the endpoint
         g.api_key = api_key
         return f(*args, **kwargs)
 
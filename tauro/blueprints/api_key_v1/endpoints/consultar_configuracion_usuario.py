@@ -2,7 +2,6 @@
 API-Key v1 Endpoint: Consultar Configuración Usuario
 """
 
-from flask import request
 from flask_restful import Resource
 from sqlalchemy import or_
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
@@ -18,6 +17,7 @@ from tauro.blueprints.api_v1.schemas import (
     OneConfiguracionUsuarioOut,
     ConfiguracionUsuarioOut,
 )
+from tauro.blueprints.api_v1.decorators import payload_required
 from tauro.blueprints.api_key_v1.schemas import ConsultarUsuarioIn
 from tauro.blueprints.turnos.models import Turno
 from tauro.blueprints.turnos_estados.models import TurnoEstado
@@ -33,13 +33,10 @@ class ConsultarConfiguracionUsuario(Resource):
     """Consultar configuración del usuario"""
 
     @api_key_required
-    def post(self) -> OneConfiguracionUsuarioOut:
+    @payload_required(ConsultarUsuarioIn)
+    def post(self, usuario_in: ConsultarUsuarioIn) -> OneConfiguracionUsuarioOut:
         """Consultar configuración del usuario"""
 
-        # Recibir y validar el payload
-        payload = request.get_json()
-        usuario_in = ConsultarUsuarioIn.model_validate(payload)
-
         # Consultar el usuario
         try:
             usuario = Usuario.query.filter_by(id=usuario_in.usuario_id).filter_by(estatus="A").one()
@@ -47,7 +44,7 @@ class ConsultarConfiguracionUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
         # Consultar los tipos de turnos del usuario
         usuarios_turnos_tipos = (
@@ -115,7 +112,7 @@ class ConsultarConfiguracionUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="El usuario no tiene un rol asignado",
-            ).model_dump()
+            )
         rol = usuarios_roles.rol
         # Consultar la unidad
         unidad_sql = Unidad.query.get(usuario.unidad_id)
@@ -141,4 +138,4 @@ class ConsultarConfiguracionUsuario(Resource):
                 ),
                 ultimo_turno=ultimo_turno,
             ),
-        ).model_dump()
+        )
@@ -24,4 +24,4 @@ class ConsultarTurnosEstados(Resource):
             success=True,
             message="Se han consultado los tipos de turnos",
             data=[TurnoEstadoOut(id=turno_tipo.id, nombre=turno_tipo.nombre) for turno_tipo in turnos_tipos],
-        ).model_dump()
+        )
@@ -30,4 +30,4 @@ class ConsultarUbicaciones(Resource):
             success=True,
             message="Se han consultado las ubicaciones",
             data=[UbicacionOut(id=ubicacion.id, nombre=ubicacion.nombre, numero=ubicacion.numero) for ubicacion in ubicaciones],
-        ).model_dump()
+        )
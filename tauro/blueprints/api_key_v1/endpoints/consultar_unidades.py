@@ -30,4 +30,4 @@ class ConsultarUnidades(Resource):
             success=True,
             message="Se han consultado las unidades",
             data=[UnidadOut(id=unidad.id, nombre=unidad.nombre, clave=unidad.clave) for unidad in unidades],
-        ).model_dump()
+        )
@@ -2,13 +2,19 @@
 API-Key v1 Endpoint: Crear Turno
 """
 
-from datetime import datetime
-
-from flask import current_app, request, url_for
+from flask import g, url_for
 from flask_restful import Resource
-from pytz import timezone
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
+from lib import catalogos
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.exceptions import MyNotValidParamError
+from lib.filas import filas
+from lib.idempotencias import idempotencias
+from lib.instantaneas import instantaneas
+from lib.salas import enviar_turno
 from lib.safe_string import safe_string, safe_message, safe_telefono
 from tauro.blueprints.api_key_v1.endpoints.autenticar import api_key_required
 from tauro.blueprints.api_v1.schemas import (
@@ -19,29 +25,73 @@ from tauro.blueprints.api_v1.schemas import (
     TurnoEstadoOut,
     TurnoTipoOut,
 )
+from tauro.blueprints.api_v1.decorators import payload_required
 from tauro.blueprints.api_key_v1.schemas import CrearTurnoIn
 from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
-from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.unidades.models import Unidad
+from tauro.blueprints.turnos_numeros.models import TurnoNumero
 from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.ubicaciones.models import Ubicacion
-from tauro.blueprints.bitacoras.models import Bitacora
-from tauro.blueprints.modulos.models import Modulo
-
-from tauro.extensions import socketio
+from tauro.extensions import database
+
+
+def elaborar_respuesta(turno: Turno, usuario_nombre: str, espera: int | None = None) -> OneTurnoOut:
+    """Elaborar el OneTurnoOut del turno creado, también para los reintentos con el mismo Idempotency-Key"""
+    unidad = catalogos.unidades.por_id(turno.unidad_id)
+    turno_estado = catalogos.turnos_estados.por_id(turno.turno_estado_id)
+    turno_tipo = catalogos.turnos_tipos.por_id(turno.turno_tipo_id)
+    ubicacion = catalogos.ubicaciones.por_id(turno.ubicacion_id)
+    return OneTurnoOut(
+        success=True,
+        message=f"Se ha creado el turno {turno.numero} en {unidad.clave} por {usuario_nombre}",
+        data=TurnoOut(
+            turno_id=turno.id,
+            turno_numero=turno.numero,
+            turno_fecha=turno.creado.isoformat(),
+            turno_numero_cubiculo=0,
+            turno_telefono=turno.telefono,
+            turno_comentarios=turno.comentarios,
+            turno_estado=TurnoEstadoOut(
+                id=turno_estado.id,
+                nombre=turno_estado.nombre,
+            ),
+            turno_tipo=TurnoTipoOut(
+                id=turno_tipo.id,
+                nombre=turno_tipo.nombre,
+                nivel=turno_tipo.nivel,
+            ),
+            ubicacion=UbicacionOut(
+                id=ubicacion.id,
+                nombre=ubicacion.nombre,
+                numero=ubicacion.numero,
+            ),
+            unidad=UnidadOut(
+                id=unidad.id,
+                clave=unidad.clave,
+                nombre=unidad.nombre,
+            ),
+            turno_espera_estimada=espera,
+        ),
+    )
 
 
 class CrearTurno(Resource):
     """Crear un nuevo turno"""
 
     @api_key_required
-    def post(self) -> OneTurnoOut:
+    @payload_required(CrearTurnoIn)
+    def post(self, crear_turno_in: CrearTurnoIn) -> OneTurnoOut:
         """Crear un turno"""
 
-        # Recibir y validar el payload
-        payload = request.get_json()
-        crear_turno_in = CrearTurnoIn.model_validate(payload)
+        # Un reintento con el mismo Idempotency-Key recibe la respuesta original, vea lib/idempotencias.py
+        try:
+            llave = idempotencias.llave(g.api_key.id)
+        except MyNotValidParamError as error:
+            return OneTurnoOut(
+                success=False,
+                message=str(error),
+            )
+        respuesta = idempotencias.obtener(llave, lambda turno: elaborar_respuesta(turno, turno.usuario.nombre))
+        if respuesta is not None:
+            return respuesta
 
         # Consultar el usuario
         try:
@@ -50,41 +100,39 @@ class CrearTurno(Resource):
             return OneTurnoOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
         # Consultar el tipo de turno
-        turno_tipo = TurnoTipo.query.get(crear_turno_in.turno_tipo_id)
+        turno_tipo = catalogos.turnos_tipos.por_id(crear_turno_in.turno_tipo_id)
         if turno_tipo is None:
             return OneTurnoOut(
                 success=False,
                 message="Tipo de turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar la unidad
-        unidad = Unidad.query.get(crear_turno_in.unidad_id)
+        unidad = catalogos.unidades.por_id(crear_turno_in.unidad_id)
         if unidad is None:
             return OneTurnoOut(
                 success=False,
                 message="Unidad no encontrada",
-            ).model_dump()
+            )
 
         # Consultar el estado de turno "EN ESPERA"
-        try:
-            turno_estado = TurnoEstado.query.filter_by(nombre="EN ESPERA").filter_by(estatus="A").one()
-        except (MultipleResultsFound, NoResultFound):
+        turno_estado = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        if turno_estado is None:
             return OneTurnoOut(
                 success=False,
                 message="Estado de turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar la ubicacion NO DEFINIDO
-        try:
-            ubicacion = Ubicacion.query.filter_by(nombre="NO DEFINIDO").filter_by(estatus="A").one()
-        except (MultipleResultsFound, NoResultFound):
+        ubicacion = catalogos.ubicaciones.por_nombre("NO DEFINIDO")
+        if ubicacion is None:
             return OneTurnoOut(
                 success=False,
                 message="Ubicacion no encontrada",
-            ).model_dump()
+            )
 
         # Validar el número de teléfono
         telefono = None
@@ -95,75 +143,61 @@ class CrearTurno(Resource):
                     return OneTurnoOut(
                         success=False,
                         message="Número de teléfono inválido",
-                    ).model_dump()
+                    )
 
-        # Definir el numero de turno
-        fecha_hoy = datetime.now(tz=timezone(current_app.config["TZ"])).date()
-        timestamp_hoy = datetime(year=fecha_hoy.year, month=fecha_hoy.month, day=fecha_hoy.day, hour=0, minute=0, second=0)
-        numero = Turno.query.filter(Turno.creado >= timestamp_hoy).count() + 1
+        # Reservar el numero de turno, se confirma junto con el turno al guardar
+        numero = TurnoNumero.reservar(unidad.id)
 
         # Crear el nuevo turno
         turno = Turno(
             usuario=usuario,
-            turno_estado=turno_estado,
-            turno_tipo=turno_tipo,
-            ubicacion=ubicacion,
+            turno_estado_id=turno_estado.id,
+            turno_tipo_id=turno_tipo.id,
+            ubicacion_id=ubicacion.id,
             numero=numero,
             numero_cubiculo=0,
             telefono=telefono,
             unidad_id=unidad.id,
             comentarios=safe_string(crear_turno_in.comentarios),
         )
-        turno.save()
+        database.session.add(turno)
+        database.session.flush()  # Para tener el ID del turno en la bitácora
 
-        # Crear registro en bitácora
-        Bitacora(
-            modulo=Modulo.query.filter_by(nombre="TURNOS").first(),
-            usuario=usuario,
+        # Crear registro en bitácora, se confirma en el mismo commit que el cambio
+        bitacoras.agregar(
+            "TURNOS",
+            usuario.id,
             descripcion=safe_message(f"El turno {turno.id} ha sido creado por Api-Key"),
             url=url_for("turnos.detail", turno_id=turno.id),
-        ).save()
-
-        # Extraer la unidad
-        unidad_out = None
-        if unidad is not None:
-            unidad_out = UnidadOut(
-                id=unidad.id,
-                clave=unidad.clave,
-                nombre=unidad.nombre,
-            )
-
-        # Crear nuevo objeto OneTurnoOut
-        turno_out = OneTurnoOut(
-            success=True,
-            message=f"Se ha creado el turno {turno.numero} en {unidad.clave} por {usuario.nombre}",
-            data=TurnoOut(
-                turno_id=turno.id,
-                turno_numero=turno.numero,
-                turno_fecha=turno.creado.isoformat(),
-                turno_numero_cubiculo=0,
-                turno_telefono=turno.telefono,
-                turno_comentarios=turno.comentarios,
-                turno_estado=TurnoEstadoOut(
-                    id=turno.turno_estado.id,
-                    nombre=turno.turno_estado.nombre,
-                ),
-                turno_tipo=TurnoTipoOut(
-                    id=turno.turno_tipo.id,
-                    nombre=turno.turno_tipo.nombre,
-                    nivel=turno.turno_tipo.nivel,
-                ),
-                ubicacion=UbicacionOut(
-                    id=turno.ubicacion.id,
-                    nombre=turno.ubicacion.nombre,
-                    numero=turno.ubicacion.numero,
-                ),
-                unidad=unidad_out,
-            ),
-        ).model_dump()
+        )
 
-        # Ejecutar send socket-io. Envía una variable "message" con la estructura json
-        socketio.send(turno_out)
+        # Guardar, con la llave de idempotencia en el mismo commit
+        idempotencias.agregar(llave, turno)
+        try:
+            turno.save()
+        except IntegrityError:
+            # Otro intento con la misma llave ya creó el turno, se entrega su respuesta
+            database.session.rollback()
+            respuesta = idempotencias.obtener(llave, lambda turno: elaborar_respuesta(turno, turno.usuario.nombre))
+            if llave is None or respuesta is None:
+                raise
+            return respuesta
+
+        # Las pantallas de la unidad deben mostrar el cambio
+        instantaneas.invalidar(turno.unidad_id)
+
+        # Formar el turno en la espera de su unidad y tipo, se estima sin consultar, vea lib/esperas.py
+        espera = esperas.formar(turno.unidad_id, turno.turno_tipo_id)
+
+        # Agregar el turno a la fila de despacho de su unidad, vea lib/filas.py
+        filas.agregar(turno)
+
+        # Elaborar la respuesta y guardarla para los reintentos con la misma llave
+        turno_out = elaborar_respuesta(turno, usuario.nombre, espera)
+        idempotencias.guardar(llave, turno_out)
+
+        # Ejecutar send socket-io a la sala de la unidad. Envía una variable "message" con la estructura json
+        enviar_turno(turno_out.model_dump(), turno.unidad_id)
 
         # Entregar JSON
         return turno_out
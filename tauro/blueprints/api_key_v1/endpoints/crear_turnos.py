@@ -0,0 +1,184 @@
+"""
+API-Key v1 Endpoint: Crear Turnos
+
+Crea de una vez los turnos que un kiosco guardó mientras no tuvo conexión.
+Los números se reservan juntos, los turnos se insertan en una sola sentencia y en un solo commit
+con una bitácora de resumen, y las pantallas reciben una sola señal para volver a consultar.
+"""
+
+from flask import url_for
+from flask_restful import Resource
+from sqlalchemy import insert
+from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
+
+from lib import catalogos
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.filas import filas
+from lib.instantaneas import instantaneas
+from lib.salas import actualizar_pantallas
+from lib.safe_string import safe_string, safe_message, safe_telefono
+from tauro.blueprints.api_key_v1.endpoints.autenticar import api_key_required
+from tauro.blueprints.api_key_v1.schemas import CrearTurnosIn, CrearTurnosResultadoOut, ListCrearTurnosOut
+from tauro.blueprints.api_v1.decorators import payload_required
+from tauro.blueprints.api_v1.schemas import TurnoEstadoOut, TurnoOut, TurnoTipoOut, UbicacionOut, UnidadOut
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_numeros.models import TurnoNumero
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.extensions import database
+
+
+class CrearTurnos(Resource):
+    """Crear varios turnos"""
+
+    @api_key_required
+    @payload_required(CrearTurnosIn)
+    def post(self, crear_turnos_in: CrearTurnosIn) -> ListCrearTurnosOut:
+        """Crear varios turnos, entrega el resultado de cada uno en el mismo orden"""
+
+        # Consultar el usuario
+        try:
+            usuario = Usuario.query.filter_by(id=crear_turnos_in.usuario_id).filter_by(estatus="A").one()
+        except MultipleResultsFound, NoResultFound:
+            return ListCrearTurnosOut(
+                success=False,
+                message="Usuario no encontrado",
+            )
+
+        # Consultar el estado de turno "EN ESPERA"
+        turno_estado = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        if turno_estado is None:
+            return ListCrearTurnosOut(
+                success=False,
+                message="Estado de turno no encontrado",
+            )
+
+        # Consultar la ubicacion NO DEFINIDO
+        ubicacion = catalogos.ubicaciones.por_nombre("NO DEFINIDO")
+        if ubicacion is None:
+            return ListCrearTurnosOut(
+                success=False,
+                message="Ubicacion no encontrada",
+            )
+
+        # Validar cada turno con los catálogos en memoria, los inválidos se quedan con su mensaje
+        resultados = [None] * len(crear_turnos_in.turnos)
+        valores = {}  # posición: columnas del turno
+        for posicion, turno_in in enumerate(crear_turnos_in.turnos):
+            telefono = None
+            if turno_in.turno_telefono:
+                telefono = safe_telefono(turno_in.turno_telefono)
+                if not telefono:
+                    resultados[posicion] = CrearTurnosResultadoOut(success=False, message="Número de teléfono inválido")
+                    continue
+            if catalogos.turnos_tipos.por_id(turno_in.turno_tipo_id) is None:
+                resultados[posicion] = CrearTurnosResultadoOut(success=False, message="Tipo de turno no encontrado")
+                continue
+            if catalogos.unidades.por_id(turno_in.unidad_id) is None:
+                resultados[posicion] = CrearTurnosResultadoOut(success=False, message="Unidad no encontrada")
+                continue
+            valores[posicion] = {
+                "usuario_id": usuario.id,
+                "turno_estado_id": turno_estado.id,
+                "turno_tipo_id": turno_in.turno_tipo_id,
+                "ubicacion_id": ubicacion.id,
+                "unidad_id": turno_in.unidad_id,
+                "numero_cubiculo": 0,
+                "telefono": telefono,
+                "comentarios": safe_string(turno_in.comentarios),
+            }
+        if not valores:
+            return ListCrearTurnosOut(
+                success=False,
+                message="Ningún turno es válido",
+                data=resultados,
+            )
+
+        # Reservar los números consecutivos de cada contador en una sola sentencia, en orden para no bloquearse con otros
+        por_contador = {}
+        for posicion, columnas in valores.items():
+            por_contador.setdefault(TurnoNumero.contador_unidad_id(columnas["unidad_id"]), []).append(posicion)
+        for _, posiciones in sorted(por_contador.items()):
+            ultimo = TurnoNumero.reservar(valores[posiciones[0]]["unidad_id"], cantidad=len(posiciones))
+            for numero, posicion in enumerate(posiciones, start=ultimo - len(posiciones) + 1):
+                valores[posicion]["numero"] = numero
+
+        # Insertar todos en una sola sentencia INSERT ... VALUES (...), (...) RETURNING,
+        # se reciben renglones y no instancias para no volver a consultarlos después del commit
+        posiciones = list(valores)
+        turnos = database.session.execute(
+            insert(Turno).returning(
+                Turno.id,
+                Turno.numero,
+                Turno.creado,
+                Turno.unidad_id,
+                Turno.turno_tipo_id,
+                Turno.telefono,
+                Turno.comentarios,
+                sort_by_parameter_order=True,
+            ),
+            [valores[posicion] for posicion in posiciones],
+        ).all()
+
+        # Una sola bitácora con el resumen, se confirma en el mismo commit que los turnos
+        bitacoras.agregar(
+            "TURNOS",
+            usuario.id,
+            descripcion=safe_message(f"Se crearon {len(turnos)} turnos por Api-Key, del {turnos[0].id} al {turnos[-1].id}"),
+            url=url_for("turnos.list_active"),
+        )
+
+        # Guardar
+        database.session.commit()
+
+        # Las pantallas, la espera estimada y la fila de despacho de cada unidad deben tener los turnos nuevos
+        unidades_ids = sorted({turno.unidad_id for turno in turnos})
+        for unidad_id in unidades_ids:
+            instantaneas.invalidar(unidad_id)
+        for posicion, turno in zip(posiciones, turnos):
+            espera = esperas.formar(turno.unidad_id, turno.turno_tipo_id)
+            filas.agregar(turno)
+            unidad = catalogos.unidades.por_id(turno.unidad_id)
+            turno_tipo = catalogos.turnos_tipos.por_id(turno.turno_tipo_id)
+            resultados[posicion] = CrearTurnosResultadoOut(
+                success=True,
+                message=f"Se ha creado el turno {turno.numero} en {unidad.clave} por {usuario.nombre}",
+                data=TurnoOut(
+                    turno_id=turno.id,
+                    turno_numero=turno.numero,
+                    turno_fecha=turno.creado.isoformat(),
+                    turno_numero_cubiculo=0,
+                    turno_telefono=turno.telefono,
+                    turno_comentarios=turno.comentarios,
+                    turno_estado=TurnoEstadoOut(
+                        id=turno_estado.id,
+                        nombre=turno_estado.nombre,
+                    ),
+                    turno_tipo=TurnoTipoOut(
+                        id=turno_tipo.id,
+                        nombre=turno_tipo.nombre,
+                        nivel=turno_tipo.nivel,
+                    ),
+                    ubicacion=UbicacionOut(
+                        id=ubicacion.id,
+                        nombre=ubicacion.nombre,
+                        numero=ubicacion.numero,
+                    ),
+                    unidad=UnidadOut(
+                        id=unidad.id,
+                        clave=unidad.clave,
+                        nombre=unidad.nombre,
+                    ),
+                    turno_espera_estimada=espera,
+                ),
+            )
+
+        # Una sola señal a las salas de las unidades para que vuelvan a consultar sus turnos
+        actualizar_pantallas(*unidades_ids)
+
+        # Entregar JSON
+        return ListCrearTurnosOut(
+            success=True,
+            message=f"Se crearon {len(turnos)} de {len(resultados)} turnos",
+            data=resultados,
+        )
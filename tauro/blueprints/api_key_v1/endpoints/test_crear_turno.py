@@ -2,14 +2,15 @@
 API-Key v1 Endpoint: Test Crear Turno
 """
 
-from datetime import datetime, date
+from datetime import date
 
-from flask import current_app, request
+from flask import request
 from flask_restful import Resource
-from pytz import timezone
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
 
+from lib import catalogos
+from lib.salas import enviar_turno
 from lib.safe_string import safe_telefono
 from tauro.blueprints.api_key_v1.endpoints.autenticar import api_key_required
 from tauro.blueprints.api_v1.schemas import (
@@ -21,14 +22,8 @@ from tauro.blueprints.api_v1.schemas import (
     TurnoTipoOut,
 )
 from tauro.blueprints.api_key_v1.schemas import CrearTurnoIn
-from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
-from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.unidades.models import Unidad
+from tauro.blueprints.turnos_numeros.models import TurnoNumero
 from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.ubicaciones.models import Ubicacion
-
-from tauro.extensions import socketio
 
 
 class TestCrearTurno(Resource):
@@ -49,41 +44,39 @@ class TestCrearTurno(Resource):
             return OneTurnoOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
         # Consultar el tipo de turno
-        turno_tipo = TurnoTipo.query.get(crear_turno_in.turno_tipo_id)
+        turno_tipo = catalogos.turnos_tipos.por_id(crear_turno_in.turno_tipo_id)
         if turno_tipo is None:
             return OneTurnoOut(
                 success=False,
                 message="Tipo de turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar la unidad
-        unidad = Unidad.query.get(crear_turno_in.unidad_id)
+        unidad = catalogos.unidades.por_id(crear_turno_in.unidad_id)
         if unidad is None:
             return OneTurnoOut(
                 success=False,
                 message="Unidad no encontrada",
-            ).model_dump()
+            )
 
         # Consultar el estado de turno "EN ESPERA"
-        try:
-            turno_estado = TurnoEstado.query.filter_by(nombre="EN ESPERA").filter_by(estatus="A").one()
-        except MultipleResultsFound, NoResultFound:
+        turno_estado = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        if turno_estado is None:
             return OneTurnoOut(
                 success=False,
                 message="Estado de turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar la ubicacion NO DEFINIDO
-        try:
-            ubicacion = Ubicacion.query.filter_by(nombre="NO DEFINIDO").filter_by(estatus="A").one()
-        except MultipleResultsFound, NoResultFound:
+        ubicacion = catalogos.ubicaciones.por_nombre("NO DEFINIDO")
+        if ubicacion is None:
             return OneTurnoOut(
                 success=False,
                 message="Ubicacion no encontrada",
-            ).model_dump()
+            )
 
         # Validar el número de teléfono
         telefono = None
@@ -94,12 +87,10 @@ class TestCrearTurno(Resource):
                     return OneTurnoOut(
                         success=False,
                         message="Número de teléfono inválido",
-                    ).model_dump()
+                    )
 
-        # Definir el numero de turno
-        fecha_hoy = datetime.now(tz=timezone(current_app.config["TZ"])).date()
-        timestamp_hoy = datetime(year=fecha_hoy.year, month=fecha_hoy.month, day=fecha_hoy.day, hour=0, minute=0, second=0)
-        numero = Turno.query.filter(Turno.creado >= timestamp_hoy).count() + 1
+        # Consultar cuál sería el numero de turno, sin reservarlo porque es de prueba
+        numero = TurnoNumero.siguiente(unidad.id)
 
         # Extraer la unidad
         unidad_out = None
@@ -137,10 +128,10 @@ class TestCrearTurno(Resource):
                 ),
                 unidad=unidad_out,
             ),
-        ).model_dump()
+        )
 
-        # Ejecutar send socket-io. Envía una variable "message" con la estructura json
-        socketio.send(turno_out)
+        # Ejecutar send socket-io a la sala de la unidad. Envía una variable "message" con la estructura json
+        enviar_turno(turno_out.model_dump(), unidad.id)
 
         # Entregar JSON
         return turno_out
@@ -7,6 +7,7 @@ from flask_cors import CORS
 from flask_restful import Api
 
 from config.settings import get_settings
+from lib.representaciones import representar_json
 
 from tauro.blueprints.api_key_v1.endpoints.actualizar_turno_estado import ActualizarTurnoEstado
 from tauro.blueprints.api_key_v1.endpoints.actualizar_usuario import ActualizarUsuario
@@ -16,6 +17,7 @@ from tauro.blueprints.api_key_v1.endpoints.consultar_turnos_tipos import Consult
 from tauro.blueprints.api_key_v1.endpoints.consultar_unidades import ConsultarUnidades
 from tauro.blueprints.api_key_v1.endpoints.consultar_ubicaciones import ConsultarUbicaciones
 from tauro.blueprints.api_key_v1.endpoints.crear_turno import CrearTurno
+from tauro.blueprints.api_key_v1.endpoints.crear_turnos import CrearTurnos
 from tauro.blueprints.api_key_v1.endpoints.tomar_turno import TomarTurno
 from tauro.blueprints.api_key_v1.endpoints.test_conexion import TestConexion
 from tauro.blueprints.api_key_v1.endpoints.test_crear_turno import TestCrearTurno
@@ -24,6 +26,7 @@ api_key_v1 = Blueprint("api_key_v1", __name__, url_prefix="/api_key/v1")
 
 # Crear la API
 api = Api(api_key_v1)
+api.representations["application/json"] = representar_json  # Serializa los modelos de pydantic, vea lib/representaciones.py
 
 # Configuración de CORS
 origins = ["http://localhost:5000", "http://127.0.0.1:5000"]
@@ -42,6 +45,7 @@ api.add_resource(ConsultarConfiguracionUsuario, "/consultar_configuracion_usuari
 api.add_resource(ConsultarUnidades, "/consultar_unidades")
 api.add_resource(ConsultarUbicaciones, "/consultar_ubicaciones")
 api.add_resource(CrearTurno, "/crear_turno")
+api.add_resource(CrearTurnos, "/crear_turnos")
 api.add_resource(TomarTurno, "/tomar_turno")
 api.add_resource(TestConexion, "/test_conexion")
 api.add_resource(TestCrearTurno, "/test_crear_turno")
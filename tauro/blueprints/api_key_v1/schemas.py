@@ -2,7 +2,11 @@
 API-Key v1 Schemas
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from tauro.blueprints.api_v1.schemas import ResponseSchema, TurnoOut
+
+CREAR_TURNOS_MAXIMO = 200  # Turnos por petición de crear_turnos
 
 
 class ConsultarUsuarioIn(BaseModel):
@@ -36,3 +40,33 @@ class CrearTurnoIn(BaseModel):
     turno_telefono: str | None = None
     unidad_id: int
     comentarios: str | None = None
+
+
+class CrearTurnosTurnoIn(BaseModel):
+    """Esquema de cada turno para crear varios"""
+
+    turno_tipo_id: int
+    turno_telefono: str | None = None
+    unidad_id: int
+    comentarios: str | None = None
+
+
+class CrearTurnosIn(BaseModel):
+    """Esquema para crear varios turnos, por ejemplo los que un kiosco guardó sin conexión"""
+
+    usuario_id: int
+    turnos: list[CrearTurnosTurnoIn] = Field(min_length=1, max_length=CREAR_TURNOS_MAXIMO)
+
+
+class CrearTurnosResultadoOut(BaseModel):
+    """Esquema del resultado de cada turno, en el mismo orden en que se recibieron"""
+
+    success: bool
+    message: str
+    data: TurnoOut | None = None
+
+
+class ListCrearTurnosOut(ResponseSchema):
+    """Esquema para entregar los resultados de crear varios turnos"""
+
+    data: list[CrearTurnosResultadoOut] | None = None
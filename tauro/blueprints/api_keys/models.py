@@ -22,7 +22,7 @@ class APIKey(database.Model, UniversalMixin):
     id: Mapped[int] = mapped_column(primary_key=True)
 
     # Columnas
-    api_key: Mapped[str] = mapped_column(String(128))
+    api_key: Mapped[str] = mapped_column(String(128), index=True, unique=True)
     api_key_expiracion: Mapped[datetime]
     es_activo: Mapped[bool] = mapped_column(default=False)
 
@@ -9,7 +9,8 @@ from datetime import datetime, timedelta
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
+from lib.llaves_api import llaves_api
 from lib.safe_string import safe_string, safe_message
 
 from tauro.blueprints.bitacoras.models import Bitacora
@@ -52,9 +53,8 @@ def datatable_json():
     # if "persona_rfc" in request.form:
     #     consulta = consulta.join(Persona)
     #     consulta = consulta.filter(Persona.rfc.contains(safe_rfc(request.form["persona_rfc"], search_fragment=True)))
-    # Ordenar y paginar
-    registros = consulta.order_by(APIKey.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [APIKey.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -108,8 +108,14 @@ def new():
     """Nueva API Key"""
     form = APIKeyForm()
     if form.validate_on_submit():
+        # Validar que el API key sea único
+        api_key_texto = safe_string(form.api_key.data)
+        if APIKey.query.filter_by(api_key=api_key_texto).first():
+            flash("El API key ya está en uso. Debe de ser único.", "warning")
+            return render_template("api_keys/new.jinja2", form=form)
+        # Guardar
         api_key = APIKey(
-            api_key=safe_string(form.api_key.data),
+            api_key=api_key_texto,
             api_key_expiracion=form.api_key_expiracion.data,
             es_activo=form.es_activo.data,
         )
@@ -137,19 +143,30 @@ def edit(api_key_id):
     api_key = APIKey.query.get_or_404(api_key_id)
     form = APIKeyForm()
     if form.validate_on_submit():
-        api_key.api_key = safe_string(form.api_key.data)
-        api_key.api_key_expiracion = form.api_key_expiracion.data
-        api_key.es_activo = form.es_activo.data
-        api_key.save()
-        bitacora = Bitacora(
-            modulo=Modulo.query.filter_by(nombre=MODULO).first(),
-            usuario=current_user,
-            descripcion=safe_message(f"Editado API Key {api_key.api_key}"),
-            url=url_for("api_keys.detail", api_key_id=api_key.id),
-        )
-        bitacora.save()
-        flash(bitacora.descripcion, "success")
-        return redirect(bitacora.url)
+        es_valido = True
+        # Si cambia el API key verificar que no este en uso
+        api_key_texto = safe_string(form.api_key.data)
+        if api_key.api_key != api_key_texto:
+            api_key_existente = APIKey.query.filter_by(api_key=api_key_texto).first()
+            if api_key_existente and api_key_existente.id != api_key.id:
+                es_valido = False
+                flash("El API key ya está en uso. Debe de ser único.", "warning")
+        # Si es valido actualizar
+        if es_valido:
+            api_key.api_key = api_key_texto
+            api_key.api_key_expiracion = form.api_key_expiracion.data
+            api_key.es_activo = form.es_activo.data
+            api_key.save()
+            llaves_api.invalidar()
+            bitacora = Bitacora(
+                modulo=Modulo.query.filter_by(nombre=MODULO).first(),
+                usuario=current_user,
+                descripcion=safe_message(f"Editado API Key {api_key.api_key}"),
+                url=url_for("api_keys.detail", api_key_id=api_key.id),
+            )
+            bitacora.save()
+            flash(bitacora.descripcion, "success")
+            return redirect(bitacora.url)
     form.api_key.data = api_key.api_key
     form.api_key_expiracion.data = api_key.api_key_expiracion
     form.es_activo.data = api_key.es_activo
@@ -163,6 +180,7 @@ def delete(api_key_id):
     api_key = APIKey.query.get_or_404(api_key_id)
     if api_key.estatus == "A":
         api_key.delete()
+        llaves_api.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -181,6 +199,7 @@ def recover(api_key_id):
     api_key = APIKey.query.get_or_404(api_key_id)
     if api_key.estatus == "B":
         api_key.recover()
+        llaves_api.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -4,9 +4,14 @@ API-OAuth2 v1 Endpoint: Actualizar Turno Estado
 
 from datetime import datetime
 
-from flask import g, request, url_for
+from flask import g, url_for
 from flask_restful import Resource
-from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
+from lib import catalogos
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.filas import filas
+from lib.instantaneas import instantaneas
+from lib.salas import enviar_turno
 from lib.safe_string import safe_message
 
 from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import token_required
@@ -18,37 +23,28 @@ from tauro.blueprints.api_v1.schemas import (
     TurnoEstadoOut,
     TurnoTipoOut,
 )
+from tauro.blueprints.api_v1.decorators import payload_required
 from tauro.blueprints.api_oauth2_v1.schemas import ActualizarTurnoEstadoIn
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
 from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
-from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.unidades.models import Unidad
-from tauro.blueprints.modulos.models import Modulo
-from tauro.blueprints.bitacoras.models import Bitacora
-
-from tauro.extensions import socketio
 
 
 class ActualizarTurnoEstado(Resource):
     """Actualizar el estado de un turno"""
 
     @token_required
-    def post(self) -> OneTurnoOut:
+    @payload_required(ActualizarTurnoEstadoIn)
+    def post(self, turno_estado_in: ActualizarTurnoEstadoIn) -> OneTurnoOut:
         """Actualizar el estado de un turno"""
 
-        # Consultar el usuario
+        # Tomar el usuario que dejó token_required, sin consultarlo
         username = g.current_user
-        try:
-            usuario = Usuario.query.filter_by(email=username).filter_by(estatus="A").one()
-        except (MultipleResultsFound, NoResultFound):
+        usuario = g.principal
+        if usuario is None:
             return OneTurnoOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
-
-        # Recibir y validar el payload
-        payload = request.get_json()
-        turno_estado_in = ActualizarTurnoEstadoIn.model_validate(payload)
+            )
 
         # Consultar el turno
         turno = Turno.query.get(turno_estado_in.turno_id)
@@ -56,17 +52,19 @@ class ActualizarTurnoEstado(Resource):
             return OneTurnoOut(
                 success=False,
                 message="Turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar el NUEVO estado de turno
-        turno_estado = TurnoEstado.query.get(turno_estado_in.turno_estado_id)
+        turno_estado = catalogos.turnos_estados.por_id(turno_estado_in.turno_estado_id)
         if turno_estado is None:
             return OneTurnoOut(
                 success=False,
                 message="Estado de turno no encontrado",
-            ).model_dump()
+            )
 
         # Cambiar el estado del turno
+        turno_estado_anterior = catalogos.turnos_estados.por_id(turno.turno_estado_id)
+        nombre_anterior = turno_estado_anterior.nombre if turno_estado_anterior else None
         turno.turno_estado_id = turno_estado.id
 
         # Si el estado es "COMPLETADO", definir el tiempo de término
@@ -82,19 +80,41 @@ class ActualizarTurnoEstado(Resource):
         else:
             turno.numero_cubiculo = 0
 
-        # Guardar cambios
-        turno.save()
+        # Al completar un turno, o si deja de estar completado, se vuelve a calcular la estadística de su día
+        if "COMPLETADO" in (turno_estado.nombre, nombre_anterior):
+            EstadisticaDiaria.recalcular(EstadisticaDiaria.grupo(turno))
 
-        # Crear registro en bitácora
-        Bitacora(
-            modulo=Modulo.query.filter_by(nombre="TURNOS").first(),
-            usuario=usuario,
+        # Crear registro en bitácora, se confirma en el mismo commit que el cambio
+        bitacoras.agregar(
+            "TURNOS",
+            usuario.id,
             descripcion=safe_message(f"El turno {turno.id} ha sido cambiado a {turno_estado.nombre} por Api-OAuth2"),
             url=url_for("turnos.detail", turno_id=turno.id),
-        ).save()
+        )
+
+        # Guardar cambios
+        turno.save()
+
+        # Las pantallas de la unidad deben mostrar el cambio
+        instantaneas.invalidar(turno.unidad_id)
+
+        # Actualizar la espera estimada y la fila de despacho, el turno sale o entra a la espera
+        # y si se completó su atención entra al promedio
+        if nombre_anterior == "EN ESPERA" and turno_estado.nombre != "EN ESPERA":
+            esperas.salir(turno.unidad_id, turno.turno_tipo_id)
+            filas.quitar(turno)
+        if nombre_anterior != "EN ESPERA" and turno_estado.nombre == "EN ESPERA":
+            esperas.formar(turno.unidad_id, turno.turno_tipo_id)
+            filas.agregar(turno)
+        if turno_estado.nombre == "COMPLETADO" and turno.inicio is not None:
+            esperas.completar(turno.unidad_id, turno.turno_tipo_id, (turno.termino - turno.inicio).total_seconds())
+
+        # Consultar el tipo de turno y la ubicación
+        turno_tipo = catalogos.turnos_tipos.por_id(turno.turno_tipo_id)
+        ubicacion = catalogos.ubicaciones.por_id(turno.ubicacion_id)
 
         # Consultar la unidad
-        unidad = Unidad.query.get(turno.unidad_id)
+        unidad = catalogos.unidades.por_id(turno.unidad_id)
         # Extraer la unidad
         unidad_out = None
         if unidad is not None:
@@ -115,25 +135,25 @@ class ActualizarTurnoEstado(Resource):
                 turno_numero_cubiculo=turno.numero_cubiculo,
                 turno_comentarios=turno.comentarios,
                 turno_estado=TurnoEstadoOut(
-                    id=turno.turno_estado.id,
-                    nombre=turno.turno_estado.nombre,
+                    id=turno_estado.id,
+                    nombre=turno_estado.nombre,
                 ),
                 turno_tipo=TurnoTipoOut(
-                    id=turno.turno_tipo_id,
-                    nombre=turno.turno_tipo.nombre,
-                    nivel=turno.turno_tipo.nivel,
+                    id=turno_tipo.id,
+                    nombre=turno_tipo.nombre,
+                    nivel=turno_tipo.nivel,
                 ),
                 ubicacion=UbicacionOut(
-                    id=turno.ubicacion.id,
-                    nombre=turno.ubicacion.nombre,
-                    numero=turno.ubicacion.numero,
+                    id=ubicacion.id,
+                    nombre=ubicacion.nombre,
+                    numero=ubicacion.numero,
                 ),
                 unidad=unidad_out,
             ),
-        ).model_dump()
+        )
 
-        # Enviar mensaje vía socketio
-        socketio.send(one_turno_out)
+        # Enviar mensaje vía socketio a la sala de la unidad
+        enviar_turno(one_turno_out.model_dump(), turno.unidad_id)
 
         # Entregar JSON
         return one_turno_out
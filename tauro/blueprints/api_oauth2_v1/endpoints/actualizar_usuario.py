@@ -2,10 +2,12 @@
 API-OAuth2 v1 Endpoint: Actualizar Usuario
 """
 
-from flask import g, request, url_for
+from flask import g, url_for
 from flask_restful import Resource
 from sqlalchemy import or_
-from sqlalchemy.exc import MultipleResultsFound, NoResultFound
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.principales import principales
 from lib.safe_string import safe_message
 
 from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import token_required
@@ -20,6 +22,7 @@ from tauro.blueprints.api_v1.schemas import (
     ConfiguracionUsuarioOut,
     OneConfiguracionUsuarioOut,
 )
+from tauro.blueprints.api_v1.decorators import payload_required
 from tauro.blueprints.api_oauth2_v1.schemas import ActualizarUsuarioIn
 from tauro.blueprints.turnos.models import Turno
 from tauro.blueprints.turnos_estados.models import TurnoEstado
@@ -29,30 +32,23 @@ from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
 from tauro.blueprints.ubicaciones.models import Ubicacion
 from tauro.blueprints.unidades.models import Unidad
 from tauro.blueprints.usuarios_roles.models import UsuarioRol
-from tauro.blueprints.bitacoras.models import Bitacora
-from tauro.blueprints.modulos.models import Modulo
 
 
 class ActualizarUsuario(Resource):
     """Actualizar un usuario"""
 
     @token_required
-    def post(self) -> OneConfiguracionUsuarioOut:
+    @payload_required(ActualizarUsuarioIn)
+    def post(self, actualizar_usuario_in: ActualizarUsuarioIn) -> OneConfiguracionUsuarioOut:
         """Actualizar un usuario"""
 
-        # Consultar el usuario
-        username = g.current_user
-        try:
-            usuario = Usuario.query.filter_by(email=username).filter_by(estatus="A").one()
-        except MultipleResultsFound, NoResultFound:
+        # Consultar el usuario que dejó token_required, aquí sí se consulta porque se va a modificar
+        if g.principal is None:
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
-
-        # Recibir y validar el payload
-        payload = request.get_json()
-        actualizar_usuario_in = ActualizarUsuarioIn.model_validate(payload)
+            )
+        usuario = Usuario.query.get(g.principal.id)
 
         # Actualizar TODOS los tipos de turnos que el usuario ESTA atendiendo con es_activo a falso
         for usuario_turno_tipo in UsuarioTurnoTipo.query.filter_by(usuario_id=usuario.id).all():
@@ -97,17 +93,17 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion no encontrada",
-            ).model_dump()
+            )
         if ubicacion_usuario.estatus != "A":
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion eliminada",
-            ).model_dump()
+            )
         if ubicacion_usuario.es_activo is False:
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Ubicacion no activa",
-            ).model_dump()
+            )
 
         # Consultar los usuarios por la ubicacion, si la ubicacion la tiene otro usuario, se le manda un error
         usuarios = Usuario.query.filter_by(ubicacion_id=ubicacion_usuario.id).filter_by(estatus="A").first()
@@ -115,21 +111,25 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message=f"Ubicacion ocupada por {usuarios.nombre}",
-            ).model_dump()
+            )
 
         # Actualizar la ubicacion del usuario
         usuario.ubicacion_id = ubicacion_usuario.id
 
+        # Crear registro en bitácora, se confirma en el mismo commit que el cambio
+        bitacoras.agregar(
+            "USUARIOS",
+            usuario.id,
+            descripcion=safe_message(f"El usuario ha sido actualizado por Api-OAuth2"),
+            url=url_for("usuarios.detail", usuario_id=usuario.id),
+        )
+
         # Guardar
         usuario.save()
 
-        # Crear registro en bitácora
-        Bitacora(
-            modulo=Modulo.query.filter_by(nombre="USUARIOS").first(),
-            usuario=usuario,
-            descripcion=safe_message(f"El usuario ha sido actualizado por Api-OAuth2"),
-            url=url_for("usuarios.detail", usuario_id=usuario.id),
-        ).save()
+        # La siguiente petición del usuario debe ver su nueva ubicación y sus tipos de turnos
+        principales.invalidar(usuario.email)
+        esperas.invalidar()
 
         # Consultar Ubicación
         ubicacion_usuario = None
@@ -191,7 +191,7 @@ class ActualizarUsuario(Resource):
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="El usuario no tiene un rol asignado",
-            ).model_dump()
+            )
         rol = usuarios_roles.rol
         # Consultar la unidad
         unidad_usuario = None
@@ -218,4 +218,4 @@ class ActualizarUsuario(Resource):
                 usuario_nombre_completo=usuario.nombre,
                 ultimo_turno=ultimo_turno,
             ),
-        ).model_dump()
+        )
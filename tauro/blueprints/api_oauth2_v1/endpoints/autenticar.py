@@ -12,14 +12,66 @@ from email_validator import EmailNotValidError, validate_email
 from flask import current_app, g, request
 from flask_restful import Resource
 
+from lib import catalogos
+from lib.contrasenas import ContrasenasOcupadas, intentos_acceso
+from lib.principales import principales
 from tauro.blueprints.api_v1.schemas import ResponseSchema
 from tauro.blueprints.api_oauth2_v1.schemas import RolOut, TokenSchema, UnidadOut, UbicacionOut
+from tauro.blueprints.tokens_renovacion.models import TokenRenovacion
 from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.usuarios_roles.models import UsuarioRol
+from tauro.extensions import database
 
 CONTRASENA_REGEXP = r"^(?=.*[A-Za-z])(?=.*\d)[A-Za-z\d]{8,}$"  # Contraseña con al menos 8 caracteres, una letra y un número
 
 
+def entregar_tokens(principal, familia: str = None) -> TokenSchema:
+    """Elaborar el token de acceso y emitir uno de renovación, el que llama hace el commit"""
+    ahora = datetime.now(tz=timezone(current_app.config["TZ"]))
+    payload = {
+        "sub": principal.email,
+        "iat": ahora,
+        "exp": ahora + timedelta(seconds=current_app.config["TOKEN_OAUTH2_EXPIRES_IN_SEG"]),
+    }
+    access_token = jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+    refresh_token = TokenRenovacion.emitir(principal.id, familia=familia)
+    unidad = catalogos.unidades.por_id(principal.unidad_id)
+    ubicacion = catalogos.ubicaciones.por_id(principal.ubicacion_id)
+    return TokenSchema(
+        success=True,
+        message="Token generado",
+        access_token=access_token,
+        token_type="Bearer",
+        expires_in=current_app.config["TOKEN_OAUTH2_EXPIRES_IN_SEG"],
+        refresh_token=refresh_token,
+        refresh_expires_in=current_app.config["TOKEN_OAUTH2_RENOVACION_EXPIRES_IN_SEG"],
+        username=principal.email,
+        usuario_nombre_completo=principal.nombre,
+        rol=RolOut(
+            id=principal.rol_id,
+            nombre=principal.rol_nombre,
+        ),
+        unidad=UnidadOut(
+            id=unidad.id,
+            nombre=unidad.nombre,
+            clave=unidad.clave,
+        ),
+        ubicacion=UbicacionOut(
+            id=ubicacion.id,
+            nombre=ubicacion.nombre,
+            numero=ubicacion.numero,
+        ),
+    )
+
+
+def recibir_refresh_token() -> str | None:
+    """Recibir el refresh_token por request form o por JSON"""
+    refresh_token = request.form.get("refresh_token")
+    if refresh_token is None:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get("refresh_token")
+    return refresh_token
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -33,18 +85,20 @@ def token_required(f):
                 ResponseSchema(
                     success=False,
                     message="No hay token en esta solicitud",
-                ).model_dump(),
+                ),
                 401,
             )
         try:
             data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
             g.current_user = data["sub"]
+            # El principal se toma de memoria, sólo se consulta la primera vez o al vencer, vea lib/principales.py
+            g.principal = principales.obtener(data["sub"])
         except jwt.ExpiredSignatureError:
             return (
                 ResponseSchema(
                     success=False,
                     message="El token ha expirado!",
-                ).model_dump(),
+                ),
                 200,
             )
         except jwt.InvalidTokenError:
@@ -52,7 +106,7 @@ def token_required(f):
                 ResponseSchema(
                     success=False,
                     message="No es válido el token!",
-                ).model_dump(),
+                ),
                 401,
             )
         return f(*args, **kwargs)
@@ -68,7 +122,6 @@ class Authenticate(Resource):
         username = request.form.get("username")
         password = request.form.get("password")
 
-        print(username, ":", password)
         # Si username es None y password es None, entonces recibir por JSON
         if username is None and password is None:
             data = request.get_json()
@@ -80,23 +133,33 @@ class Authenticate(Resource):
             return TokenSchema(
                 success=False,
                 message="Username y password son requeridos",
-            ).model_dump()
+            )
 
-        # Validar que username sea un correo electrónico
+        # Validar que username sea un correo electrónico, sin consultar el DNS en cada acceso
         try:
-            validate_email(username)
+            validate_email(username, check_deliverability=False)
         except EmailNotValidError as error:
             return TokenSchema(
                 success=False,
                 message=f"Email no válido: {str(error)}",
-            ).model_dump()
+            )
 
         # Validar que password cumpla con la expresión regular
         if not re.match(CONTRASENA_REGEXP, password):
             return TokenSchema(
                 success=False,
                 message="La contraseña debe tener al menos 8 caracteres, una letra y un número",
-            ).model_dump()
+            )
+
+        # Limitar los intentos de acceso por correo electrónico, la ficha se devuelve si no fue un intento fallido
+        if not intentos_acceso.permitir(username.lower()):
+            return (
+                TokenSchema(
+                    success=False,
+                    message="Demasiados intentos de acceso, espere un minuto",
+                ),
+                429,
+            )
 
         # Consultar el usuario
         usuario = Usuario.find_by_identity(username)
@@ -106,63 +169,138 @@ class Authenticate(Resource):
             return TokenSchema(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
         # Si la contraseña no es correcta
-        if not usuario.authenticated(with_password=True, password=password):
+        try:
+            es_valida = usuario.authenticated(with_password=True, password=password)
+        except ContrasenasOcupadas as error:
+            intentos_acceso.devolver(username.lower())
+            return (
+                TokenSchema(
+                    success=False,
+                    message=str(error),
+                ),
+                429,
+            )
+        if not es_valida:
             return TokenSchema(
                 success=False,
                 message="Contraseña incorrecta",
-            ).model_dump()
+            )
+        intentos_acceso.devolver(username.lower())
 
         # Verificar si el usuario tiene acceso al front-end
         if not usuario.es_acceso_frontend:
             return TokenSchema(
                 success=False,
                 message="El usuario no tiene acceso al front-end",
-            ).model_dump()
+            )
 
-        # Extraer un único rol
-        usuarios_roles = UsuarioRol.query.filter_by(usuario_id=usuario.id).filter_by(estatus="A").first()
-        if usuarios_roles is None:
+        # Tomar el rol, la unidad y la ubicación del principal, así queda en memoria para los siguientes endpoints
+        principal = principales.obtener(usuario.email)
+        if principal is None:
+            return TokenSchema(
+                success=False,
+                message="Usuario no encontrado",
+            )
+        if principal.rol_id is None:
             return TokenSchema(
                 success=False,
                 message="El usuario no tiene un rol asignado",
-            ).model_dump()
-        rol = usuarios_roles.rol
-
-        # Generar token con PyJWT
-        payload = {
-            "sub": username,
-            "iat": datetime.now(tz=timezone(current_app.config["TZ"])),
-            "exp": datetime.now(tz=timezone(current_app.config["TZ"])) + timedelta(hours=1),
-        }
-        access_token = jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
-
-        # Entregar JSON
-        return TokenSchema(
+            )
+
+        # Entregar JSON con el token de acceso y el de renovación
+        token = entregar_tokens(principal)
+        database.session.commit()
+        return token
+
+
+class RenovarToken(Resource):
+    """Renovar el token de acceso con el token de renovación, sin verificar la contraseña"""
+
+    def post(self) -> TokenSchema:
+        """Renovar el token de acceso con el token de renovación, sin verificar la contraseña"""
+        refresh_token = recibir_refresh_token()
+        if not refresh_token:
+            return TokenSchema(
+                success=False,
+                message="El token de renovación es requerido",
+            )
+
+        # Consultar y bloquear el token de renovación
+        token_renovacion = TokenRenovacion.consultar_para_rotar(refresh_token)
+        if token_renovacion is None:
+            database.session.rollback()
+            return (
+                TokenSchema(
+                    success=False,
+                    message="No es válido el token de renovación",
+                ),
+                401,
+            )
+
+        # Si ya se usó, alguien más lo tiene, se revoca la familia completa
+        if token_renovacion.es_usado and not token_renovacion.es_revocado:
+            TokenRenovacion.revocar_familia(token_renovacion.familia)
+            database.session.commit()
+            return (
+                TokenSchema(
+                    success=False,
+                    message="El token de renovación ya fue usado, ingrese de nuevo",
+                ),
+                401,
+            )
+        if not token_renovacion.es_vigente:
+            database.session.rollback()
+            return (
+                TokenSchema(
+                    success=False,
+                    message="El token de renovación ha expirado o fue revocado, ingrese de nuevo",
+                ),
+                401,
+            )
+
+        # Consultar el usuario, debe seguir activo y con acceso al front-end
+        usuario = database.session.get(Usuario, token_renovacion.usuario_id)
+        principal = principales.obtener(usuario.email) if usuario is not None else None
+        if principal is None or not usuario.es_acceso_frontend or principal.rol_id is None:
+            TokenRenovacion.revocar_familia(token_renovacion.familia)
+            database.session.commit()
+            return (
+                TokenSchema(
+                    success=False,
+                    message="El usuario ya no tiene acceso al front-end",
+                ),
+                401,
+            )
+
+        # Rotar, el token presentado queda usado y se entrega otro de la misma familia
+        token_renovacion.es_usado = True
+        token = entregar_tokens(principal, familia=token_renovacion.familia)
+        database.session.commit()
+        return token
+
+
+class RevocarToken(Resource):
+    """Revocar el token de renovación y los de su familia, para salir"""
+
+    def post(self) -> ResponseSchema:
+        """Revocar el token de renovación y los de su familia, para salir"""
+        refresh_token = recibir_refresh_token()
+        token_renovacion = TokenRenovacion.consultar_para_rotar(refresh_token) if refresh_token else None
+        if token_renovacion is None:
+            database.session.rollback()
+            return ResponseSchema(
+                success=False,
+                message="No es válido el token de renovación",
+            )
+        TokenRenovacion.revocar_familia(token_renovacion.familia)
+        database.session.commit()
+        return ResponseSchema(
             success=True,
-            message="Token generado",
-            access_token=access_token,
-            token_type="Bearer",
-            expires_in=current_app.config["TOKEN_OAUTH2_EXPIRES_IN_SEG"],
-            username=username,
-            usuario_nombre_completo=usuario.nombre,
-            rol=RolOut(
-                id=rol.id,
-                nombre=rol.nombre,
-            ),
-            unidad=UnidadOut(
-                id=usuario.unidad_id,
-                nombre=usuario.unidad.nombre,
-                clave=usuario.unidad.clave,
-            ),
-            ubicacion=UbicacionOut(
-                id=usuario.ubicacion_id,
-                nombre=usuario.ubicacion.nombre,
-                numero=usuario.ubicacion.numero,
-            ),
-        ).model_dump()
+            message="Token de renovación revocado",
+        )
 
 
 class ValidarToken(Resource):
@@ -181,7 +319,7 @@ class ValidarToken(Resource):
                 ResponseSchema(
                     success=False,
                     message="No hay token en esta solicitud",
-                ).model_dump(),
+                ),
                 200,
             )
         try:
@@ -192,7 +330,7 @@ class ValidarToken(Resource):
                 ResponseSchema(
                     success=False,
                     message="El token ha expirado!",
-                ).model_dump(),
+                ),
                 200,
             )
         except jwt.InvalidTokenError:
@@ -200,7 +338,7 @@ class ValidarToken(Resource):
                 ResponseSchema(
                     success=False,
                     message="No es válido el token!",
-                ).model_dump(),
+                ),
                 200,
             )
         # Entrega de resultado Favorable
@@ -208,6 +346,6 @@ class ValidarToken(Resource):
             ResponseSchema(
                 success=True,
                 message="Token válido!",
-            ).model_dump(),
+            ),
             200,
         )
@@ -5,8 +5,8 @@ API-OAuth2 v1 Endpoint: Consultar Configuracion Usuario
 from flask import g
 from flask_restful import Resource
 from sqlalchemy import or_
-from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 
+from lib import catalogos
 from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import token_required
 from tauro.blueprints.api_v1.schemas import (
     RolOut,
@@ -21,11 +21,8 @@ from tauro.blueprints.api_v1.schemas import (
 from tauro.blueprints.turnos.models import Turno
 from tauro.blueprints.turnos_estados.models import TurnoEstado
 from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
 from tauro.blueprints.ubicaciones.models import Ubicacion
 from tauro.blueprints.unidades.models import Unidad
-from tauro.blueprints.usuarios_roles.models import UsuarioRol
 
 
 class ConsultarConfiguracionUsuario(Resource):
@@ -35,26 +32,22 @@ class ConsultarConfiguracionUsuario(Resource):
     def get(self) -> OneConfiguracionUsuarioOut:
         """Consultar configuración del usuario"""
 
-        # Consultar el usuario
+        # Tomar el usuario que dejó token_required, sin consultarlo
         username = g.current_user
-        try:
-            usuario = Usuario.query.filter_by(email=username).filter_by(estatus="A").one()
-        except MultipleResultsFound, NoResultFound:
+        usuario = g.principal
+        if usuario is None:
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="Usuario no encontrado o email duplicado",
-            ).model_dump()
+            )
 
-        # Consultar los tipos de turnos del usuario
-        usuarios_turnos_tipos = (
-            UsuarioTurnoTipo.query.filter_by(usuario_id=usuario.id).filter_by(es_activo=True).filter_by(estatus="A").all()
-        )
+        # Los tipos de turnos del usuario vienen en el principal, sus nombres y niveles del catálogo
         turnos_tipos = None
-        if usuarios_turnos_tipos:
-            turnos_tipos = [
-                TurnoTipoOut(id=utt.turno_tipo.id, nombre=utt.turno_tipo.nombre, nivel=utt.turno_tipo.nivel)
-                for utt in usuarios_turnos_tipos
-            ]
+        if usuario.turnos_tipos_ids:
+            turnos_tipos = []
+            for turno_tipo_id in usuario.turnos_tipos_ids:
+                turno_tipo = catalogos.turnos_tipos.por_id(turno_tipo_id)
+                turnos_tipos.append(TurnoTipoOut(id=turno_tipo.id, nombre=turno_tipo.nombre, nivel=turno_tipo.nivel))
 
         # Consultar el último turno en "EN ESPERA" o "PASE A VENTANILLA" del usuario
         turnos = (
@@ -105,14 +98,12 @@ class ConsultarConfiguracionUsuario(Resource):
         # Consultar la ubicacion del usuario
         ubicacion_sql = Ubicacion.query.get(usuario.ubicacion_id)
         ubicacion_usuario = UbicacionOut(id=ubicacion_sql.id, nombre=ubicacion_sql.nombre, numero=ubicacion_sql.numero)
-        # Extraer un único rol
-        usuarios_roles = UsuarioRol.query.filter_by(usuario_id=usuario.id).filter_by(estatus="A").first()
-        if usuarios_roles is None:
+        # El único rol viene en el principal
+        if usuario.rol_id is None:
             return OneConfiguracionUsuarioOut(
                 success=False,
                 message="El usuario no tiene un rol asignado",
-            ).model_dump()
-        rol = usuarios_roles.rol
+            )
         # Consultar la unidad
         unidad_usuario = None
         unidad_sql = Unidad.query.get(usuario.unidad_id)
@@ -133,9 +124,9 @@ class ConsultarConfiguracionUsuario(Resource):
                 unidad=unidad_usuario,
                 turnos_tipos=turnos_tipos,
                 rol=RolOut(
-                    id=rol.id,
-                    nombre=rol.nombre,
+                    id=usuario.rol_id,
+                    nombre=usuario.rol_nombre,
                 ),
                 ultimo_turno=ultimo_turno,
             ),
-        ).model_dump()
+        )
@@ -0,0 +1,93 @@
+"""
+API-OAuth2 v1 Endpoint: Consultar Estadísticas Diarias
+"""
+
+from datetime import date, timedelta
+
+from flask import request
+from flask_restful import Resource
+
+from lib import catalogos
+from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import token_required
+from tauro.blueprints.api_oauth2_v1.schemas import (
+    EstadisticaDiariaOut,
+    ListEstadisticasDiariasOut,
+    TurnoTipoOut,
+    UbicacionOut,
+    UnidadOut,
+)
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
+from tauro.blueprints.turnos_numeros.models import TurnoNumero
+
+DIAS_MAXIMO = 366  # Días que se pueden pedir en una consulta
+
+
+class ConsultarEstadisticasDiarias(Resource):
+    """Consultar las estadísticas diarias de los turnos completados"""
+
+    @token_required
+    def get(self) -> ListEstadisticasDiariasOut:
+        """Consultar las estadísticas diarias, con fecha_desde, fecha_hasta y unidad_id opcionales, sólo lee los agregados"""
+
+        # Tomar las fechas, por defecto hoy
+        try:
+            fecha_hasta = date.fromisoformat(request.args["fecha_hasta"]) if request.args.get("fecha_hasta") else None
+            fecha_desde = date.fromisoformat(request.args["fecha_desde"]) if request.args.get("fecha_desde") else None
+            unidad_id = int(request.args["unidad_id"]) if request.args.get("unidad_id") else None
+        except ValueError:
+            return ListEstadisticasDiariasOut(
+                success=False,
+                message="Parámetros inválidos, las fechas son AAAA-MM-DD",
+            )
+        fecha_hasta = fecha_hasta or TurnoNumero.fecha_hoy()
+        fecha_desde = fecha_desde or fecha_hasta
+        if fecha_desde > fecha_hasta or fecha_hasta - fecha_desde >= timedelta(days=DIAS_MAXIMO):
+            return ListEstadisticasDiariasOut(
+                success=False,
+                message=f"El rango de fechas debe ser de 1 a {DIAS_MAXIMO} días",
+            )
+
+        # Consultar
+        consulta = (
+            EstadisticaDiaria.query.filter(EstadisticaDiaria.fecha >= fecha_desde)
+            .filter(EstadisticaDiaria.fecha <= fecha_hasta)
+            .filter(EstadisticaDiaria.estatus == "A")
+        )
+        if unidad_id is not None:
+            consulta = consulta.filter(EstadisticaDiaria.unidad_id == unidad_id)
+        estadisticas = consulta.order_by(EstadisticaDiaria.fecha, EstadisticaDiaria.unidad_id, EstadisticaDiaria.id).all()
+
+        # Elaborar las estadísticas, las unidades, tipos y ubicaciones salen de los catálogos
+        data = []
+        for estadistica in estadisticas:
+            unidad = catalogos.unidades.por_id(estadistica.unidad_id)
+            turno_tipo = catalogos.turnos_tipos.por_id(estadistica.turno_tipo_id)
+            ubicacion = catalogos.ubicaciones.por_id(estadistica.ubicacion_id)
+            data.append(
+                EstadisticaDiariaOut(
+                    fecha=estadistica.fecha.isoformat(),
+                    unidad=UnidadOut(id=unidad.id, clave=unidad.clave, nombre=unidad.nombre) if unidad else None,
+                    turno_tipo=(
+                        TurnoTipoOut(id=turno_tipo.id, nombre=turno_tipo.nombre, nivel=turno_tipo.nivel) if turno_tipo else None
+                    ),
+                    ubicacion=(
+                        UbicacionOut(id=ubicacion.id, nombre=ubicacion.nombre, numero=ubicacion.numero) if ubicacion else None
+                    ),
+                    cantidad=estadistica.cantidad,
+                    espera_promedio=estadistica.espera_promedio,
+                    espera_p50=estadistica.espera_p50,
+                    espera_p90=estadistica.espera_p90,
+                    espera_maximo=estadistica.espera_maximo,
+                    atencion_promedio=estadistica.atencion_promedio,
+                    atencion_p50=estadistica.atencion_p50,
+                    atencion_p90=estadistica.atencion_p90,
+                    atencion_maximo=estadistica.atencion_maximo,
+                )
+            )
+
+        # Entregar JSON
+        return ListEstadisticasDiariasOut(
+            success=True,
+            message=f"Se han consultado {len(data)} estadísticas del {fecha_desde} al {fecha_hasta}",
+            data=data,
+        )
@@ -4,8 +4,12 @@ API v1 Endpoint: Consultar Turnos
 
 from flask import current_app
 from flask_restful import Resource
-from sqlalchemy import or_, case
+from sqlalchemy import case
+from sqlalchemy.orm import raiseload
 
+from lib import catalogos
+from lib.esperas import esperas
+from lib.instantaneas import GLOBAL, instantaneas
 from tauro.blueprints.api_oauth2_v1.schemas import (
     ListTurnosOut,
     OneListTurnosOut,
@@ -16,29 +20,42 @@ from tauro.blueprints.api_oauth2_v1.schemas import (
     TurnoTipoOut,
 )
 from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
-from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.unidades.models import Unidad
 
 
 class ConsultarTurnos(Resource):
     """Consultar los turnos EN ESPERA y PASE A VENTANILLA"""
 
-    def get(self) -> OneListTurnosOut:
+    def get(self):
         """Consultar los turnos EN ESPERA y PASE A VENTANILLA, aquí NO SE USA el decorador porque es para pantallas"""
+        return instantaneas.responder(GLOBAL, self.consultar)
+
+    def consultar(self) -> OneListTurnosOut:
+        """Elaborar la respuesta, sólo se ejecuta cuando la instantánea no está vigente"""
+
+        # Tomar del catálogo los estados de turno por los que se filtra y ordena
+        estados = {estado.id: estado for estado in catalogos.turnos_estados.todos()}
+        visibles_ids = [
+            estado.id for estado in estados.values() if estado.nombre not in ("ATENDIENDO", "COMPLETADO", "CANCELADO")
+        ]
+        en_espera_ids = [estado.id for estado in estados.values() if estado.nombre == "EN ESPERA"]
+        pendientes_ids = [
+            estado.id
+            for estado in estados.values()
+            if estado.nombre in ("EN ESPERA", "PASE A VENTANILLA", "ATENDIENDO EN CUBICULO")
+        ]
 
         # Consultar los turnos...
-        # - Filtrar por los estados EN ESPERA y PASE A VENTANILLA,
+        # - Filtrar por los estados EN ESPERA y PASE A VENTANILLA, con in_ y no con not_in para aprovechar el índice,
         # - Filtrar por el estatus A (activo),
+        # - Sin cargas perezosas de relaciones, las ubicaciones, tipos y unidades salen de los catálogos,
         # - Y ordenar por el nombre de tipo de turno ATENCION URGENTE, CON CITA, NORMAL y luego por el número
         turnos = (
-            Turno.query.join(TurnoEstado)
-            .join(TurnoTipo)
-            .filter(TurnoEstado.nombre != "ATENDIENDO", TurnoEstado.nombre != "COMPLETADO", TurnoEstado.nombre != "CANCELADO")
+            Turno.query.filter(Turno.turno_estado_id.in_(visibles_ids))
             .filter(Turno.estatus == "A")
+            .options(raiseload("*"))
             .order_by(
                 # 1. Prioridad por estado: EN ESPERA primero (valor 0), el resto después (valor 1)
-                case((TurnoEstado.nombre == "EN ESPERA", 0), else_=1),
+                case((Turno.turno_estado_id.in_(en_espera_ids), 0), else_=1),
                 # 2. Dentro de cada grupo, ordenar por número de turno
                 Turno.numero,
             )
@@ -52,37 +69,34 @@ class ConsultarTurnos(Resource):
             return OneListTurnosOut(
                 success=True,
                 message="No hay turnos en espera",
-            ).model_dump()
-
-        # Consultar Unidades
-        unidades_sql = Unidad.query.all()
-        unidades = {unidad.id: unidad for unidad in unidades_sql}
-
-        # Consultar Estados
-        estados_sql = TurnoEstado.query.all()
-        estados = {estado.id: estado for estado in estados_sql}
-
-        # Consultar Tipos
-        tipos_sql = TurnoTipo.query.all()
-        tipos = {tipo.id: tipo for tipo in tipos_sql}
+            )
 
         # Consultar Último turno en estado 'EN ESPERA' o 'PASE A VENTANILLA' o 'ATENDIENDO EN CUBÍCULO'
         ultimo_turno_atendiendo = (
-            Turno.query.join(TurnoEstado)
-            .join(TurnoTipo)
-            .filter(
-                or_(
-                    TurnoEstado.nombre == "EN ESPERA",
-                    TurnoEstado.nombre == "PASE A VENTANILLA",
-                    TurnoEstado.nombre == "ATENDIENDO EN CUBICULO",
-                )
-            )
+            Turno.query.filter(Turno.turno_estado_id.in_(pendientes_ids))
             .filter(Turno.estatus == "A")
+            .options(raiseload("*"))
             .order_by(Turno.modificado.desc())
             .first()
         )
+
+        # Tomar del catálogo las unidades, los tipos de turno y las ubicaciones de estos turnos,
+        # por_id vuelve a cargar el catálogo si falta uno que se acaba de crear en otro worker
+        referidos = turnos + [ultimo_turno_atendiendo] if ultimo_turno_atendiendo else turnos
+        unidades = {turno.unidad_id: catalogos.unidades.por_id(turno.unidad_id) for turno in referidos}
+        tipos = {turno.turno_tipo_id: catalogos.turnos_tipos.por_id(turno.turno_tipo_id) for turno in referidos}
+        ubicaciones = {turno.ubicacion_id: catalogos.ubicaciones.por_id(turno.ubicacion_id) for turno in referidos}
+
+        # Las pantallas no deben fallar por un turno que apunte a un registro que no existe, se omite
+        completos = [
+            turno
+            for turno in referidos
+            if unidades[turno.unidad_id] and tipos[turno.turno_tipo_id] and ubicaciones[turno.ubicacion_id]
+        ]
+        turnos = [turno for turno in turnos if turno in completos]
+
         ultimo_turno = None
-        if ultimo_turno_atendiendo:
+        if ultimo_turno_atendiendo in completos:
             ultimo_turno = TurnoUnidadOut(
                 turno_id=ultimo_turno_atendiendo.id,
                 turno_numero=ultimo_turno_atendiendo.numero,
@@ -106,11 +120,14 @@ class ConsultarTurnos(Resource):
                 ),
                 ubicacion=UbicacionOut(
                     id=ultimo_turno_atendiendo.ubicacion_id,
-                    nombre=ultimo_turno_atendiendo.ubicacion.nombre,
-                    numero=ultimo_turno_atendiendo.ubicacion.numero,
+                    nombre=ubicaciones[ultimo_turno_atendiendo.ubicacion_id].nombre,
+                    numero=ubicaciones[ultimo_turno_atendiendo.ubicacion_id].numero,
                 ),
             )
 
+        # Estimar la espera de los turnos EN ESPERA según cuántos de su unidad y tipo van antes, vea lib/esperas.py
+        estimados = esperas.estimar_fila(turnos, en_espera_ids[0] if en_espera_ids else None)
+
         # Entregar JSON
         return OneListTurnosOut(
             success=True,
@@ -141,11 +158,12 @@ class ConsultarTurnos(Resource):
                         ),
                         ubicacion=UbicacionOut(
                             id=turno.ubicacion_id,
-                            nombre=turno.ubicacion.nombre,
-                            numero=turno.ubicacion.numero,
+                            nombre=ubicaciones[turno.ubicacion_id].nombre,
+                            numero=ubicaciones[turno.ubicacion_id].numero,
                         ),
+                        turno_espera_estimada=estimados.get(turno.id),
                     )
                     for turno in turnos
                 ],
             ),
-        ).model_dump()
+        )
@@ -26,4 +26,4 @@ class ConsultarTurnosTipos(Resource):
             data=[
                 TurnoTipoOut(id=turno_tipo.id, nombre=turno_tipo.nombre, nivel=turno_tipo.nivel) for turno_tipo in turnos_tipos
             ],
-        ).model_dump()
+        )
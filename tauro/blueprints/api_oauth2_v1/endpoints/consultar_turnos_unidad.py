@@ -4,8 +4,12 @@ API v1 Endpoint: Consultar Turnos Unidad
 
 from flask import current_app
 from flask_restful import Resource
-from sqlalchemy import or_, case
+from sqlalchemy import case
+from sqlalchemy.orm import raiseload
 
+from lib import catalogos
+from lib.esperas import esperas
+from lib.instantaneas import instantaneas
 from tauro.blueprints.api_oauth2_v1.schemas import (
     OneUnidadTurnosOut,
     TurnoOut,
@@ -16,39 +20,51 @@ from tauro.blueprints.api_oauth2_v1.schemas import (
     TurnoTipoOut,
 )
 from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
 from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.unidades.models import Unidad
 
 
 class ConsultarTurnosUnidad(Resource):
     """Consultar los turnos EN ESPERA y PASE A VENTANILLA de una unidad"""
 
-    def get(self, unidad_id: int) -> OneUnidadTurnosOut:
+    def get(self, unidad_id: int):
         """Consultar los turnos EN ESPERA y PASE A VENTANILLA de una unidad, aquí NO SE USA el decorador porque es para pantallas"""
 
         # Validar el ID de la unidad
-        unidad = Unidad.query.get(unidad_id)
+        unidad = catalogos.unidades.por_id(unidad_id)
         if unidad is None:
             return OneUnidadTurnosOut(
                 success=False,
                 message="Unidad no encontrada",
-            ).model_dump()
+            )
+
+        # Entregar la instantánea de la unidad
+        return instantaneas.responder(unidad.id, lambda: self.consultar(unidad))
+
+    def consultar(self, unidad) -> OneUnidadTurnosOut:
+        """Elaborar la respuesta de la unidad, sólo se ejecuta cuando la instantánea no está vigente"""
+
+        # Tomar del catálogo los estados de turno por los que se filtra y ordena
+        estados = {estado.id: estado for estado in catalogos.turnos_estados.todos()}
+        pendientes_ids = [estado.id for estado in estados.values() if estado.nombre not in ("COMPLETADO", "CANCELADO")]
+        pase_a_ventanilla_ids = [estado.id for estado in estados.values() if estado.nombre == "PASE A VENTANILLA"]
+        en_ventanilla_ids = [
+            estado.id for estado in estados.values() if estado.nombre in ("PASE A VENTANILLA", "ATENDIENDO EN CUBICULO")
+        ]
 
         # Consultar los turnos...
         # - Filtrar por unidad,
-        # - Filtrar por los estados EN ESPERA y PASE A VENTANILLA,
+        # - Filtrar por los estados EN ESPERA y PASE A VENTANILLA, con in_ y no con not_in para aprovechar el índice,
         # - Filtrar por el estatus A (activo),
+        # - Sin cargas perezosas de relaciones, las ubicaciones, tipos y unidades salen de los catálogos,
         # - Y ordenar por el nombre de tipo de turno ATENCIÓN URGENTE, CON CITA, NORMAL y luego por el número del turno
         turnos = (
-            Turno.query.join(TurnoEstado)
-            .join(TurnoTipo)
-            .filter(Turno.unidad_id == unidad.id)
-            .filter(TurnoEstado.nombre != "COMPLETADO", TurnoEstado.nombre != "CANCELADO")
+            Turno.query.filter(Turno.unidad_id == unidad.id)
+            .filter(Turno.turno_estado_id.in_(pendientes_ids))
             .filter(Turno.estatus == "A")
+            .options(raiseload("*"))
             .order_by(
                 # 1. Prioridad por estado: PASE A VENTANILLA primero (valor 0), el resto después (valor 1)
-                case((TurnoEstado.nombre == "PASE A VENTANILLA", 0), else_=1),
+                case((Turno.turno_estado_id.in_(pase_a_ventanilla_ids), 0), else_=1),
                 # 2. Dentro de cada grupo, ordenar por número de turno
                 Turno.numero,
             )
@@ -65,28 +81,30 @@ class ConsultarTurnosUnidad(Resource):
                 data=UnidadTurnosOut(
                     unidad=UnidadOut(id=unidad.id, clave=unidad.clave, nombre=unidad.nombre), ultimo_turno=None, turnos=[]
                 ),
-            ).model_dump()
+            )
 
         # Consultar Último turno en estado 'PASE A VENTANILLA'
         ultimo_turno_atendiendo = (
-            Turno.query.join(TurnoEstado)
-            .join(TurnoTipo)
+            Turno.query.join(TurnoTipo)
             .filter(Turno.unidad_id == unidad.id)
-            .filter(or_(TurnoEstado.nombre == "PASE A VENTANILLA", TurnoEstado.nombre == "ATENDIENDO EN CUBICULO"))
+            .filter(Turno.turno_estado_id.in_(en_ventanilla_ids))
             .filter(Turno.estatus == "A")
+            .options(raiseload("*"))
             .order_by(TurnoTipo.nivel, Turno.numero)
             .first()
         )
 
-        # Consultar Estados
-        estados_sql = TurnoEstado.query.all()
-        estados = {estado.id: estado for estado in estados_sql}
+        # Tomar del catálogo los tipos de turno y las ubicaciones de estos turnos,
+        # por_id vuelve a cargar el catálogo si falta uno que se acaba de crear en otro worker
+        referidos = turnos + [ultimo_turno_atendiendo] if ultimo_turno_atendiendo else turnos
+        tipos = {turno.turno_tipo_id: catalogos.turnos_tipos.por_id(turno.turno_tipo_id) for turno in referidos}
+        ubicaciones = {turno.ubicacion_id: catalogos.ubicaciones.por_id(turno.ubicacion_id) for turno in referidos}
 
-        # Consultar Tipos
-        tipos_sql = TurnoTipo.query.all()
-        tipos = {tipo.id: tipo for tipo in tipos_sql}
+        # Las pantallas no deben fallar por un turno que apunte a un registro que no existe, se omite
+        completos = [turno for turno in referidos if tipos[turno.turno_tipo_id] and ubicaciones[turno.ubicacion_id]]
+        turnos = [turno for turno in turnos if turno in completos]
 
-        if ultimo_turno_atendiendo:
+        if ultimo_turno_atendiendo in completos:
             ultimo_turno = TurnoOut(
                 turno_id=ultimo_turno_atendiendo.id,
                 turno_numero=ultimo_turno_atendiendo.numero,
@@ -104,15 +122,19 @@ class ConsultarTurnosUnidad(Resource):
                     nivel=tipos[ultimo_turno_atendiendo.turno_tipo_id].nivel,
                 ),
                 ubicacion=UbicacionOut(
-                    id=ultimo_turno_atendiendo.ubicacion.id,
-                    nombre=ultimo_turno_atendiendo.ubicacion.nombre,
-                    numero=ultimo_turno_atendiendo.ubicacion.numero,
+                    id=ubicaciones[ultimo_turno_atendiendo.ubicacion_id].id,
+                    nombre=ubicaciones[ultimo_turno_atendiendo.ubicacion_id].nombre,
+                    numero=ubicaciones[ultimo_turno_atendiendo.ubicacion_id].numero,
                 ),
                 unidad=UnidadOut(id=unidad.id, clave=unidad.clave, nombre=unidad.nombre),
             )
         else:
             ultimo_turno = None
 
+        # Estimar la espera de los turnos EN ESPERA según cuántos de su tipo van antes, vea lib/esperas.py
+        en_espera = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        estimados = esperas.estimar_fila(turnos, en_espera.id if en_espera else None)
+
         # Entregar JSON
         return OneUnidadTurnosOut(
             success=True,
@@ -138,13 +160,14 @@ class ConsultarTurnosUnidad(Resource):
                             nivel=tipos[turno.turno_tipo_id].nivel,
                         ),
                         ubicacion=UbicacionOut(
-                            id=turno.ubicacion.id,
-                            nombre=turno.ubicacion.nombre,
-                            numero=turno.ubicacion.numero,
+                            id=ubicaciones[turno.ubicacion_id].id,
+                            nombre=ubicaciones[turno.ubicacion_id].nombre,
+                            numero=ubicaciones[turno.ubicacion_id].numero,
                         ),
                         unidad=UnidadOut(id=unidad.id, clave=unidad.clave, nombre=unidad.nombre),
+                        turno_espera_estimada=estimados.get(turno.id),
                     )
                     for turno in turnos
                 ],
             ),
-        ).model_dump()
+        )
@@ -2,49 +2,96 @@
 API-OAuth2 v1 Endpoint: Crear Turno
 """
 
-from datetime import datetime
-
-from flask import current_app, g, request, url_for
+from flask import g, url_for
 from flask_restful import Resource
-from pytz import timezone
-from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
-
+from sqlalchemy.exc import IntegrityError
+
+from lib import catalogos
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.exceptions import MyNotValidParamError
+from lib.filas import filas
+from lib.idempotencias import idempotencias
+from lib.instantaneas import instantaneas
+from lib.salas import enviar_turno
 from lib.safe_string import safe_string, safe_message, safe_telefono
 from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import token_required
 from tauro.blueprints.api_v1.schemas import OneTurnoOut, UnidadOut, TurnoOut, UbicacionOut, TurnoEstadoOut, TurnoTipoOut
+from tauro.blueprints.api_v1.decorators import payload_required
 from tauro.blueprints.api_oauth2_v1.schemas import CrearTurnoIn
 from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
-from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.unidades.models import Unidad
-from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.ubicaciones.models import Ubicacion
-from tauro.blueprints.bitacoras.models import Bitacora
-from tauro.blueprints.modulos.models import Modulo
-
-from tauro.extensions import socketio
+from tauro.blueprints.turnos_numeros.models import TurnoNumero
+from tauro.extensions import database
+
+
+def elaborar_respuesta(turno: Turno, username: str, espera: int | None = None) -> OneTurnoOut:
+    """Elaborar el OneTurnoOut del turno creado, también para los reintentos con el mismo Idempotency-Key"""
+    unidad = catalogos.unidades.por_id(turno.unidad_id)
+    turno_estado = catalogos.turnos_estados.por_id(turno.turno_estado_id)
+    turno_tipo = catalogos.turnos_tipos.por_id(turno.turno_tipo_id)
+    ubicacion = catalogos.ubicaciones.por_id(turno.ubicacion_id)
+    return OneTurnoOut(
+        success=True,
+        message=f"Se ha creado el turno {turno.numero} en {unidad.clave} por {username}",
+        data=TurnoOut(
+            turno_id=turno.id,
+            turno_numero=turno.numero,
+            turno_fecha=turno.creado.isoformat(),
+            turno_numero_cubiculo=turno.numero_cubiculo,
+            turno_telefono=turno.telefono,
+            turno_comentarios=turno.comentarios,
+            turno_estado=TurnoEstadoOut(
+                id=turno_estado.id,
+                nombre=turno_estado.nombre,
+            ),
+            turno_tipo=TurnoTipoOut(
+                id=turno_tipo.id,
+                nombre=turno_tipo.nombre,
+                nivel=turno_tipo.nivel,
+            ),
+            ubicacion=UbicacionOut(
+                id=ubicacion.id,
+                nombre=ubicacion.nombre,
+                numero=ubicacion.numero,
+            ),
+            unidad=UnidadOut(
+                id=unidad.id,
+                clave=unidad.clave,
+                nombre=unidad.nombre,
+            ),
+            turno_espera_estimada=espera,
+        ),
+    )
 
 
 class CrearTurno(Resource):
     """Crear un nuevo turno"""
 
     @token_required
-    def post(self) -> OneTurnoOut:
+    @payload_required(CrearTurnoIn)
+    def post(self, turno_in: CrearTurnoIn) -> OneTurnoOut:
         """Crear un turno"""
 
-        # Consultar el usuario
+        # Tomar el usuario que dejó token_required, sin consultarlo
         username = g.current_user
-        try:
-            usuario = Usuario.query.filter_by(email=username).filter_by(estatus="A").one()
-        except (MultipleResultsFound, NoResultFound):
+        usuario = g.principal
+        if usuario is None:
             return OneTurnoOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
-        # Recibir y validar el payload
-        payload = request.get_json()
-        turno_in = CrearTurnoIn.model_validate(payload)
+        # Un reintento con el mismo Idempotency-Key recibe la respuesta original, vea lib/idempotencias.py
+        try:
+            llave = idempotencias.llave(username)
+        except MyNotValidParamError as error:
+            return OneTurnoOut(
+                success=False,
+                message=str(error),
+            )
+        respuesta = idempotencias.obtener(llave, lambda turno: elaborar_respuesta(turno, username))
+        if respuesta is not None:
+            return respuesta
 
         # Validar el número de teléfono
         telefono = None
@@ -55,119 +102,93 @@ class CrearTurno(Resource):
                     return OneTurnoOut(
                         success=False,
                         message="Número de teléfono inválido",
-                    ).model_dump()
+                    )
 
         # Consultar el tipo de turno
-        turno_tipo = TurnoTipo.query.get(turno_in.turno_tipo_id)
+        turno_tipo = catalogos.turnos_tipos.por_id(turno_in.turno_tipo_id)
         if turno_tipo is None:
             return OneTurnoOut(
                 success=False,
                 message="Tipo de turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar la unidad
-        unidad = Unidad.query.get(turno_in.unidad_id)
+        unidad = catalogos.unidades.por_id(turno_in.unidad_id)
         if unidad is None:
             return OneTurnoOut(
                 success=False,
                 message="Unidad no encontrada",
-            ).model_dump()
+            )
 
         # Consultar el estado de turno "EN ESPERA"
-        try:
-            turno_estado = TurnoEstado.query.filter_by(nombre="EN ESPERA").filter_by(estatus="A").one()
-        except (MultipleResultsFound, NoResultFound):
+        turno_estado = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        if turno_estado is None:
             return OneTurnoOut(
                 success=False,
                 message="Estado de turno no encontrado",
-            ).model_dump()
+            )
 
         # Consultar la ubicacion NO DEFINIDO
-        try:
-            ubicacion = Ubicacion.query.filter_by(nombre="NO DEFINIDO").filter_by(estatus="A").one()
-        except (MultipleResultsFound, NoResultFound):
+        ubicacion = catalogos.ubicaciones.por_nombre("NO DEFINIDO")
+        if ubicacion is None:
             return OneTurnoOut(
                 success=False,
                 message="Ubicacion no encontrada",
-            ).model_dump()
+            )
 
-        # Definir el numero de turno
-        fecha_hoy = datetime.now(tz=timezone(current_app.config["TZ"])).date()
-        timestamp_hoy = datetime(year=fecha_hoy.year, month=fecha_hoy.month, day=fecha_hoy.day, hour=0, minute=0, second=0)
-        numero = Turno.query.filter(Turno.creado >= timestamp_hoy).count() + 1
+        # Reservar el numero de turno, se confirma junto con el turno al guardar
+        numero = TurnoNumero.reservar(unidad.id)
 
         # Crear el nuevo turno
         turno = Turno(
-            usuario=usuario,
-            turno_estado=turno_estado,
-            turno_tipo=turno_tipo,
+            usuario_id=usuario.id,
+            turno_estado_id=turno_estado.id,
+            turno_tipo_id=turno_tipo.id,
             numero_cubiculo=0,
             telefono=telefono,
-            ubicacion=ubicacion,
+            ubicacion_id=ubicacion.id,
             numero=numero,
             unidad_id=unidad.id,
             comentarios=safe_string(turno_in.comentarios),
         )
-        turno.save()
+        database.session.add(turno)
+        database.session.flush()  # Para tener el ID del turno en la bitácora
 
-        # Crear registro en bitácora
-        Bitacora(
-            modulo=Modulo.query.filter_by(nombre="TURNOS").first(),
-            usuario=usuario,
+        # Crear registro en bitácora, se confirma en el mismo commit que el cambio
+        bitacoras.agregar(
+            "TURNOS",
+            usuario.id,
             descripcion=safe_message(f"El turno {turno.id} ha sido creado por Api-OAuth2"),
             url=url_for("turnos.detail", turno_id=turno.id),
-        ).save()
-
-        # Extraer la unidad
-        unidad_out = None
-        if unidad is not None:
-            unidad_out = UnidadOut(
-                id=unidad.id,
-                clave=unidad.clave,
-                nombre=unidad.nombre,
-            )
-
-        # Extraer el Tipo de Turno
-        turno_tipo_out = None
-        if turno_tipo is not None:
-            turno_tipo_out = TurnoTipoOut(
-                id=turno_tipo.id,
-                nombre=turno_tipo.nombre,
-                nivel=turno_tipo.nivel,
-            )
-
-        # Extraer el Estado del Turno
-        turno_estado_out = None
-        if turno_estado is not None:
-            turno_estado_out = TurnoEstadoOut(
-                id=turno_estado.id,
-                nombre=turno_estado.nombre,
-            )
-
-        # Crear nuevo objeto OneTurnoOut
-        turno_out = OneTurnoOut(
-            success=True,
-            message=f"Se ha creado el turno {turno.numero} en {unidad.clave} por {username}",
-            data=TurnoOut(
-                turno_id=turno.id,
-                turno_numero=turno.numero,
-                turno_fecha=turno.creado.isoformat(),
-                turno_numero_cubiculo=turno.numero_cubiculo,
-                turno_telefono=turno.telefono,
-                turno_comentarios=turno.comentarios,
-                turno_estado=turno_estado_out,
-                turno_tipo=turno_tipo_out,
-                ubicacion=UbicacionOut(
-                    id=turno.ubicacion.id,
-                    nombre=turno.ubicacion.nombre,
-                    numero=turno.ubicacion.numero,
-                ),
-                unidad=unidad_out,
-            ),
-        ).model_dump()
+        )
 
-        # Ejecutar send socket-io. Envía una variable "message" con la estructura json
-        socketio.send(turno_out)
+        # Guardar, con la llave de idempotencia en el mismo commit
+        idempotencias.agregar(llave, turno)
+        try:
+            turno.save()
+        except IntegrityError:
+            # Otro intento con la misma llave ya creó el turno, se entrega su respuesta
+            database.session.rollback()
+            respuesta = idempotencias.obtener(llave, lambda turno: elaborar_respuesta(turno, username))
+            if llave is None or respuesta is None:
+                raise
+            return respuesta
+
+        # Las pantallas de la unidad deben mostrar el cambio
+        instantaneas.invalidar(turno.unidad_id)
+
+        # Formar el turno en la espera de su unidad y tipo, se estima sin consultar, vea lib/esperas.py
+        espera = esperas.formar(turno.unidad_id, turno.turno_tipo_id)
+
+        # Agregar el turno a la fila de despacho de su unidad, vea lib/filas.py
+        filas.agregar(turno)
+
+        # Elaborar la respuesta y guardarla para los reintentos con la misma llave
+        turno_out = elaborar_respuesta(turno, username, espera)
+        idempotencias.guardar(llave, turno_out)
+
+        # Ejecutar send socket-io a la sala de la unidad. Envía una variable "message" con la estructura json
+        enviar_turno(turno_out.model_dump(), turno.unidad_id)
 
         # Entregar JSON
         return turno_out
@@ -6,7 +6,12 @@ from datetime import datetime
 
 from flask import g, url_for
 from flask_restful import Resource
-from sqlalchemy.exc import MultipleResultsFound, NoResultFound
+from lib import catalogos
+from lib.bitacoras import bitacoras
+from lib.esperas import esperas
+from lib.filas import filas
+from lib.instantaneas import instantaneas
+from lib.salas import enviar_turno
 from lib.safe_string import safe_message
 
 from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import token_required
@@ -18,16 +23,6 @@ from tauro.blueprints.api_v1.schemas import (
     TurnoEstadoOut,
     TurnoTipoOut,
 )
-from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos_estados.models import TurnoEstado
-from tauro.blueprints.turnos_tipos.models import TurnoTipo
-from tauro.blueprints.usuarios.models import Usuario
-from tauro.blueprints.usuarios_turnos_tipos.models import UsuarioTurnoTipo
-from tauro.blueprints.unidades.models import Unidad
-from tauro.blueprints.bitacoras.models import Bitacora
-from tauro.blueprints.modulos.models import Modulo
-
-from tauro.extensions import socketio
 
 
 class TomarTurno(Resource):
@@ -37,59 +32,51 @@ class TomarTurno(Resource):
     def get(self) -> OneTurnoOut:
         """Tomar un turno"""
 
-        # Consultar el usuario
-        username = g.current_user
-        try:
-            usuario = Usuario.query.filter_by(email=username).filter_by(estatus="A").one()
-        except MultipleResultsFound, NoResultFound:
+        # Tomar el usuario que dejó token_required, sin consultarlo
+        usuario = g.principal
+        if usuario is None:
             return OneTurnoOut(
                 success=False,
                 message="Usuario no encontrado",
-            ).model_dump()
+            )
 
-        # Consultar los tipos de turnos del usuario
-        usuarios_turnos_tipos = (
-            UsuarioTurnoTipo.query.filter_by(usuario_id=usuario.id).filter_by(es_activo=True).filter_by(estatus="A").all()
-        )
-        if usuarios_turnos_tipos is None:
+        # Los tipos de turnos del usuario vienen en el principal
+        turnos_tipos_ids = list(usuario.turnos_tipos_ids)
+        if not turnos_tipos_ids:
             return OneTurnoOut(
                 success=False,
                 message="No ha elegido los tipos de turnos que atenderá",
-            ).model_dump()
-        tipos_turnos = [utt.turno_tipo.nombre for utt in usuarios_turnos_tipos]
-
-        # Tomar un turno...
-        # - Filtrar el estado del turno "EN ESPERA",
-        # - Filtrar los tipos de turnos que tiene el usuario, por ejemplo ["ATENCION URGENTE", "NORMAL"]
-        # - Filtrar la unidad del usuario,
-        # - Ordenar por el nombre del tipo de turno, luego por el número del turno
-        # - Tomar solo el primero
-        turno = (
-            Turno.query.join(TurnoEstado)
-            .join(TurnoTipo)
-            .filter(TurnoEstado.nombre == "EN ESPERA")
-            .filter(TurnoTipo.nombre.in_(tipos_turnos))
-            .filter(Turno.unidad_id == usuario.unidad_id)
-            .filter(Turno.estatus == "A")
-            .order_by(TurnoTipo.nombre, Turno.numero)
-            .first()
-        )
+            )
 
-        # Si no hay turnos en espera, retornar error
-        if turno is None:
+        # Consultar el estado de turno "EN ESPERA"
+        en_espera = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        if en_espera is None:
             return OneTurnoOut(
                 success=False,
-                message="No hay turnos en espera",
-            ).model_dump()
+                message="Estado de turno no encontrado",
+            )
 
         # Consultar el estado de turno "PASE A VENTANILLA"
-        try:
-            turno_estado = TurnoEstado.query.filter_by(nombre="PASE A VENTANILLA").one()
-        except MultipleResultsFound, NoResultFound:
+        turno_estado = catalogos.turnos_estados.por_nombre("PASE A VENTANILLA")
+        if turno_estado is None:
             return OneTurnoOut(
                 success=False,
                 message="Estado de turno no encontrado",
-            ).model_dump()
+            )
+
+        # Tomar un turno de la fila de la unidad...
+        # - De los tipos de turnos que tiene el usuario, por ejemplo ["ATENCION URGENTE", "NORMAL"]
+        # - El de menor nivel del tipo de turno, luego el de menor número
+        # - Bloqueado hasta guardar; los que ya bloqueó otra ventanilla se saltan,
+        #   así dos ventanillas nunca toman el mismo turno y tampoco se esperan una a la otra
+        turno = filas.tomar(usuario.unidad_id, turnos_tipos_ids, en_espera.id)
+
+        # Si no hay turnos en espera, retornar error
+        if turno is None:
+            return OneTurnoOut(
+                success=False,
+                message="No hay turnos en espera",
+            )
 
         # Cambiar el usuario, el estado a "PASE A VENTANILLA" y la ubicación, así como el tiempo de inicio
         turno.usuario_id = usuario.id
@@ -97,19 +84,29 @@ class TomarTurno(Resource):
         turno.ubicacion_id = usuario.ubicacion_id
         turno.inicio = datetime.now()
 
+        # Crear registro en bitácora, se confirma en el mismo commit que el cambio
+        bitacoras.agregar(
+            "TURNOS",
+            usuario.id,
+            descripcion=safe_message(f"El turno {turno.id} ha sido tomado utilizando Api-OAuth2"),
+            url=url_for("turnos.detail", turno_id=turno.id),
+        )
+
         # Guardar
         turno.save()
 
-        # Crear registro en bitácora
-        Bitacora(
-            modulo=Modulo.query.filter_by(nombre="TURNOS").first(),
-            usuario=usuario,
-            descripcion=safe_message(f"El turno {turno.id} ha sido tomado utilizando Api-OAuth2"),
-            url=url_for("turnos.detail", turno_id=turno.id),
-        ).save()
+        # Las pantallas de la unidad deben mostrar el cambio
+        instantaneas.invalidar(turno.unidad_id)
+
+        # El turno sale de la espera de su unidad y tipo
+        esperas.salir(turno.unidad_id, turno.turno_tipo_id)
+
+        # Consultar el tipo de turno y la nueva ubicación
+        turno_tipo = catalogos.turnos_tipos.por_id(turno.turno_tipo_id)
+        ubicacion = catalogos.ubicaciones.por_id(turno.ubicacion_id)
 
         # Consultar la unidad
-        unidad = Unidad.query.get(turno.unidad_id)
+        unidad = catalogos.unidades.por_id(turno.unidad_id)
         # Extraer la unidad
         unidad_out = None
         if unidad is not None:
@@ -131,25 +128,25 @@ class TomarTurno(Resource):
                 turno_telefono=turno.telefono,
                 turno_comentarios=turno.comentarios,
                 turno_estado=TurnoEstadoOut(
-                    id=turno.turno_estado.id,
-                    nombre=turno.turno_estado.nombre,
+                    id=turno_estado.id,
+                    nombre=turno_estado.nombre,
                 ),
                 turno_tipo=TurnoTipoOut(
-                    id=turno.turno_tipo_id,
-                    nombre=turno.turno_tipo.nombre,
-                    nivel=turno.turno_tipo.nivel,
+                    id=turno_tipo.id,
+                    nombre=turno_tipo.nombre,
+                    nivel=turno_tipo.nivel,
                 ),
                 ubicacion=UbicacionOut(
-                    id=turno.ubicacion.id,
-                    nombre=turno.ubicacion.nombre,
-                    numero=turno.ubicacion.numero,
+                    id=ubicacion.id,
+                    nombre=ubicacion.nombre,
+                    numero=ubicacion.numero,
                 ),
                 unidad=unidad_out,
             ),
-        ).model_dump()
+        )
 
-        # Enviar mensaje socketio
-        socketio.send(one_turno_out)
+        # Enviar mensaje socketio a la sala de la unidad
+        enviar_turno(one_turno_out.model_dump(), turno.unidad_id)
 
         # Entregar JSON
         return one_turno_out
@@ -7,10 +7,12 @@ from flask_cors import CORS
 from flask_restful import Api
 
 from config.settings import get_settings
+from lib.representaciones import representar_json
 from tauro.blueprints.api_oauth2_v1.endpoints.actualizar_turno_estado import ActualizarTurnoEstado
 from tauro.blueprints.api_oauth2_v1.endpoints.actualizar_usuario import ActualizarUsuario
-from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import Authenticate, ValidarToken
+from tauro.blueprints.api_oauth2_v1.endpoints.autenticar import Authenticate, RenovarToken, RevocarToken, ValidarToken
 from tauro.blueprints.api_oauth2_v1.endpoints.consultar_configuracion_usuario import ConsultarConfiguracionUsuario
+from tauro.blueprints.api_oauth2_v1.endpoints.consultar_estadisticas_diarias import ConsultarEstadisticasDiarias
 from tauro.blueprints.api_oauth2_v1.endpoints.consultar_turnos import ConsultarTurnos
 from tauro.blueprints.api_oauth2_v1.endpoints.consultar_turnos_estados import ConsultarTurnosEstados
 from tauro.blueprints.api_oauth2_v1.endpoints.consultar_turnos_tipos import ConsultarTurnosTipos
@@ -24,6 +26,7 @@ api_oauth2_v1 = Blueprint("api_oauth2_v1", __name__, url_prefix="/api_oauth2/v1"
 
 # Crear la API
 api = Api(api_oauth2_v1)
+api.representations["application/json"] = representar_json  # Serializa los modelos de pydantic, vea lib/representaciones.py
 
 # CORS
 CORS(api_oauth2_v1)
@@ -42,8 +45,11 @@ api.add_resource(ConsultarTurnosEstados, "/consultar_turnos_estados")
 api.add_resource(ConsultarTurnosTipos, "/consultar_turnos_tipos")
 api.add_resource(ConsultarTurnosUnidad, "/consultar_turnos/<int:unidad_id>")
 api.add_resource(ConsultarConfiguracionUsuario, "/consultar_configuracion_usuario")
+api.add_resource(ConsultarEstadisticasDiarias, "/consultar_estadisticas_diarias")
 api.add_resource(ConsultarUnidades, "/consultar_unidades")
 api.add_resource(ConsultarUbicaciones, "/consultar_ubicaciones")
 api.add_resource(CrearTurno, "/crear_turno")
+api.add_resource(RenovarToken, "/renovar_token")
+api.add_resource(RevocarToken, "/revocar_token")
 api.add_resource(TomarTurno, "/tomar_turno")
 api.add_resource(ValidarToken, "/validar_token")
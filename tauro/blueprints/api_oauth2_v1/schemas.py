@@ -24,6 +24,8 @@ class TokenSchema(BaseModel):
     access_token: str | None = None
     token_type: str | None = None
     expires_in: int | None = None
+    refresh_token: str | None = None
+    refresh_expires_in: int | None = None
     username: str | None = None
     usuario_nombre_completo: str | None = None
     rol: RolOut | None = None
@@ -52,6 +54,7 @@ class TurnoUnidadOut(BaseModel):
     turno_tipo: TurnoTipoOut
     unidad: UnidadOut
     ubicacion: UbicacionOut | None = None
+    turno_espera_estimada: int | None = None  # Segundos, vea lib/esperas.py
 
 
 class OneUnidadTurnosOut(ResponseSchema):
@@ -95,3 +98,27 @@ class ActualizarUsuarioIn(BaseModel):
 
     ubicacion_id: int
     turnos_tipos_ids: list[int]
+
+
+class EstadisticaDiariaOut(BaseModel):
+    """Esquema para entregar la estadística de un día, los tiempos en segundos"""
+
+    fecha: str
+    unidad: UnidadOut | None = None
+    turno_tipo: TurnoTipoOut | None = None
+    ubicacion: UbicacionOut | None = None
+    cantidad: int
+    espera_promedio: float | None = None
+    espera_p50: float | None = None
+    espera_p90: float | None = None
+    espera_maximo: float | None = None
+    atencion_promedio: float | None = None
+    atencion_p50: float | None = None
+    atencion_p90: float | None = None
+    atencion_maximo: float | None = None
+
+
+class ListEstadisticasDiariasOut(ResponseSchema):
+    """Esquema para entregar una lista de estadísticas diarias"""
+
+    data: list[EstadisticaDiariaOut] | None = None
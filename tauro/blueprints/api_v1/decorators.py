@@ -0,0 +1,44 @@
+"""
+API v1, decoradores
+"""
+
+from functools import wraps
+
+from flask import request
+from pydantic import BaseModel, ValidationError
+
+from tauro.blueprints.api_v1.schemas import ErrorValidacionOut, ListErroresValidacionOut
+
+
+def payload_required(esquema: type[BaseModel]):
+    """Validar los bytes del cuerpo con el esquema y entregarlo al recurso, o responder 422 con los errores"""
+
+    def decorator(f):
+        """Decorador"""
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Se valida directo de los bytes con model_validate_json, sin decodificar antes con request.get_json()
+            try:
+                payload = esquema.model_validate_json(request.get_data())
+            except ValidationError as error:
+                return (
+                    ListErroresValidacionOut(
+                        success=False,
+                        message="El payload no es válido",
+                        data=[
+                            ErrorValidacionOut(
+                                campo=".".join(str(parte) for parte in detalle["loc"]),
+                                mensaje=detalle["msg"],
+                                tipo=detalle["type"],
+                            )
+                            for detalle in error.errors(include_url=False, include_context=False, include_input=False)
+                        ],
+                    ),
+                    422,
+                )
+            return f(*args, payload, **kwargs)
+
+        return decorated_function
+
+    return decorator
@@ -88,6 +88,7 @@ class TurnoOut(BaseModel):
     turno_tipo: TurnoTipoOut
     ubicacion: UbicacionOut | None = None
     unidad: UnidadOut | None = None
+    turno_espera_estimada: int | None = None  # Segundos, sólo al crearlo y en las pantallas, vea lib/esperas.py
 
 
 class ConfiguracionUsuarioOut(BaseModel):
@@ -111,3 +112,17 @@ class OneTurnoOut(ResponseSchema):
     """Esquema para entregar un turno ya creado"""
 
     data: TurnoOut | None = None
+
+
+class ErrorValidacionOut(BaseModel):
+    """Esquema para entregar un error de validación del payload"""
+
+    campo: str
+    mensaje: str
+    tipo: str
+
+
+class ListErroresValidacionOut(ResponseSchema):
+    """Esquema para entregar los errores de validación del payload"""
+
+    data: list[ErrorValidacionOut] | None = None
@@ -8,11 +8,12 @@ from flask import Blueprint, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.bitacoras_archivadas.models import BitacoraArchivada
 from tauro.blueprints.modulos.models import Modulo
 from tauro.blueprints.permisos.models import Permiso
 from tauro.blueprints.usuarios.decorators import permission_required
 from tauro.blueprints.usuarios.models import Usuario
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 
 MODULO = "BITACORAS"
 
@@ -31,28 +32,28 @@ def datatable_json():
     """DataTable JSON para listado de Bitacoras"""
     # Tomar parámetros de Datatables
     draw, start, rows_per_page = get_datatable_parameters()
-    # Consultar
-    consulta = Bitacora.query
+    # Consultar, en el archivo si lo piden
+    modelo = BitacoraArchivada if request.form.get("archivo") else Bitacora
+    consulta = modelo.query
     # Primero filtrar por columnas propias
     if "estatus" in request.form:
-        consulta = consulta.filter(Bitacora.estatus == request.form["estatus"])
+        consulta = consulta.filter(modelo.estatus == request.form["estatus"])
     else:
-        consulta = consulta.filter(Bitacora.estatus == "A")
+        consulta = consulta.filter(modelo.estatus == "A")
     if "modulo_id" in request.form:
         try:
             modulo_id = int(request.form["modulo_id"])
-            consulta = consulta.filter(Bitacora.modulo_id == modulo_id)
+            consulta = consulta.filter(modelo.modulo_id == modulo_id)
         except ValueError:
             pass
     if "usuario_id" in request.form:
         try:
             usuario_id = int(request.form["usuario_id"])
-            consulta = consulta.filter(Bitacora.usuario_id == usuario_id)
+            consulta = consulta.filter(modelo.usuario_id == usuario_id)
         except ValueError:
             pass
-    # Ordenar y paginar
-    registros = consulta.order_by(Bitacora.id.desc()).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [modelo.id.desc()], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -99,3 +100,14 @@ def list_active():
         filtros=json.dumps(filtros),
         titulo=titulo,
     )
+
+
+@bitacoras.route("/bitacoras/archivadas")
+def list_archived():
+    """Listado de Bitácoras archivadas"""
+    return render_template(
+        "bitacoras/list.jinja2",
+        filtros=json.dumps({"estatus": "A", "archivo": 1}),
+        titulo="Bitácoras archivadas",
+        archivo=True,
+    )
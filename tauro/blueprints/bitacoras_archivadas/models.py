@@ -0,0 +1,33 @@
+"""
+Bitácoras-Archivadas, modelos
+"""
+
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from lib.universal_mixin import UniversalMixin
+from tauro.extensions import database
+
+
+class BitacoraArchivada(database.Model, UniversalMixin):
+    """BitacoraArchivada, bitácora antigua que cli archivos archivar movió fuera de bitacoras"""
+
+    # Nombre de la tabla
+    __tablename__ = "bitacoras_archivadas"
+
+    # Clave primaria, conserva el ID que tenía en bitacoras
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+
+    # Claves foráneas, las relaciones sólo son de lectura
+    modulo_id: Mapped[int] = mapped_column(ForeignKey("modulos.id"), index=True)
+    modulo: Mapped["Modulo"] = relationship(viewonly=True)
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), index=True)
+    usuario: Mapped["Usuario"] = relationship(viewonly=True)
+
+    # Columnas
+    descripcion: Mapped[str] = mapped_column(String(256))
+    url: Mapped[str] = mapped_column(String(512))
+
+    def __repr__(self):
+        """Representación"""
+        return f"<BitacoraArchivada {self.creado} {self.descripcion}>"
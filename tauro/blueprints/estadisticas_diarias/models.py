@@ -0,0 +1,130 @@
+"""
+Estadisticas-Diarias, modelos
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, Float, ForeignKey, UniqueConstraint, cast, delete, extract, func, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.functions import now
+
+from lib import catalogos
+from lib.universal_mixin import UniversalMixin
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_archivados.models import TurnoArchivado
+from tauro.extensions import database
+
+GRUPO = ("fecha", "unidad_id", "turno_tipo_id", "ubicacion_id")
+METRICAS = (
+    "cantidad",
+    "espera_promedio",
+    "espera_p50",
+    "espera_p90",
+    "espera_maximo",
+    "atencion_promedio",
+    "atencion_p50",
+    "atencion_p90",
+    "atencion_maximo",
+)
+
+
+class EstadisticaDiaria(database.Model, UniversalMixin):
+    """EstadisticaDiaria, tiempos de los turnos completados de un día por unidad, tipo de turno y ubicación"""
+
+    # Nombre de la tabla
+    __tablename__ = "estadisticas_diarias"
+    __table_args__ = (UniqueConstraint(*GRUPO, name="estadisticas_diarias_grupo_key"),)
+
+    # Clave primaria
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Clave foránea
+    turno_tipo_id: Mapped[int] = mapped_column(ForeignKey("turnos_tipos.id"))
+    ubicacion_id: Mapped[int] = mapped_column(ForeignKey("ubicaciones.id"))
+
+    # Columnas del grupo
+    fecha: Mapped[date] = mapped_column(Date)
+    unidad_id: Mapped[int]
+
+    # Columnas, la espera va de la creación al inicio y la atención del inicio al término, en segundos
+    cantidad: Mapped[int] = mapped_column(default=0)
+    espera_promedio: Mapped[Optional[float]]
+    espera_p50: Mapped[Optional[float]]
+    espera_p90: Mapped[Optional[float]]
+    espera_maximo: Mapped[Optional[float]]
+    atencion_promedio: Mapped[Optional[float]]
+    atencion_p50: Mapped[Optional[float]]
+    atencion_p90: Mapped[Optional[float]]
+    atencion_maximo: Mapped[Optional[float]]
+
+    @staticmethod
+    def grupo(turno) -> tuple:
+        """Entregar el grupo (fecha, unidad_id, turno_tipo_id, ubicacion_id) al que pertenece el turno"""
+        return turno.creado.date(), turno.unidad_id or 0, turno.turno_tipo_id, turno.ubicacion_id
+
+    @staticmethod
+    def _completados(desde: date, hasta: date, condiciones: dict):
+        """Turnos completados entre las fechas, de turnos y de turnos_archivados, con sus tiempos en segundos"""
+        completado = catalogos.turnos_estados.por_nombre("COMPLETADO")
+        partes = []
+        for tabla in (Turno.__table__, TurnoArchivado.__table__):
+            espera = func.coalesce(tabla.c.inicio, tabla.c.termino) - tabla.c.creado
+            atencion = tabla.c.termino - tabla.c.inicio
+            partes.append(
+                select(
+                    cast(tabla.c.creado, Date).label("fecha"),
+                    func.coalesce(tabla.c.unidad_id, 0).label("unidad_id"),
+                    tabla.c.turno_tipo_id,
+                    tabla.c.ubicacion_id,
+                    cast(extract("epoch", espera), Float).label("espera"),
+                    cast(extract("epoch", atencion), Float).label("atencion"),
+                ).where(
+                    tabla.c.turno_estado_id == completado.id,
+                    tabla.c.creado >= desde,
+                    tabla.c.creado < hasta + timedelta(days=1),
+                    *[tabla.c[columna] == valor for columna, valor in condiciones.items()],
+                )
+            )
+        return union_all(*partes).subquery("completados")
+
+    @classmethod
+    def agregar(cls, desde: date, hasta: date, **condiciones):
+        """Sentencia INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE que calcula los grupos de las fechas"""
+        completados = cls._completados(desde, hasta, condiciones)
+        metricas = [func.count()]
+        for tiempo in (completados.c.espera, completados.c.atencion):
+            metricas += [
+                func.avg(tiempo),
+                func.percentile_cont(0.5).within_group(tiempo),
+                func.percentile_cont(0.9).within_group(tiempo),
+                func.max(tiempo),
+            ]
+        grupo = [completados.c[columna] for columna in GRUPO]
+        insercion = insert(cls).from_select([*GRUPO, *METRICAS], select(*grupo, *metricas).group_by(*grupo))
+        return insercion.on_conflict_do_update(
+            constraint="estadisticas_diarias_grupo_key",
+            set_={**{metrica: insercion.excluded[metrica] for metrica in METRICAS}, "modificado": now()},
+        )
+
+    @classmethod
+    def recalcular(cls, *grupos: tuple):
+        """
+        Volver a calcular los grupos en la sesión del turno que cambió, se confirma en su mismo commit
+
+        Sólo se leen los turnos completados del grupo con los índices por estado y fecha,
+        no la tabla completa. El candado de cada grupo dura hasta el commit, así dos ventanillas
+        que completan turnos del mismo grupo se forman y la segunda ya cuenta el turno de la primera.
+        """
+        database.session.flush()
+        for fecha, unidad_id, turno_tipo_id, ubicacion_id in sorted(set(grupos)):
+            condiciones = {"unidad_id": unidad_id, "turno_tipo_id": turno_tipo_id, "ubicacion_id": ubicacion_id}
+            llave = f"{cls.__tablename__} {fecha} {unidad_id} {turno_tipo_id} {ubicacion_id}"
+            database.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(llave))))
+            database.session.execute(delete(cls).filter_by(fecha=fecha, **condiciones))
+            database.session.execute(cls.agregar(fecha, fecha, **condiciones))
+
+    def __repr__(self):
+        """Representación"""
+        return f"<EstadisticaDiaria {self.fecha} {self.unidad_id} {self.turno_tipo_id} {self.ubicacion_id}>"
@@ -0,0 +1,100 @@
+"""
+Estadisticas-Diarias, vistas
+"""
+
+import json
+
+from flask import Blueprint, render_template, request
+from flask_login import login_required
+
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
+
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
+from tauro.blueprints.permisos.models import Permiso
+from tauro.blueprints.turnos_tipos.models import TurnoTipo
+from tauro.blueprints.ubicaciones.models import Ubicacion
+from tauro.blueprints.unidades.models import Unidad
+from tauro.blueprints.usuarios.decorators import permission_required
+
+MODULO = "TURNOS"  # Son los tiempos de los turnos, se ven con el permiso de su módulo
+
+estadisticas_diarias = Blueprint("estadisticas_diarias", __name__, template_folder="templates")
+
+
+def minutos_segundos(segundos: float | None) -> str:
+    """Convertir segundos a MM:SS, vacío si no hay"""
+    if segundos is None:
+        return ""
+    minutos, segundos = divmod(round(segundos), 60)
+    return f"{minutos:02d}:{segundos:02d}"
+
+
+@estadisticas_diarias.before_request
+@login_required
+@permission_required(MODULO, Permiso.VER)
+def before_request():
+    """Permiso por defecto"""
+
+
+@estadisticas_diarias.route("/estadisticas_diarias/datatable_json", methods=["GET", "POST"])
+def datatable_json():
+    """DataTable JSON para listado de Estadísticas Diarias, sólo lee la tabla de agregados"""
+    # Tomar parámetros de Datatables
+    draw, start, rows_per_page = get_datatable_parameters()
+    # Consultar
+    consulta = EstadisticaDiaria.query
+    if "estatus" in request.form:
+        consulta = consulta.filter(EstadisticaDiaria.estatus == request.form["estatus"])
+    else:
+        consulta = consulta.filter(EstadisticaDiaria.estatus == "A")
+    if "fecha_desde" in request.form and request.form["fecha_desde"]:
+        consulta = consulta.filter(EstadisticaDiaria.fecha >= request.form["fecha_desde"])
+    if "fecha_hasta" in request.form and request.form["fecha_hasta"]:
+        consulta = consulta.filter(EstadisticaDiaria.fecha <= request.form["fecha_hasta"])
+    if "unidad_id" in request.form and request.form["unidad_id"]:
+        consulta = consulta.filter(EstadisticaDiaria.unidad_id == request.form["unidad_id"])
+    if "turno_tipo_id" in request.form and request.form["turno_tipo_id"]:
+        consulta = consulta.filter(EstadisticaDiaria.turno_tipo_id == request.form["turno_tipo_id"])
+    if "ubicacion_id" in request.form and request.form["ubicacion_id"]:
+        consulta = consulta.filter(EstadisticaDiaria.ubicacion_id == request.form["ubicacion_id"])
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [EstadisticaDiaria.fecha.desc()], start, rows_per_page)
+    # Elaborar datos para DataTable, los nombres salen de los catálogos en memoria
+    data = []
+    for resultado in registros:
+        unidad = catalogos.unidades.por_id(resultado.unidad_id)
+        turno_tipo = catalogos.turnos_tipos.por_id(resultado.turno_tipo_id)
+        ubicacion = catalogos.ubicaciones.por_id(resultado.ubicacion_id)
+        data.append(
+            {
+                "fecha": resultado.fecha.isoformat(),
+                "unidad": unidad.clave if unidad else "",
+                "tipo": turno_tipo.nombre if turno_tipo else "",
+                "ubicacion": ubicacion.nombre if ubicacion else "",
+                "cantidad": resultado.cantidad,
+                "espera_promedio": minutos_segundos(resultado.espera_promedio),
+                "espera_p50": minutos_segundos(resultado.espera_p50),
+                "espera_p90": minutos_segundos(resultado.espera_p90),
+                "espera_maximo": minutos_segundos(resultado.espera_maximo),
+                "atencion_promedio": minutos_segundos(resultado.atencion_promedio),
+                "atencion_p50": minutos_segundos(resultado.atencion_p50),
+                "atencion_p90": minutos_segundos(resultado.atencion_p90),
+                "atencion_maximo": minutos_segundos(resultado.atencion_maximo),
+            }
+        )
+    # Entregar JSON
+    return output_datatable_json(draw, total, data)
+
+
+@estadisticas_diarias.route("/estadisticas_diarias")
+def list_active():
+    """Listado de Estadísticas Diarias"""
+    return render_template(
+        "estadisticas_diarias/list.jinja2",
+        filtros=json.dumps({"estatus": "A"}),
+        titulo="Estadísticas Diarias",
+        turnos_tipos=TurnoTipo.query.filter_by(estatus="A").filter_by(es_activo=True).order_by(TurnoTipo.nombre).all(),
+        unidades=Unidad.query.filter_by(estatus="A").filter_by(es_activo=True).all(),
+        ubicaciones=Ubicacion.query.filter_by(estatus="A").filter_by(es_activo=True).all(),
+    )
@@ -7,7 +7,8 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_message, safe_string
 from tauro.blueprints.bitacoras.models import Bitacora
 
@@ -44,9 +45,8 @@ def datatable_json():
         nombre = safe_string(request.form["nombre"], save_enie=True)
         if nombre != "":
             consulta = consulta.filter(Modulo.nombre.contains(nombre))
-    # Ordenar y paginar
-    registros = consulta.order_by(Modulo.nombre).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [Modulo.nombre], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -114,6 +114,7 @@ def new():
             en_navegacion=form.en_navegacion.data,
         )
         modulo.save()
+        catalogos.modulos.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -149,6 +150,7 @@ def edit(modulo_id):
             modulo.ruta = form.ruta.data
             modulo.en_navegacion = form.en_navegacion.data
             modulo.save()
+            catalogos.modulos.invalidar()
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -174,6 +176,7 @@ def delete(modulo_id):
     if este_modulo.estatus == "A":
         # Dar de baja el modulo
         este_modulo.delete()
+        catalogos.modulos.invalidar()
         # Dar de baja los permisos asociados
         for permiso in este_modulo.permisos:
             permiso.delete()
@@ -197,6 +200,7 @@ def recover(modulo_id):
     if este_modulo.estatus == "B":
         # Dar de alta el modulo
         este_modulo.recover()
+        catalogos.modulos.invalidar()
         # Dar de alta los permisos asociados
         for permiso in este_modulo.permisos:
             permiso.recover()
@@ -7,7 +7,7 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_message, safe_string
 from tauro.blueprints.bitacoras.models import Bitacora
 from tauro.blueprints.modulos.models import Modulo
@@ -61,9 +61,8 @@ def datatable_json():
         nivel = safe_string(request.form["nivel"], save_enie=True)
         if nivel != "":
             consulta = consulta.filter(Permiso.nivel == nivel)
-    # Ordenar y paginar
-    registros = consulta.order_by(Permiso.nombre).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [Permiso.nombre], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
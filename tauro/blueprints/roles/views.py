@@ -7,7 +7,7 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_message, safe_string
 from tauro.blueprints.bitacoras.models import Bitacora
 from tauro.blueprints.modulos.models import Modulo
@@ -45,9 +45,8 @@ def datatable_json():
         nombre = safe_string(request.form["nombre"], save_enie=True)
         if nombre != "":
             consulta = consulta.filter(Rol.nombre.contains(nombre))
-    # Ordenar y paginar
-    registros = consulta.order_by(Rol.nombre).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [Rol.nombre], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
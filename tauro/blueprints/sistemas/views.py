@@ -5,6 +5,8 @@ Sistemas
 from flask import Blueprint, redirect, render_template, send_from_directory, url_for, flash
 from flask_login import current_user
 
+from lib.instantaneas import instantaneas
+
 from tauro.extensions import socketio
 from tauro.blueprints.api_v1.schemas import ResponseSchema
 
@@ -34,6 +36,9 @@ def refresh_screens():
         data={"signal": True},
     ).model_dump()
 
+    # Descartar las instantáneas para que las pantallas reciban los turnos recién consultados
+    instantaneas.invalidar()
+
     # Enviar mensaje vía socketio a todos los clientes conectados
     socketio.emit("refresh_screens", response_refresh)
 
@@ -0,0 +1,85 @@
+"""
+Tokens-Renovacion, modelos
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import ForeignKey, String, update
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lib.universal_mixin import UniversalMixin
+from tauro.extensions import database
+
+
+class TokenRenovacion(database.Model, UniversalMixin):
+    """
+    TokenRenovacion, token de renovación de la API OAuth2
+
+    El token sólo se entrega al cliente, aquí se guarda su SHA-256. Cada renovación marca el token
+    como usado y emite otro de la misma familia; si un token usado se presenta de nuevo alguien lo copió,
+    entonces se revoca la familia completa. Los revocados forman la lista de revocación.
+    """
+
+    # Nombre de la tabla
+    __tablename__ = "tokens_renovacion"
+
+    # Clave primaria
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Clave foránea
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), index=True)
+
+    # Columnas
+    familia: Mapped[str] = mapped_column(String(32), index=True)
+    huella: Mapped[str] = mapped_column(String(64), unique=True)
+    expiracion: Mapped[datetime]
+    es_usado: Mapped[bool] = mapped_column(default=False)
+    es_revocado: Mapped[bool] = mapped_column(default=False)
+
+    @staticmethod
+    def huella_de(token: str) -> str:
+        """SHA-256 del token"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def emitir(cls, usuario_id: int, familia: str = None) -> str:
+        """Agregar a la sesión un token nuevo, sin familia empieza una, y entregar el token"""
+        token = secrets.token_urlsafe(32)
+        database.session.add(
+            cls(
+                usuario_id=usuario_id,
+                familia=familia or secrets.token_hex(16),
+                huella=cls.huella_de(token),
+                expiracion=datetime.now() + timedelta(seconds=current_app.config["TOKEN_OAUTH2_RENOVACION_EXPIRES_IN_SEG"]),
+            )
+        )
+        return token
+
+    @classmethod
+    def consultar_para_rotar(cls, token: str):
+        """Consultar el token y bloquearlo hasta el commit, así dos renovaciones simultáneas no lo usan dos veces"""
+        return cls.query.filter_by(huella=cls.huella_de(token)).with_for_update().first()
+
+    @classmethod
+    def revocar_familia(cls, familia: str):
+        """Revocar todos los tokens de la familia, sin commit"""
+        database.session.execute(update(cls).where(cls.familia == familia).values(es_revocado=True))
+
+    @classmethod
+    def revocar_usuario(cls, usuario_id: int):
+        """Revocar todos los tokens vigentes del usuario, sin commit"""
+        database.session.execute(
+            update(cls).where(cls.usuario_id == usuario_id).where(cls.es_revocado.is_(False)).values(es_revocado=True)
+        )
+
+    @property
+    def es_vigente(self) -> bool:
+        """¿No está usado, revocado ni expirado?"""
+        return not self.es_usado and not self.es_revocado and self.expiracion > datetime.now()
+
+    def __repr__(self):
+        """Representación"""
+        return f"<TokenRenovacion {self.id}>"
@@ -48,3 +48,23 @@ class TurnoForm(FlaskForm):
             (e.id, e.nombre)
             for e in TurnoEstado.query.filter_by(estatus="A").filter_by(es_activo=True).order_by(TurnoEstado.nombre).all()
         ]
+
+
+class TurnoNewForm(FlaskForm):
+    """Formulario nuevo Turno, el número se reserva al guardar"""
+
+    turnos_tipo = SelectField("Tipo", coerce=int, validators=[DataRequired()])
+    unidad = SelectField("Unidad", coerce=int, validators=[DataRequired()])
+    comentarios = TextAreaField("Comentarios", validators=[Optional(), Length(max=512)])
+    guardar = SubmitField("Guardar")
+
+    def __init__(self, *args, **kwargs):
+        """Inicializar y cargar opciones en turnos_tipo y unidad"""
+        super().__init__(*args, **kwargs)
+        self.turnos_tipo.choices = [
+            (r.id, r.nombre)
+            for r in TurnoTipo.query.filter_by(estatus="A").filter_by(es_activo=True).order_by(TurnoTipo.nombre).all()
+        ]
+        self.unidad.choices = [
+            (r.id, r.clave + " - " + r.nombre) for r in Unidad.query.filter_by(estatus="A").order_by(Unidad.clave).all()
+        ]
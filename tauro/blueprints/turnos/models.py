@@ -5,7 +5,7 @@ Turnos, modelos
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.functions import now
 
@@ -19,6 +19,25 @@ class Turno(database.Model, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "turnos"
 
+    # Índices para las consultas de las filas de turnos, los parciales sólo guardan los activos
+    # - ConsultarTurnosUnidad y TomarTurno filtran por unidad y estado, y ordenan por número
+    # - ConsultarTurnos filtra por estado y ordena por número
+    # - ConsultarConfiguracionUsuario filtra por usuario y estado
+    # - cancelar_turnos_pasados filtra por estado y fecha de creación, sin importar el estatus
+    # En una base de datos existente se crean con cli db migrar
+    __table_args__ = (
+        Index(
+            "ix_turnos_unidad_estado_numero",
+            "unidad_id",
+            "turno_estado_id",
+            "numero",
+            postgresql_where=text("estatus = 'A'"),
+        ),
+        Index("ix_turnos_estado_numero", "turno_estado_id", "numero", postgresql_where=text("estatus = 'A'")),
+        Index("ix_turnos_usuario_estado", "usuario_id", "turno_estado_id", postgresql_where=text("estatus = 'A'")),
+        Index("ix_turnos_estado_creado", "turno_estado_id", "creado"),
+    )
+
     # Clave primaria
     id: Mapped[int] = mapped_column(primary_key=True)
 
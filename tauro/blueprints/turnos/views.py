@@ -3,19 +3,28 @@ Turnos, vistas
 """
 
 import json
-from datetime import datetime, date, time
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+import os
+from datetime import datetime
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
+from lib.esperas import esperas
+from lib.filas import filas
+from lib.instantaneas import instantaneas
+from lib.salas import enviar_turno
 from lib.safe_string import safe_string, safe_message, safe_telefono
 
 from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
 from tauro.blueprints.modulos.models import Modulo
 from tauro.blueprints.permisos.models import Permiso
 from tauro.blueprints.usuarios.decorators import permission_required
 from tauro.blueprints.turnos.models import Turno
-from tauro.blueprints.turnos.forms import TurnoForm
+from tauro.blueprints.turnos_archivados.models import TurnoArchivado
+from tauro.blueprints.turnos.forms import TurnoForm, TurnoNewForm
+from tauro.blueprints.turnos_numeros.models import TurnoNumero
 from tauro.blueprints.usuarios.models import Usuario
 from tauro.blueprints.ubicaciones.models import Ubicacion
 from tauro.blueprints.unidades.models import Unidad
@@ -23,7 +32,7 @@ from tauro.blueprints.unidades.models import Unidad
 from tauro.blueprints.turnos_tipos.models import TurnoTipo
 from tauro.blueprints.turnos_estados.models import TurnoEstado
 from tauro.blueprints.api_v1.schemas import OneTurnoOut, TurnoOut, TurnoEstadoOut, TurnoTipoOut, UbicacionOut, UnidadOut
-from tauro.extensions import socketio
+from tauro.extensions import database
 
 
 MODULO = "TURNOS"
@@ -43,40 +52,41 @@ def datatable_json():
     """DataTable JSON para listado de Turnos"""
     # Tomar parámetros de Datatables
     draw, start, rows_per_page = get_datatable_parameters()
-    # Consultar
-    consulta = Turno.query
+    # Consultar, en el archivo si lo piden
+    modelo = TurnoArchivado if request.form.get("archivo") else Turno
+    detalle = "turnos.detail_archived" if modelo is TurnoArchivado else "turnos.detail"
+    consulta = modelo.query
     # Primero filtrar por columnas propias
     if "estatus" in request.form:
-        consulta = consulta.filter(Turno.estatus == request.form["estatus"])
+        consulta = consulta.filter(modelo.estatus == request.form["estatus"])
     else:
-        consulta = consulta.filter(Turno.estatus == "A")
+        consulta = consulta.filter(modelo.estatus == "A")
     if "turno_id" in request.form:
         turno_id = safe_string(request.form["turno_id"])
         if turno_id.isnumeric():
-            consulta = consulta.filter(Turno.id == turno_id)
+            consulta = consulta.filter(modelo.id == turno_id)
     if "fecha_inicio" in request.form:
         fecha_inicio = request.form["fecha_inicio"]
         if fecha_inicio:
-            consulta = consulta.filter(Turno.creado >= fecha_inicio)
+            consulta = consulta.filter(modelo.creado >= fecha_inicio)
     if "fecha_termino" in request.form:
         fecha_termino = request.form["fecha_termino"]
         if fecha_termino:
-            consulta = consulta.filter(Turno.creado <= fecha_termino)
+            consulta = consulta.filter(modelo.creado <= fecha_termino)
     if "unidad_id" in request.form:
-        consulta = consulta.filter(Turno.unidad_id == request.form["unidad_id"])
+        consulta = consulta.filter(modelo.unidad_id == request.form["unidad_id"])
     if "ubicacion_id" in request.form:
-        consulta = consulta.filter(Turno.ubicacion_id == request.form["ubicacion_id"])
+        consulta = consulta.filter(modelo.ubicacion_id == request.form["ubicacion_id"])
     if "turno_tipo_id" in request.form:
-        consulta = consulta.filter(Turno.turno_tipo_id == request.form["turno_tipo_id"])
+        consulta = consulta.filter(modelo.turno_tipo_id == request.form["turno_tipo_id"])
     if "turno_estado_id" in request.form:
-        consulta = consulta.filter(Turno.turno_estado_id == request.form["turno_estado_id"])
+        consulta = consulta.filter(modelo.turno_estado_id == request.form["turno_estado_id"])
     # Luego filtrar por columnas de otras tablas
     # if "turno_tipo_id" in request.form:
     #     consulta = consulta.join(TurnoTipo)
     #     consulta = consulta.filter(TurnoTipo.rfc.contains(safe_rfc(request.form["persona_rfc"], search_fragment=True)))
-    # Ordenar y paginar
-    registros = consulta.order_by(Turno.id.desc()).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [modelo.id.desc()], start, rows_per_page)
     # Consultar Unidades
     unidades_sql = Unidad.query.all()
     unidades = {unidad.id: unidad for unidad in unidades_sql}
@@ -88,7 +98,7 @@ def datatable_json():
             {
                 "detalle": {
                     "numero": resultado.id,
-                    "url": url_for("turnos.detail", turno_id=resultado.id),
+                    "url": url_for(detalle, turno_id=resultado.id),
                 },
                 "numero": f"{resultado.numero}".zfill(3),
                 "fecha_hora": resultado.creado.strftime("%Y-%m-%d %H:%M"),
@@ -143,10 +153,42 @@ def list_inactive():
     )
 
 
+@turnos.route("/turnos/archivados")
+def list_archived():
+    """Listado de Turnos archivados"""
+    return render_template(
+        "turnos/list.jinja2",
+        filtros=json.dumps({"estatus": "A", "archivo": 1}),
+        turnos_tipos=TurnoTipo.query.filter_by(estatus="A").filter_by(es_activo=True).order_by(TurnoTipo.nombre).all(),
+        turnos_estados=TurnoEstado.query.filter_by(estatus="A").filter_by(es_activo=True).order_by(TurnoEstado.nombre).all(),
+        unidades=Unidad.query.filter_by(estatus="A").filter_by(es_activo=True).all(),
+        ubicaciones=Ubicacion.query.filter_by(estatus="A").filter_by(es_activo=True).all(),
+        titulo="Turnos archivados",
+        estatus="A",
+        archivo=True,
+    )
+
+
+@turnos.route("/turnos/archivados/<int:turno_id>")
+def detail_archived(turno_id):
+    """Detalle de un Turno archivado"""
+    turno = TurnoArchivado.query.get_or_404(turno_id)
+    # Consultar Unidades
+    unidades_sql = Unidad.query.all()
+    unidades = {unidad.id: unidad for unidad in unidades_sql}
+    # Entregar resultado
+    return render_template("turnos/detail.jinja2", turno=turno, unidades=unidades, archivo=True)
+
+
 @turnos.route("/turnos/<int:turno_id>")
 def detail(turno_id):
     """Detalle de un Turno"""
-    turno = Turno.query.get_or_404(turno_id)
+    turno = database.session.get(Turno, turno_id)
+    if turno is None:
+        # Las bitácoras conservan este URL aunque cli archivos archivar haya movido el turno
+        if database.session.get(TurnoArchivado, turno_id) is not None:
+            return redirect(url_for("turnos.detail_archived", turno_id=turno_id))
+        abort(404)
     # Consultar Unidades
     unidades_sql = Unidad.query.all()
     unidades = {unidad.id: unidad for unidad in unidades_sql}
@@ -154,45 +196,71 @@ def detail(turno_id):
     return render_template("turnos/detail.jinja2", turno=turno, unidades=unidades)
 
 
+@turnos.route("/turnos/verificar_filas")
+@permission_required(MODULO, Permiso.ADMINISTRAR)
+def verificar_filas():
+    """Comparar las filas de despacho en memoria de este worker contra la base de datos, vea lib/filas.py"""
+    turno_estado = catalogos.turnos_estados.por_nombre("EN ESPERA")
+    if turno_estado is None:
+        return {"success": False, "message": "No se encontró el estado EN ESPERA"}
+    diferencias = {}
+    for unidad_id, lista in filas.verificar_cargadas(turno_estado.id).items():
+        unidad = catalogos.unidades.por_id(unidad_id)
+        diferencias[unidad.clave if unidad else str(unidad_id)] = lista
+    # Cada worker de Gunicorn tiene sus propias filas, se informa cuál atendió la petición
+    return {
+        "success": True,
+        "message": f"{len(diferencias)} unidades con diferencias en el worker {os.getpid()}",
+        "pid": os.getpid(),
+        "diferencias": diferencias,
+    }
+
+
 @turnos.route("/turnos/nuevo", methods=["GET", "POST"])
 @permission_required(MODULO, Permiso.CREAR)
 def new():
     """Nuevo Turno"""
-    form = TurnoForm()
+    form = TurnoNewForm()
     if form.validate_on_submit():
         # Validar que existan valores NO DEFINIDO
         usuario_no_definido = Usuario.query.filter_by(nombres="NO DEFINIDO").first()
         if usuario_no_definido is None:
             flash("ADVERTENCIA: Se necesita definir un usuario con nombre NO DEFINIDO", "warning")
             return render_template("turnos/new.jinja2", form=form)
-        ubicacion_no_definido = Ubicacion.query.filter_by(clave="ND").first()
+        ubicacion_no_definido = catalogos.ubicaciones.por_nombre("NO DEFINIDO")
         if ubicacion_no_definido is None:
-            flash("ADVERTENCIA: Se necesita definir una ubicacion con clave ND", "warning")
+            flash("ADVERTENCIA: Se necesita definir una ubicacion con nombre NO DEFINIDO", "warning")
+            return render_template("turnos/new.jinja2", form=form)
+        turno_estado = catalogos.turnos_estados.por_nombre("EN ESPERA")
+        if turno_estado is None:
+            flash("ADVERTENCIA: Se necesita definir un estado de turno EN ESPERA", "warning")
             return render_template("turnos/new.jinja2", form=form)
-        # Calcular el siguiente número - se reinicia la cuenta por día.
-        fecha_hoy_inicio = datetime.combine(date.today(), time(0, 0, 0))
-        turno_ultimo = Turno.query.filter(Turno.creado >= fecha_hoy_inicio).order_by(Turno.id.desc()).first()
-        numero_turno = 0
-        if turno_ultimo:
-            numero_turno = turno_ultimo.numero
+        # Reservar el siguiente número - se reinicia la cuenta por día, se confirma junto con el turno
+        numero_turno = TurnoNumero.reservar(form.unidad.data)
         # Crear registro
         turno = Turno(
             usuario=usuario_no_definido,
-            ubicacion=ubicacion_no_definido,
-            numero=numero_turno + 1,
-            turno_tipo=form.turno_tipo.data,
+            ubicacion_id=ubicacion_no_definido.id,
+            numero=numero_turno,
+            unidad_id=form.unidad.data,
+            turno_tipo_id=form.turnos_tipo.data,
+            turno_estado_id=turno_estado.id,
+            numero_cubiculo=0,
             inicio=datetime.now(),
-            estado="EN_ESPERA",
             comentarios=safe_string(form.comentarios.data),
         )
-        turno.save()
+        database.session.add(turno)
+        database.session.flush()  # Para tener el ID del turno en la bitácora
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
             descripcion=safe_message(f"Nuevo Turno {turno.id}"),
             url=url_for("turnos.detail", turno_id=turno.id),
         )
+        # Guardar el turno, su número y la bitácora en un solo commit
         bitacora.save()
+        instantaneas.invalidar(turno.unidad_id)
+        filas.invalidar(turno.unidad_id)
         _send_turno_change_socketio(turno.id)
         flash(bitacora.descripcion, "success")
         return redirect(bitacora.url)
@@ -218,6 +286,9 @@ def edit(turno_id):
 
         # Actualizar registro
         if es_valido:
+            unidad_id_anterior = turno.unidad_id
+            turno_estado_id_anterior = turno.turno_estado_id
+            grupo_anterior = EstadisticaDiaria.grupo(turno)
             turno.usuario_id = form.usuario.data
             turno.numero = form.numero.data
             turno.turno_tipo_id = form.turnos_tipo.data
@@ -227,7 +298,16 @@ def edit(turno_id):
             turno.telefono = telefono
             turno.turno_estado_id = form.turnos_estado.data
             turno.comentarios = safe_string(form.comentarios.data)
+            # Si estaba o queda completado, se vuelven a calcular las estadísticas de su grupo anterior y del nuevo
+            completado = catalogos.turnos_estados.por_nombre("COMPLETADO")
+            if completado is not None and completado.id in (turno_estado_id_anterior, turno.turno_estado_id):
+                EstadisticaDiaria.recalcular(grupo_anterior, EstadisticaDiaria.grupo(turno))
             turno.save()
+            instantaneas.invalidar(unidad_id_anterior)
+            instantaneas.invalidar(turno.unidad_id)
+            esperas.invalidar()
+            filas.invalidar(unidad_id_anterior)
+            filas.invalidar(turno.unidad_id)
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -235,7 +315,7 @@ def edit(turno_id):
                 url=url_for("turnos.detail", turno_id=turno.id),
             )
             bitacora.save()
-            _send_turno_change_socketio(turno.id)
+            _send_turno_change_socketio(turno.id, unidad_id_anterior)
             flash(bitacora.descripcion, "success")
             return redirect(bitacora.url)
     form.usuario.data = turno.usuario.id
@@ -257,6 +337,7 @@ def reset_cubiculo(turno_id):
     turno = Turno.query.get_or_404(turno_id)
     turno.numero_cubiculo = 0
     turno.save()
+    instantaneas.invalidar(turno.unidad_id)
     bitacora = Bitacora(
         modulo=Modulo.query.filter_by(nombre=MODULO).first(),
         usuario=current_user,
@@ -276,6 +357,8 @@ def delete(turno_id):
     turno = Turno.query.get_or_404(turno_id)
     if turno.estatus == "A":
         turno.delete()
+        instantaneas.invalidar(turno.unidad_id)
+        filas.invalidar(turno.unidad_id)
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -295,6 +378,8 @@ def recover(turno_id):
     turno = Turno.query.get_or_404(turno_id)
     if turno.estatus == "B":
         turno.recover()
+        instantaneas.invalidar(turno.unidad_id)
+        filas.invalidar(turno.unidad_id)
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -307,8 +392,8 @@ def recover(turno_id):
     return redirect(url_for("turnos.detail", turno_id=turno.id))
 
 
-def _send_turno_change_socketio(turno_id):
-    "Envía por socketio la actualización del turno"
+def _send_turno_change_socketio(turno_id, unidad_id_anterior=None):
+    "Envía por socketio la actualización del turno a la sala de su unidad y a la anterior si cambió"
 
     # Consultar el turno
     turno = Turno.query.get(turno_id)
@@ -360,4 +445,4 @@ def _send_turno_change_socketio(turno_id):
     ).model_dump()
 
     # Enviar mensaje vía socketio
-    socketio.send(one_turno_out)
+    enviar_turno(one_turno_out, unidad_id_anterior, turno.unidad_id)
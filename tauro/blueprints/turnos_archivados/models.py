@@ -0,0 +1,51 @@
+"""
+Turnos-Archivados, modelos
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from lib.universal_mixin import UniversalMixin
+from tauro.extensions import database
+
+
+class TurnoArchivado(database.Model, UniversalMixin):
+    """TurnoArchivado, turno de un día cerrado que cli archivos archivar movió fuera de turnos"""
+
+    # Nombre de la tabla
+    __tablename__ = "turnos_archivados"
+
+    # Índices para buscar en el archivo desde la administración
+    __table_args__ = (
+        Index("ix_turnos_archivados_creado", "creado"),
+        Index("ix_turnos_archivados_unidad_creado", "unidad_id", "creado"),
+    )
+
+    # Clave primaria, conserva el ID que tenía en turnos
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+
+    # Clave foránea, las relaciones sólo son de lectura
+    usuario_id: Mapped[int] = mapped_column(ForeignKey("usuarios.id"))
+    usuario: Mapped["Usuario"] = relationship(viewonly=True)
+    turno_estado_id: Mapped[int] = mapped_column(ForeignKey("turnos_estados.id"))
+    turno_estado: Mapped["TurnoEstado"] = relationship(viewonly=True)
+    turno_tipo_id: Mapped[int] = mapped_column(ForeignKey("turnos_tipos.id"))
+    turno_tipo: Mapped["TurnoTipo"] = relationship(viewonly=True)
+    ubicacion_id: Mapped[int] = mapped_column(ForeignKey("ubicaciones.id"))
+    ubicacion: Mapped["Ubicacion"] = relationship(viewonly=True)
+
+    # Columnas
+    numero: Mapped[int]
+    inicio: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    termino: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    unidad_id: Mapped[Optional[int]]
+    numero_cubiculo: Mapped[Optional[int]]
+    telefono: Mapped[Optional[str]] = mapped_column(String(20))
+    comentarios: Mapped[Optional[str]] = mapped_column(String(512))
+
+    def __repr__(self):
+        """Representación"""
+        return f"<TurnoArchivado {self.id}>"
@@ -6,7 +6,8 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_string, safe_message
 
 from tauro.blueprints.bitacoras.models import Bitacora
@@ -49,9 +50,8 @@ def datatable_json():
     # if "persona_rfc" in request.form:
     #     consulta = consulta.join(Persona)
     #     consulta = consulta.filter(Persona.rfc.contains(safe_rfc(request.form["persona_rfc"], search_fragment=True)))
-    # Ordenar y paginar
-    registros = consulta.order_by(TurnoEstado.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [TurnoEstado.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -109,6 +109,7 @@ def new():
             es_activo=form.es_activo.data,
         )
         turno_estado.save()
+        catalogos.turnos_estados.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -131,6 +132,7 @@ def edit(turno_estado_id):
         turno_estado.nombre = safe_string(form.nombre.data)
         turno_estado.es_activo = form.es_activo.data
         turno_estado.save()
+        catalogos.turnos_estados.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -153,6 +155,7 @@ def delete(turno_estado_id):
     turno_estado = TurnoEstado.query.get_or_404(turno_estado_id)
     if turno_estado.estatus == "A":
         turno_estado.delete()
+        catalogos.turnos_estados.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -171,6 +174,7 @@ def recover(turno_estado_id):
     turno_estado = TurnoEstado.query.get_or_404(turno_estado_id)
     if turno_estado.estatus == "B":
         turno_estado.recover()
+        catalogos.turnos_estados.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -0,0 +1,28 @@
+"""
+Turnos-Idempotencias, modelos
+"""
+
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lib.universal_mixin import UniversalMixin
+from tauro.extensions import database
+
+
+class TurnoIdempotencia(database.Model, UniversalMixin):
+    """TurnoIdempotencia, turno creado con un Idempotency-Key, vea lib/idempotencias.py"""
+
+    # Nombre de la tabla
+    __tablename__ = "turnos_idempotencias"
+
+    # Clave primaria
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Columnas, la llave es única para que dos intentos con la misma no creen dos turnos
+    # El turno no es clave foránea porque cli archivos archivar lo mueve a turnos_archivados
+    llave: Mapped[str] = mapped_column(String(64), unique=True)
+    turno_id: Mapped[int]
+
+    def __repr__(self):
+        """Representación"""
+        return f"<TurnoIdempotencia {self.turno_id}>"
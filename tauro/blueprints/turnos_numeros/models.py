@@ -0,0 +1,81 @@
+"""
+Turnos-Numeros, modelos
+"""
+
+from datetime import date, datetime
+
+from flask import current_app
+from pytz import timezone
+from sqlalchemy import Date, UniqueConstraint
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.functions import now
+
+from lib.universal_mixin import UniversalMixin
+from tauro.extensions import database
+
+UNIDAD_ID_GENERAL = 0  # Cuando la numeración es general, todos los turnos del día comparten el contador de la unidad cero
+
+
+class TurnoNumero(database.Model, UniversalMixin):
+    """TurnoNumero, contador diario de los números de turno"""
+
+    # Nombre de la tabla
+    __tablename__ = "turnos_numeros"
+    __table_args__ = (UniqueConstraint("fecha", "unidad_id", name="turnos_numeros_fecha_unidad_id_key"),)
+
+    # Clave primaria
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Columnas
+    fecha: Mapped[date] = mapped_column(Date)
+    unidad_id: Mapped[int]
+    ultimo_numero: Mapped[int] = mapped_column(default=0)
+
+    @classmethod
+    def fecha_hoy(cls) -> date:
+        """Fecha de hoy en el huso horario configurado"""
+        return datetime.now(tz=timezone(current_app.config["TZ"])).date()
+
+    @classmethod
+    def contador_unidad_id(cls, unidad_id: int) -> int:
+        """Entregar el ID de la unidad del contador, depende de si la numeración es por unidad o general"""
+        if current_app.config["TURNOS_NUMEROS_POR_UNIDAD"]:
+            return unidad_id
+        return UNIDAD_ID_GENERAL
+
+    @classmethod
+    def reservar(cls, unidad_id: int, cantidad: int = 1) -> int:
+        """
+        Reservar números de turno consecutivos y entregar el último de ellos
+
+        Se hace en una sola sentencia INSERT ... ON CONFLICT DO UPDATE ... RETURNING,
+        el renglón del contador del día queda bloqueado hasta el commit de la sesión,
+        así dos kioscos al mismo tiempo nunca reciben el mismo número, y si el turno
+        no se guarda, el rollback devuelve el número.
+        """
+        insercion = insert(cls).values(
+            fecha=cls.fecha_hoy(),
+            unidad_id=cls.contador_unidad_id(unidad_id),
+            ultimo_numero=cantidad,
+        )
+        sentencia = insercion.on_conflict_do_update(
+            constraint="turnos_numeros_fecha_unidad_id_key",
+            set_={"ultimo_numero": cls.ultimo_numero + cantidad, "modificado": now()},
+        ).returning(cls.ultimo_numero)
+        return database.session.execute(sentencia).scalar_one()
+
+    @classmethod
+    def siguiente(cls, unidad_id: int) -> int:
+        """Consultar cuál sería el siguiente número sin reservarlo"""
+        ultimo_numero = (
+            database.session.query(cls.ultimo_numero)
+            .filter_by(fecha=cls.fecha_hoy())
+            .filter_by(unidad_id=cls.contador_unidad_id(unidad_id))
+            .scalar()
+        )
+        return (ultimo_numero or 0) + 1
+
+    def __repr__(self):
+        """Representación"""
+        return f"<TurnoNumero {self.fecha} {self.unidad_id} {self.ultimo_numero}>"
@@ -6,7 +6,8 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_string, safe_message
 
 from tauro.blueprints.bitacoras.models import Bitacora
@@ -49,9 +50,8 @@ def datatable_json():
     # if "persona_rfc" in request.form:
     #     consulta = consulta.join(Persona)
     #     consulta = consulta.filter(Persona.rfc.contains(safe_rfc(request.form["persona_rfc"], search_fragment=True)))
-    # Ordenar y paginar
-    registros = consulta.order_by(TurnoTipo.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [TurnoTipo.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -124,6 +124,7 @@ def new():
                 es_activo=form.es_activo.data,
             )
             turno_tipo.save()
+            catalogos.turnos_tipos.invalidar()
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -162,6 +163,7 @@ def edit(turno_tipo_id):
             turno_tipo.nivel = nivel
             turno_tipo.es_activo = form.es_activo.data
             turno_tipo.save()
+            catalogos.turnos_tipos.invalidar()
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -184,6 +186,7 @@ def delete(turno_tipo_id):
     turno_tipo = TurnoTipo.query.get_or_404(turno_tipo_id)
     if turno_tipo.estatus == "A":
         turno_tipo.delete()
+        catalogos.turnos_tipos.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -202,6 +205,7 @@ def recover(turno_tipo_id):
     turno_tipo = TurnoTipo.query.get_or_404(turno_tipo_id)
     if turno_tipo.estatus == "B":
         turno_tipo.recover()
+        catalogos.turnos_tipos.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
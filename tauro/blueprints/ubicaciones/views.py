@@ -6,7 +6,8 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_string, safe_message, safe_clave
 
 from tauro.blueprints.bitacoras.models import Bitacora
@@ -50,9 +51,8 @@ def datatable_json():
     # if "persona_rfc" in request.form:
     #     consulta = consulta.join(Persona)
     #     consulta = consulta.filter(Persona.rfc.contains(safe_rfc(request.form["persona_rfc"], search_fragment=True)))
-    # Ordenar y paginar
-    registros = consulta.order_by(Ubicacion.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [Ubicacion.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -119,6 +119,7 @@ def new():
             es_activo=form.es_activo.data,
         )
         ubicacion.save()
+        catalogos.ubicaciones.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -142,6 +143,7 @@ def edit(ubicacion_id):
         ubicacion.numero = form.numero.data
         ubicacion.es_activo = form.es_activo.data
         ubicacion.save()
+        catalogos.ubicaciones.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -164,6 +166,7 @@ def delete(ubicacion_id):
     ubicacion = Ubicacion.query.get_or_404(ubicacion_id)
     if ubicacion.estatus == "A":
         ubicacion.delete()
+        catalogos.ubicaciones.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -182,6 +185,7 @@ def recover(ubicacion_id):
     ubicacion = Ubicacion.query.get_or_404(ubicacion_id)
     if ubicacion.estatus == "B":
         ubicacion.recover()
+        catalogos.ubicaciones.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -6,7 +6,8 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib import catalogos
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_string, safe_message, safe_clave
 
 from tauro.blueprints.bitacoras.models import Bitacora
@@ -51,9 +52,8 @@ def datatable_json():
         nombre = safe_string(request.form["nombre"], save_enie=True)
         if nombre != "":
             consulta = consulta.filter(Unidad.nombre.contains(nombre))
-    # Ordenar y paginar
-    registros = consulta.order_by(Unidad.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [Unidad.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -119,6 +119,7 @@ def new():
             es_activo=form.es_activo.data,
         )
         unidad.save()
+        catalogos.unidades.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -152,6 +153,7 @@ def edit(unidad_id):
             unidad.nombre = safe_string(form.nombre.data)
             unidad.es_activo = form.es_activo.data
             unidad.save()
+            catalogos.unidades.invalidar()
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -174,6 +176,7 @@ def delete(unidad_id):
     unidad = Unidad.query.get_or_404(unidad_id)
     if unidad.estatus == "A":
         unidad.delete()
+        catalogos.unidades.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -192,6 +195,7 @@ def recover(unidad_id):
     unidad = Unidad.query.get_or_404(unidad_id)
     if unidad.estatus == "B":
         unidad.recover()
+        catalogos.unidades.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
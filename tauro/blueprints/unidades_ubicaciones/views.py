@@ -6,7 +6,7 @@ import json
 from flask import Blueprint, render_template, request, url_for
 from flask_login import login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
 from lib.safe_string import safe_string
 
 from tauro.blueprints.permisos.models import Permiso
@@ -49,9 +49,8 @@ def datatable_json():
         if ubicacion_nombre:
             consulta = consulta.join(Ubicacion)
             consulta = consulta.filter(Ubicacion.nombre.contains(ubicacion_nombre))
-    # Ordenar y paginar
-    registros = consulta.order_by(UnidadUbicacion.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [UnidadUbicacion.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -10,10 +10,11 @@ from flask_login import UserMixin
 from sqlalchemy import Enum, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from lib.contrasenas import verificar
 from lib.universal_mixin import UniversalMixin
 from tauro.blueprints.permisos.models import Permiso
 from tauro.blueprints.usuarios_roles.models import UsuarioRol
-from tauro.extensions import database, pwd_context
+from tauro.extensions import database
 
 
 class Usuario(database.Model, UserMixin, UniversalMixin):
@@ -107,7 +108,12 @@ class Usuario(database.Model, UserMixin, UniversalMixin):
     def authenticated(self, with_password=True, password=""):
         """Ensure a user is authenticated, and optionally check their password."""
         if self.id and with_password:
-            return pwd_context.verify(password, self.contrasena)
+            # Se verifica en un grupo acotado de hilos, vea lib/contrasenas.py
+            es_valida, contrasena_nueva = verificar(password, self.contrasena)
+            if es_valida and contrasena_nueva:
+                self.contrasena = contrasena_nueva
+                self.save()
+            return es_valida
         return True
 
     def can(self, modulo_nombre: str, permission: int):
@@ -11,7 +11,10 @@ from flask_login import current_user, login_required, login_user, logout_user
 from pytz import timezone
 from lib.pwgen import generar_contrasena
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.contrasenas import ContrasenasOcupadas, intentos_acceso
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
+from lib.esperas import esperas
+from lib.principales import principales
 from lib.safe_next_url import safe_next_url
 from lib.safe_string import CONTRASENA_REGEXP, EMAIL_REGEXP, safe_email, safe_message, safe_string
 from tauro.extensions import pwd_context
@@ -19,6 +22,7 @@ from tauro.blueprints.bitacoras.models import Bitacora
 from tauro.blueprints.entradas_salidas.models import EntradaSalida
 from tauro.blueprints.modulos.models import Modulo
 from tauro.blueprints.permisos.models import Permiso
+from tauro.blueprints.tokens_renovacion.models import TokenRenovacion
 from tauro.blueprints.usuarios.decorators import anonymous_required, permission_required
 from tauro.blueprints.usuarios.forms import AccesoForm, UsuarioForm
 from tauro.blueprints.usuarios.models import Usuario
@@ -44,9 +48,18 @@ def login():
             flash("Correo electrónico no válido.", "warning")
         elif re.fullmatch(CONTRASENA_REGEXP, contrasena) is None:
             flash("Contraseña no válida.", "warning")
+        elif not intentos_acceso.permitir(identidad.lower()):
+            flash("Demasiados intentos de acceso, espere un minuto.", "warning")
         else:
             usuario = Usuario.find_by_identity(identidad)
-            if usuario and usuario.authenticated(password=contrasena):
+            try:
+                es_valida = usuario is not None and usuario.authenticated(password=contrasena)
+            except ContrasenasOcupadas:
+                flash("Hay demasiados accesos en este momento, intente de nuevo.", "warning")
+                es_valida = None
+            if es_valida is not False:
+                intentos_acceso.devolver(identidad.lower())  # Solo cuentan los intentos fallidos
+            if es_valida:
                 if login_user(usuario, remember=True) and usuario.is_active:
                     EntradaSalida(
                         usuario_id=usuario.id,
@@ -58,7 +71,7 @@ def login():
                     return redirect(url_for("sistemas.start"))
                 else:
                     flash("No está activa esa cuenta", "warning")
-            else:
+            elif es_valida is False:
                 flash("Usuario o contraseña incorrectos.", "warning")
     return render_template(
         "usuarios/login.jinja2",
@@ -120,9 +133,8 @@ def datatable_json():
         consulta = consulta.filter(Usuario.email.contains(safe_email(request.form["email"], search_fragment=True)))
     if "unidad_id" in request.form:
         consulta = consulta.filter(Usuario.unidad_id == request.form["unidad_id"])
-    # Ordenar y paginar
-    registros = consulta.order_by(Usuario.email).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [Usuario.email], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -263,10 +275,13 @@ def edit(usuario_id):
             usuario.apellido_materno = safe_string(form.apellido_materno.data, save_enie=True)
             if form.contrasena.data:
                 usuario.contrasena = pwd_context.hash(form.contrasena.data.strip())
+                TokenRenovacion.revocar_usuario(usuario.id)
             usuario.unidad_id = form.unidad.data
             usuario.ubicacion_id = ubicacion_seleccionada_id
             usuario.es_acceso_frontend = form.es_acceso_frontend.data
             usuario.save()
+            principales.invalidar()
+            esperas.invalidar()
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -297,6 +312,8 @@ def delete(usuario_id):
     if usuario.estatus == "A":
         # Dar de baja al usuario
         usuario.delete()
+        principales.invalidar()
+        esperas.invalidar()
         # Dar de baja los roles del usuario
         for usuario_rol in usuario.usuarios_roles:
             usuario_rol.delete()
@@ -321,6 +338,8 @@ def recover(usuario_id):
     if usuario.estatus == "B":
         # Recuperar al usuario
         usuario.recover()
+        principales.invalidar()
+        esperas.invalidar()
         # Recuperar los roles del usuario
         for usuario_rol in usuario.usuarios_roles:
             usuario_rol.recover()
@@ -7,7 +7,8 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
+from lib.principales import principales
 from lib.safe_string import safe_email, safe_message, safe_string
 from tauro.blueprints.bitacoras.models import Bitacora
 from tauro.blueprints.modulos.models import Modulo
@@ -62,16 +63,16 @@ def datatable_json():
         apellido_paterno = safe_string(request.form["apellido_paterno"], save_enie=True)
         consulta = consulta.filter(Usuario.apellido_paterno.contains(apellido_paterno))
     # Ordenar por el nombre del rol si hay filtro usuario_id
+    orden = []
     if "usuario_id" in request.form:
-        consulta = consulta.order_by(Rol.nombre)
+        orden.append(Rol.nombre)
     # Ordenar por el e-mail del usuario si hay filtro rol_id
     if "rol_id" in request.form:
-        consulta = consulta.order_by(Usuario.email)
+        orden.append(Usuario.email)
     # Filtrar por los usuarios activos y por los roles activos
     consulta = consulta.filter(Usuario.estatus == "A").filter(Rol.estatus == "A")
-    # Paginar
-    registros = consulta.offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, orden, start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -138,6 +139,7 @@ def new_with_rol(rol_id):
             if usuario_rol_existente.estatus == "B":
                 usuario_rol_existente.estatus = "A"
                 usuario_rol_existente.save()
+                principales.invalidar()
                 flash(f"Se ha recuperado {rol.nombre} en {usuario.email}.", "success")
             else:
                 flash(f"Ya existe {rol.nombre} en {usuario.email}. Nada por hacer.", "warning")
@@ -148,6 +150,7 @@ def new_with_rol(rol_id):
             descripcion=descripcion,
         )
         usuario_rol.save()
+        principales.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -180,6 +183,7 @@ def new_with_usuario(usuario_id):
             if usuario_rol_existente.estatus == "B":
                 usuario_rol_existente.estatus = "A"
                 usuario_rol_existente.save()
+                principales.invalidar()
                 flash(f"Se ha recuperado {rol.nombre} en {usuario.email}.", "success")
             else:
                 flash(f"Ya existe {rol.nombre} en {usuario.email}. Nada por hacer.", "warning")
@@ -190,6 +194,7 @@ def new_with_usuario(usuario_id):
             descripcion=descripcion,
         )
         usuario_rol.save()
+        principales.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -216,6 +221,7 @@ def delete(usuario_rol_id):
     usuario_rol = UsuarioRol.query.get_or_404(usuario_rol_id)
     if usuario_rol.estatus == "A":
         usuario_rol.delete()
+        principales.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -234,6 +240,7 @@ def recover(usuario_rol_id):
     usuario_rol = UsuarioRol.query.get_or_404(usuario_rol_id)
     if usuario_rol.estatus == "B":
         usuario_rol.recover()
+        principales.invalidar()
         bitacora = Bitacora(
             modulo=Modulo.query.filter_by(nombre=MODULO).first(),
             usuario=current_user,
@@ -263,6 +270,7 @@ def toggle_estatus_json(usuario_rol_id):
 
     # Guardar
     usuario_rol.save()
+    principales.invalidar()
 
     # Entregar JSON
     return {
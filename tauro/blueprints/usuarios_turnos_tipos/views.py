@@ -6,7 +6,9 @@ import json
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
-from lib.datatables import get_datatable_parameters, output_datatable_json
+from lib.datatables import get_datatable_parameters, output_datatable_json, paginar_datatable
+from lib.esperas import esperas
+from lib.principales import principales
 from lib.safe_string import safe_string, safe_message
 
 from tauro.blueprints.bitacoras.models import Bitacora
@@ -50,9 +52,8 @@ def datatable_json():
     # if "persona_rfc" in request.form:
     #     consulta = consulta.join(Persona)
     #     consulta = consulta.filter(Persona.rfc.contains(safe_rfc(request.form["persona_rfc"], search_fragment=True)))
-    # Ordenar y paginar
-    registros = consulta.order_by(UsuarioTurnoTipo.id).offset(start).limit(rows_per_page).all()
-    total = consulta.count()
+    # Ordenar y paginar, vea lib/datatables.py
+    registros, total = paginar_datatable(consulta, [UsuarioTurnoTipo.id], start, rows_per_page)
     # Elaborar datos para DataTable
     data = []
     for resultado in registros:
@@ -111,6 +112,8 @@ def new_with_usuario(usuario_id):
                 es_activo=form.es_activo.data,
             )
             usuario_turno_tipo.save()
+            principales.invalidar()
+            esperas.invalidar()
             bitacora = Bitacora(
                 modulo=Modulo.query.filter_by(nombre=MODULO).first(),
                 usuario=current_user,
@@ -149,6 +152,8 @@ def toggle_estatus_json(usuario_turno_tipo_id):
 
     # Guardar
     usuario_turno_tipo.save()
+    principales.invalidar()
+    esperas.invalidar()
 
     # Entregar JSON
     return {
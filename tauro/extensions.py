@@ -9,9 +9,18 @@ from flask_wtf import CSRFProtect
 from passlib.context import CryptContext
 from flask_socketio import SocketIO
 
+from config.settings import get_settings
+
+settings = get_settings()
+
 csrf = CSRFProtect()
 database = SQLAlchemy()
 login_manager = LoginManager()
 moment = Moment()
-pwd_context = CryptContext(schemes=["pbkdf2_sha256", "des_crypt"], deprecated="auto")
+# Las contraseñas nuevas usan CONTRASENAS_ESQUEMA, las de otros esquemas se actualizan al ingresar
+pwd_context = CryptContext(
+    schemes=list(dict.fromkeys([settings.CONTRASENAS_ESQUEMA, "pbkdf2_sha256", "des_crypt"])),
+    default=settings.CONTRASENAS_ESQUEMA,
+    deprecated="auto",
+)
 socketio = SocketIO(cors_allowed_origins="*")
@@ -0,0 +1,55 @@
+"""
+Microbenchmark de la validación de los payload
+
+Compara el tiempo de CPU por petición del camino anterior (request.get_json() y luego model_validate)
+contra payload_required, que entrega los bytes del cuerpo directo a model_validate_json.
+Mide un crear_turno y un crear_turnos de 20 turnos, no necesita base de datos
+
+    python -m tests.benchmark_payloads
+"""
+
+import json
+import time
+import timeit
+
+from flask import Flask, request
+
+from tauro.blueprints.api_key_v1.schemas import CrearTurnoIn, CrearTurnosIn
+from tauro.blueprints.api_v1.decorators import payload_required
+
+REPETICIONES = 5000
+
+TURNO = {"turno_tipo_id": 3, "turno_telefono": "4441234567", "unidad_id": 2, "comentarios": "ATENCIÓN EN VENTANILLA"}
+CARGAS = {
+    "crear_turno": (CrearTurnoIn, {"usuario_id": 1, **TURNO}),
+    "crear_turnos (20)": (CrearTurnosIn, {"usuario_id": 1, "turnos": [TURNO] * 20}),
+}
+
+
+def camino_anterior(esquema):
+    """request.get_json() y model_validate, como estaban los recursos"""
+    return esquema.model_validate(request.get_json(cache=False))  # Sin el JSON que Flask guardó en la medición anterior
+
+
+def camino_nuevo(esquema):
+    """El decorador payload_required sobre un recurso que entrega lo que recibe"""
+    return payload_required(esquema)(lambda payload: payload)()
+
+
+def main():
+    """Medir los dos caminos con cada carga"""
+    app = Flask(__name__)
+    for nombre, (esquema, carga) in CARGAS.items():
+        cuerpo = json.dumps(carga).encode("utf-8")
+        with app.test_request_context(method="POST", data=cuerpo, content_type="application/json"):
+            request.get_data()  # Los dos caminos leen el mismo cuerpo ya recibido
+            assert camino_anterior(esquema) == camino_nuevo(esquema)
+            anterior = timeit.timeit(lambda: camino_anterior(esquema), timer=time.process_time, number=REPETICIONES)
+            nuevo = timeit.timeit(lambda: camino_nuevo(esquema), timer=time.process_time, number=REPETICIONES)
+        print(f"{nombre}, {len(cuerpo)} bytes, {REPETICIONES} repeticiones, tiempo de CPU")
+        print(f"  get_json + model_validate   {anterior / REPETICIONES * 1e6:8.1f} µs")
+        print(f"  payload_required            {nuevo / REPETICIONES * 1e6:8.1f} µs  x{anterior / nuevo:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
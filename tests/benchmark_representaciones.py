@@ -0,0 +1,79 @@
+"""
+Microbenchmark de la representación JSON de las API
+
+Compara, con la respuesta de ConsultarTurnos de 20 turnos, el camino anterior
+(model_dump() y luego el json de la biblioteca estándar, como hacía flask_restful)
+contra representar_json, que serializa el modelo de pydantic directo a bytes.
+No necesita base de datos
+
+    python -m tests.benchmark_representaciones
+"""
+
+import json
+import timeit
+from datetime import datetime
+
+from flask import Flask
+
+from lib.representaciones import a_json, representar_json
+from tauro.blueprints.api_oauth2_v1.schemas import ListTurnosOut, OneListTurnosOut, TurnoUnidadOut
+from tauro.blueprints.api_v1.schemas import TurnoEstadoOut, TurnoTipoOut, UbicacionOut, UnidadOut
+
+CANTIDAD = 20
+REPETICIONES = 2000
+
+
+def elaborar_carga(cantidad: int = CANTIDAD) -> OneListTurnosOut:
+    """Elaborar una respuesta de ConsultarTurnos con la cantidad de turnos"""
+    turnos = [
+        TurnoUnidadOut(
+            turno_id=1000 + numero,
+            turno_numero=numero,
+            turno_fecha=datetime(2026, 1, 2, 9, numero % 60).isoformat(),
+            turno_numero_cubiculo=0,
+            turno_telefono="4441234567",
+            turno_comentarios="ATENCIÓN EN VENTANILLA",
+            turno_estado=TurnoEstadoOut(id=1, nombre="EN ESPERA"),
+            turno_tipo=TurnoTipoOut(id=3, nombre="NORMAL", nivel=3),
+            unidad=UnidadOut(id=2, clave="U1", nombre="UNIDAD UNO"),
+            ubicacion=UbicacionOut(id=1, nombre="NO DEFINIDO", numero=0),
+            turno_espera_estimada=numero * 300,
+        )
+        for numero in range(1, cantidad + 1)
+    ]
+    return OneListTurnosOut(
+        success=True,
+        message=f"Se encontraron {cantidad} turnos",
+        data=ListTurnosOut(ultimo_turno=turnos[0], turnos=turnos),
+    )
+
+
+def camino_anterior(modelo: OneListTurnosOut) -> bytes:
+    """model_dump() y json.dumps, como la representación original de flask_restful"""
+    return (json.dumps(modelo.model_dump()) + "\n").encode("utf-8")
+
+
+def camino_nuevo(modelo: OneListTurnosOut) -> bytes:
+    """Serializar el modelo directo a bytes"""
+    return a_json(modelo) + b"\n"
+
+
+def main():
+    """Medir los dos caminos y el de la respuesta completa de Flask"""
+    app = Flask(__name__)
+    modelo = elaborar_carga()
+    with app.test_request_context():
+        mediciones = {
+            "model_dump + json.dumps": timeit.timeit(lambda: camino_anterior(modelo), number=REPETICIONES),
+            "a_json (pydantic-core)": timeit.timeit(lambda: camino_nuevo(modelo), number=REPETICIONES),
+            "representar_json (Response)": timeit.timeit(lambda: representar_json(modelo, 200), number=REPETICIONES),
+        }
+        tamano = len(camino_nuevo(modelo))
+    anterior = mediciones["model_dump + json.dumps"]
+    print(f"{CANTIDAD} turnos, {tamano} bytes, {REPETICIONES} repeticiones")
+    for nombre, segundos in mediciones.items():
+        print(f"{nombre:30} {segundos / REPETICIONES * 1e6:8.1f} µs  x{anterior / segundos:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Contador de consultas
+
+Cuenta las sentencias SQL que se ejecutan dentro de un bloque with,
+sirve para que las pruebas fallen si un endpoint vuelve a consultar renglón por renglón.
+También guarda los parámetros, para repetir las sentencias con EXPLAIN.
+
+Ejemplo
+
+    with ContadorConsultas(database.engine) as contador:
+        client.get("/api_oauth2/v1/consultar_turnos")
+    assert len(contador.sentencias) <= 2
+"""
+
+from sqlalchemy import event
+
+
+class ContadorConsultas:
+    """Contador de sentencias SQL ejecutadas por un engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.sentencias = []
+        self.parametros = []
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        """Guardar cada sentencia antes de ejecutarse"""
+        self.sentencias.append(statement)
+        self.parametros.append(parameters)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._contar)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, "before_cursor_execute", self._contar)
+
+    def __str__(self):
+        return "\n".join(self.sentencias)
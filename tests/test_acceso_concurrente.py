@@ -0,0 +1,114 @@
+"""
+Unit test acceso concurrente a la API OAuth2
+
+Simula a muchos usuarios ingresando al mismo tiempo, como a las 8:00, y mide los accesos por segundo.
+También prueba que un hash con un esquema anterior se actualiza y que se limitan los intentos por correo.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.contrasenas import intentos_acceso
+from tauro.app import create_app
+from tauro.blueprints.tokens_renovacion.models import TokenRenovacion
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.blueprints.usuarios_roles.models import UsuarioRol
+from tauro.extensions import database, pwd_context
+from tests import config
+
+URL = "/api_oauth2/v1/token"
+CANTIDAD_USUARIOS = 40
+CONTRASENA = "Prueba2024"
+MARCA = "PRUEBA ACCESO CONCURRENTE"
+
+
+class TestAccesoConcurrente(unittest.TestCase):
+    """Test acceso concurrente a la API OAuth2"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        with cls.app.app_context():
+            usuario = Usuario.query.get(int(config["usuarios_ids"][0]))
+            rol_id = UsuarioRol.query.filter_by(usuario_id=usuario.id).filter_by(estatus="A").first().rol_id
+            contrasena = pwd_context.hash(CONTRASENA)
+            cls.emails = []
+            for numero in range(CANTIDAD_USUARIOS):
+                email = f"prueba.acceso.{numero}@pjecz.gob.mx"
+                nuevo = Usuario(
+                    unidad_id=usuario.unidad_id,
+                    ubicacion_id=usuario.ubicacion_id,
+                    email=email,
+                    nombres=MARCA,
+                    apellido_paterno="PRUEBA",
+                    apellido_materno="PRUEBA",
+                    contrasena=contrasena,
+                    es_acceso_frontend=True,
+                )
+                database.session.add(nuevo)
+                database.session.flush()
+                database.session.add(UsuarioRol(rol_id=rol_id, usuario_id=nuevo.id, descripcion=MARCA))
+                cls.emails.append(email)
+            database.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            usuarios_ids = [usuario.id for usuario in Usuario.query.filter_by(nombres=MARCA).all()]
+            TokenRenovacion.query.filter(TokenRenovacion.usuario_id.in_(usuarios_ids)).delete()
+            UsuarioRol.query.filter(UsuarioRol.usuario_id.in_(usuarios_ids)).delete()
+            Usuario.query.filter(Usuario.id.in_(usuarios_ids)).delete()
+            database.session.commit()
+        intentos_acceso.reiniciar()
+
+    def setUp(self):
+        intentos_acceso.reiniciar()
+
+    def acceder(self, email: str, contrasena: str = CONTRASENA):
+        """Pedir el token con un cliente propio"""
+        return self.app.test_client().post(URL, data={"username": email, "password": contrasena})
+
+    def test_post_token_concurrente(self):
+        """Test POST token, todos los usuarios ingresan al mismo tiempo"""
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CANTIDAD_USUARIOS) as grupo:
+            respuestas = list(grupo.map(self.acceder, self.emails))
+        segundos = time.perf_counter() - inicio
+        print(f"\n{CANTIDAD_USUARIOS} accesos en {segundos:.2f} s, {CANTIDAD_USUARIOS / segundos:.1f} accesos/s")
+        for respuesta in respuestas:
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTrue(respuesta.get_json()["success"], respuesta.get_json()["message"])
+
+    def test_post_token_actualiza_hash_anterior(self):
+        """Test POST token, una contraseña con des_crypt se guarda con el esquema actual al ingresar"""
+        email = self.emails[0]
+        with self.app.app_context():
+            usuario = Usuario.query.filter_by(email=email).one()
+            usuario.contrasena = pwd_context.hash(CONTRASENA, scheme="des_crypt")
+            usuario.save()
+        self.assertTrue(self.acceder(email).get_json()["success"])
+        with self.app.app_context():
+            contrasena = Usuario.query.filter_by(email=email).one().contrasena
+        self.assertEqual(pwd_context.identify(contrasena), pwd_context.default_scheme())
+        self.assertTrue(self.acceder(email).get_json()["success"])
+
+    def test_post_token_demasiados_intentos(self):
+        """Test POST token, después de la ráfaga de intentos fallidos se rechaza con 429"""
+        email = self.emails[1]
+        for _ in range(self.app.config["INTENTOS_ACCESO_RAFAGA"]):
+            self.assertEqual(self.acceder(email, "Incorrecta2024").status_code, 200)
+        respuesta = self.acceder(email)
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertFalse(respuesta.get_json()["success"])
+
+    def test_post_token_accesos_correctos_no_gastan_intentos(self):
+        """Test POST token, los accesos correctos no cuentan para el límite de intentos"""
+        email = self.emails[2]
+        for _ in range(self.app.config["INTENTOS_ACCESO_RAFAGA"] + 2):
+            self.assertTrue(self.acceder(email).get_json()["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Unit test archivos
+
+cli archivos archivar debe mover a turnos_archivados los turnos de días anteriores ya cerrados,
+dejar los pendientes y los de hoy, y mover a bitacoras_archivadas las bitácoras antiguas.
+Lo archivado se debe poder buscar desde el listado de turnos de la administración.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env, antes ejecute cli db migrar.
+El comando se ejecuta de verdad, archiva los turnos y las bitácoras que cumplan las condiciones.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from lib import catalogos
+from tauro.app import create_app
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.bitacoras_archivadas.models import BitacoraArchivada
+from tauro.blueprints.modulos.models import Modulo
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_archivados.models import TurnoArchivado
+from tauro.extensions import database
+from tests import config
+
+MARCA = "Sembrado por test_archivos"
+
+
+class TestArchivos(unittest.TestCase):
+    """Test archivos"""
+
+    @classmethod
+    def setUpClass(cls):
+        from cli.commands.cmd_archivos import archivar  # Al importarse crea su propia aplicación
+
+        cls.archivar = archivar
+        cls.app = create_app()
+        cls.app.config["WTF_CSRF_ENABLED"] = False
+        cls.client = cls.app.test_client()
+
+    def setUp(self):
+        ayer = datetime.now() - timedelta(days=1)
+        with self.app.app_context():
+            estados = {estado.nombre: estado.id for estado in catalogos.turnos_estados.todos()}
+            turnos = {
+                "completado_ayer": (estados["COMPLETADO"], ayer),
+                "cancelado_ayer": (estados["CANCELADO"], ayer),
+                "en_espera_ayer": (estados["EN ESPERA"], ayer),
+                "completado_hoy": (estados["COMPLETADO"], datetime.now()),
+            }
+            for clave, (turno_estado_id, creado) in turnos.items():
+                turno = Turno(
+                    usuario_id=int(config["usuarios_ids"][0]),
+                    turno_estado_id=turno_estado_id,
+                    turno_tipo_id=int(config["turnos_tipos_ids"][0]),
+                    ubicacion_id=int(config["ubicaciones_ids"][0]),
+                    unidad_id=int(config["unidades_ids"][0]),
+                    numero=1,
+                    numero_cubiculo=0,
+                    comentarios=MARCA,
+                    creado=creado,
+                )
+                database.session.add(turno)
+                database.session.flush()
+                turnos[clave] = turno.id
+            modulo_id = Modulo.query.first().id
+            for dias in (1, 100):
+                database.session.add(
+                    Bitacora(
+                        modulo_id=modulo_id,
+                        usuario_id=int(config["usuarios_ids"][0]),
+                        descripcion=f"{MARCA} {dias}",
+                        url="",
+                        creado=datetime.now() - timedelta(days=dias),
+                    )
+                )
+            database.session.commit()
+        self.turnos_ids = turnos
+
+    def tearDown(self):
+        with self.app.app_context():
+            for modelo in (Turno, TurnoArchivado):
+                modelo.query.filter(modelo.comentarios == MARCA).delete(synchronize_session=False)
+            for modelo in (Bitacora, BitacoraArchivada):
+                modelo.query.filter(modelo.descripcion.startswith(MARCA)).delete(synchronize_session=False)
+            database.session.commit()
+
+    def test_archivar(self):
+        """Test cli archivos archivar"""
+        with self.app.app_context():
+            self.archivar.callback(dias_turnos=1, dias_bitacoras=90, lote=1)
+            archivados = {turno.id for turno in TurnoArchivado.query.filter_by(comentarios=MARCA).all()}
+            vivos = {turno.id for turno in Turno.query.filter_by(comentarios=MARCA).all()}
+            bitacoras_archivadas = [
+                bitacora.descripcion
+                for bitacora in BitacoraArchivada.query.filter(BitacoraArchivada.descripcion.startswith(MARCA))
+            ]
+        self.assertEqual(archivados, {self.turnos_ids["completado_ayer"], self.turnos_ids["cancelado_ayer"]})
+        self.assertEqual(vivos, {self.turnos_ids["en_espera_ayer"], self.turnos_ids["completado_hoy"]})
+        self.assertEqual(bitacoras_archivadas, [f"{MARCA} 100"])
+
+    def test_post_datatable_json_archivo(self):
+        """Test POST turnos/datatable_json, con archivo busca en los turnos archivados"""
+        with self.app.app_context():
+            self.archivar.callback(dias_turnos=1, dias_bitacoras=90, lote=1000)
+        with self.client.session_transaction() as sesion:
+            sesion["_user_id"] = config["usuarios_ids"][0]
+        turno_id = self.turnos_ids["completado_ayer"]
+        formulario = {"draw": 1, "start": 0, "length": 10, "estatus": "A", "turno_id": turno_id}
+        vivos = self.client.post("/turnos/datatable_json", data=formulario).get_json()
+        archivo = self.client.post("/turnos/datatable_json", data={**formulario, "archivo": 1}).get_json()
+        self.assertEqual(vivos["aaData"], [])
+        self.assertEqual([renglon["detalle"]["numero"] for renglon in archivo["aaData"]], [turno_id])
+        self.assertEqual(self.client.get(archivo["aaData"][0]["detalle"]["url"]).status_code, 200)
+        # El URL del detalle que guardan las bitácoras redirige al archivo
+        respuesta = self.client.get(f"/turnos/{turno_id}")
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertTrue(respuesta.headers["Location"].endswith(f"/turnos/archivados/{turno_id}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
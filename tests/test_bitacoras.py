@@ -0,0 +1,114 @@
+"""
+Unit test bitácoras
+
+Las API deben guardar la bitácora en el mismo commit que el cambio,
+y con lotes deben insertarlas varias a la vez en una sola sentencia.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import time
+import unittest
+
+from sqlalchemy import event
+
+from lib.bitacoras import Bitacoras
+from tauro.app import create_app
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+MARCA = "Bitacora de prueba por lotes"
+
+
+class TestBitacoras(unittest.TestCase):
+    """Test bitácoras"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            cls.engine = database.engine
+
+    def tearDown(self):
+        with self.app.app_context():
+            Bitacora.query.filter(Bitacora.descripcion.startswith(MARCA)).delete(synchronize_session=False)
+            database.session.commit()
+
+    def crear_turno(self):
+        """Crear un turno por medio de la API"""
+        response = self.client.post(
+            "/api_key/v1/crear_turno",
+            headers={"X-Api-Key": config["api_key"]},
+            json={
+                "usuario_id": int(config["usuarios_ids"][0]),
+                "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+                "unidad_id": int(config["unidades_ids"][0]),
+                "comentarios": "Turno de prueba para bitácoras",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["success"])
+        return response.get_json()["data"]["turno_id"]
+
+    def contar_insertadas(self) -> int:
+        """Contar las bitácoras de prueba que ya están en la base de datos"""
+        with self.app.app_context():
+            return Bitacora.query.filter(Bitacora.descripcion.startswith(MARCA)).count()
+
+    def test_post_crear_turno_un_commit(self):
+        """Test POST crear_turno, el turno y su bitácora se guardan con un solo commit"""
+        self.crear_turno()  # La primera carga los catálogos
+        commits = []
+
+        def escuchar(conexion):
+            commits.append(conexion)
+
+        event.listen(self.engine, "commit", escuchar)
+        try:
+            turno_id = self.crear_turno()
+        finally:
+            event.remove(self.engine, "commit", escuchar)
+        self.assertEqual(len(commits), 1)
+        with self.app.app_context():
+            self.assertEqual(Bitacora.query.filter(Bitacora.url.endswith(f"/{turno_id}")).count(), 1)
+
+    def test_lote_por_tamano(self):
+        """Test con lotes, se insertan hasta juntar el tamaño del lote y en una sola sentencia"""
+        bitacoras = Bitacoras(lote=3, segundos=60)
+        with self.app.app_context():
+            bitacoras.agregar("TURNOS", int(config["usuarios_ids"][0]), f"{MARCA} 1", "/")
+            bitacoras.agregar("TURNOS", int(config["usuarios_ids"][0]), f"{MARCA} 2", "/")
+            self.assertEqual(self.contar_insertadas(), 0)
+            with ContadorConsultas(self.engine) as contador:
+                bitacoras.agregar("TURNOS", int(config["usuarios_ids"][0]), f"{MARCA} 3", "/")
+        self.assertEqual(len([sentencia for sentencia in contador.sentencias if sentencia.startswith("INSERT")]), 1)
+        self.assertEqual(self.contar_insertadas(), 3)
+        # Al detenerse se insertan las que queden
+        with self.app.app_context():
+            bitacoras.agregar("TURNOS", int(config["usuarios_ids"][0]), f"{MARCA} 4", "/")
+        bitacoras.detener()
+        self.assertEqual(self.contar_insertadas(), 4)
+
+    def test_lote_por_tiempo(self):
+        """Test con lotes, el temporizador inserta las pendientes aunque no se llene el lote"""
+        bitacoras = Bitacoras(lote=100, segundos=0.2)
+        with self.app.app_context():
+            bitacoras.agregar("TURNOS", int(config["usuarios_ids"][0]), f"{MARCA} 1", "/")
+        time.sleep(1)
+        bitacoras.detener()
+        self.assertEqual(self.contar_insertadas(), 1)
+
+    def test_modulo_inexistente(self):
+        """Test si no existe el módulo la bitácora se omite sin lanzar error"""
+        bitacoras = Bitacoras(lote=1, segundos=60)
+        with self.app.app_context():
+            with self.assertLogs("lib.bitacoras", level="WARNING"):
+                bitacoras.agregar("MODULO QUE NO EXISTE", int(config["usuarios_ids"][0]), f"{MARCA} 1", "/")
+        bitacoras.detener()
+        self.assertEqual(self.contar_insertadas(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
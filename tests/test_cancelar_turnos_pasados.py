@@ -0,0 +1,128 @@
+"""
+Unit test cancelar turnos pasados
+
+Siembra un millón de turnos pendientes de días anteriores y mide cuánto tarda cli turnos cancelar_turnos_pasados,
+en una sola sentencia y por lotes de IDs. Debe cancelarlos todos y dejar una sola bitácora de resumen.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env, antes ejecute cli db migrar.
+El comando sólo cancela el rango de IDs de los turnos sembrados, con --desde y --hasta.
+Por tardar varios minutos se omite, a menos que se defina CANCELAR_TURNOS_PASADOS=1
+
+    CANCELAR_TURNOS_PASADOS=1 python -m unittest tests.test_cancelar_turnos_pasados
+
+Variables de entorno opcionales
+
+- TURNOS_SINTETICOS, cantidad de turnos pendientes a sembrar, por defecto 1000000
+"""
+
+import os
+import time
+import unittest
+
+from sqlalchemy import text
+
+from lib import catalogos
+from tauro.app import create_app
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.extensions import database
+from tests import config
+
+TURNOS_SINTETICOS = int(os.getenv("TURNOS_SINTETICOS", "1000000"))
+LOTE = 100000
+MARCA = "Turno sembrado por test_cancelar_turnos_pasados"
+
+
+@unittest.skipUnless(os.getenv("CANCELAR_TURNOS_PASADOS") == "1", "Defina CANCELAR_TURNOS_PASADOS=1 para ejecutarla")
+class TestCancelarTurnosPasados(unittest.TestCase):
+    """Test cancelar turnos pasados"""
+
+    @classmethod
+    def setUpClass(cls):
+        from cli.commands.cmd_turnos import cancelar_turnos_pasados  # Al importarse crea su propia aplicación
+
+        cls.cancelar_turnos_pasados = cancelar_turnos_pasados
+        cls.app = create_app()
+        with cls.app.app_context():
+            estados = {estado.nombre: estado.id for estado in catalogos.turnos_estados.todos()}
+            cls.cancelado_id = estados["CANCELADO"]
+            cls.pendientes_ids = [
+                estado_id for nombre, estado_id in estados.items() if nombre not in ("COMPLETADO", "CANCELADO")
+            ]
+
+    def tearDown(self):
+        with self.app.app_context():
+            database.session.execute(text("DELETE FROM turnos WHERE comentarios = :marca"), {"marca": MARCA})
+            Bitacora.query.filter(Bitacora.descripcion.like("Se cancelaron % turnos anteriores al %")).filter(
+                Bitacora.creado >= self.inicio
+            ).delete(synchronize_session=False)
+            database.session.commit()
+
+    def sembrar(self):
+        """Sembrar turnos pendientes de los últimos treinta días, guarda el rango de sus IDs"""
+        with self.app.app_context():
+            self.inicio = database.session.execute(text("SELECT now()")).scalar()
+            self.desde, self.hasta = database.session.execute(
+                text(
+                    """
+                    WITH pendientes AS (SELECT CAST(:pendientes_ids AS INTEGER[]) AS ids),
+                    sembrados AS (
+                        INSERT INTO turnos (usuario_id, turno_estado_id, turno_tipo_id, ubicacion_id, numero,
+                            numero_cubiculo, unidad_id, comentarios, creado)
+                        SELECT :usuario_id, pendientes.ids[1 + i % cardinality(pendientes.ids)], :turno_tipo_id,
+                            :ubicacion_id, 1 + i % 500, 0, :unidad_id, :marca, now() - (1 + i % 30) * INTERVAL '1 day'
+                        FROM generate_series(1, :cantidad) AS i, pendientes
+                        RETURNING id
+                    )
+                    SELECT min(id), max(id) FROM sembrados
+                    """
+                ),
+                {
+                    "usuario_id": int(config["usuarios_ids"][0]),
+                    "pendientes_ids": self.pendientes_ids,
+                    "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+                    "ubicacion_id": int(config["ubicaciones_ids"][0]),
+                    "unidad_id": int(config["unidades_ids"][0]),
+                    "marca": MARCA,
+                    "cantidad": TURNOS_SINTETICOS,
+                },
+            ).one()
+            database.session.commit()
+
+    def cancelar(self, lote: int) -> float:
+        """Ejecutar el comando sobre los turnos sembrados y entregar los segundos que tardó"""
+        inicio = time.perf_counter()
+        with self.app.app_context():
+            self.cancelar_turnos_pasados.callback(lote=lote, email=None, desde=self.desde, hasta=self.hasta)
+        segundos = time.perf_counter() - inicio
+        print(f"\n{TURNOS_SINTETICOS} turnos cancelados con lote={lote} en {segundos:.2f} s")
+        return segundos
+
+    def assert_cancelados(self):
+        """Todos los turnos sembrados deben quedar cancelados, con una sola bitácora de resumen"""
+        with self.app.app_context():
+            pendientes = database.session.execute(
+                text("SELECT count(*) FROM turnos WHERE comentarios = :marca AND turno_estado_id <> :cancelado_id"),
+                {"marca": MARCA, "cancelado_id": self.cancelado_id},
+            ).scalar()
+            bitacoras = (
+                Bitacora.query.filter(Bitacora.descripcion.like("Se cancelaron % turnos anteriores al %"))
+                .filter(Bitacora.creado >= self.inicio)
+                .count()
+            )
+        self.assertEqual(pendientes, 0)
+        self.assertEqual(bitacoras, 1)
+
+    def test_cancelar_turnos_pasados_una_sentencia(self):
+        """Test cli turnos cancelar_turnos_pasados con un solo UPDATE"""
+        self.sembrar()
+        self.cancelar(lote=0)
+        self.assert_cancelados()
+
+    def test_cancelar_turnos_pasados_por_lotes(self):
+        """Test cli turnos cancelar_turnos_pasados por rangos de IDs"""
+        self.sembrar()
+        self.cancelar(lote=LOTE)
+        self.assert_cancelados()
+
+
+if __name__ == "__main__":
+    unittest.main()
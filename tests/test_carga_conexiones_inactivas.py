@@ -0,0 +1,86 @@
+"""
+Unit test carga con conexiones inactivas
+
+Mantiene abiertas muchas conexiones de Socket.IO sin actividad, como las pantallas de las salas,
+y mientras tanto mide la latencia de crear_turno. Con el perfil gthread cada conexión ocupa un hilo
+y la API se queda esperando; con GUNICORN_PERFIL=gevent el p99 debe mantenerse bajo.
+Las pantallas se conectan a la sala de la última unidad de UNIDADES_IDS y los turnos se crean en la primera,
+así con dos o más unidades las pantallas no reciben mensajes, están inactivas de verdad.
+
+Variables de entorno opcionales
+
+- CONEXIONES_INACTIVAS, cantidad de pantallas simuladas, por defecto 500
+- PETICIONES_MEDIDAS, cantidad de turnos creados para medir, por defecto 200
+- P99_MAXIMO_MS, latencia p99 máxima aceptada en milisegundos, por defecto 500
+"""
+
+import os
+import statistics
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+from tests import config
+
+CONEXIONES_INACTIVAS = int(os.getenv("CONEXIONES_INACTIVAS", "500"))
+PETICIONES_MEDIDAS = int(os.getenv("PETICIONES_MEDIDAS", "200"))
+P99_MAXIMO_MS = float(os.getenv("P99_MAXIMO_MS", "500"))
+CANTIDAD_HILOS = 10
+
+
+class TestCargaConexionesInactivas(unittest.TestCase):
+    """Test carga con conexiones inactivas"""
+
+    def conectar_pantalla(self, _) -> socketio.Client:
+        """Conectar una pantalla a la sala de la última unidad y dejarla inactiva"""
+        cliente = socketio.Client(reconnection=False)
+        url = f"{config['socketio_url']}?unidad_id={config['unidades_ids'][-1]}"
+        cliente.connect(url, transports=["polling"], wait_timeout=30)
+        return cliente
+
+    def setUp(self):
+        with ThreadPoolExecutor(max_workers=50) as ejecutor:
+            self.pantallas = list(ejecutor.map(self.conectar_pantalla, range(CONEXIONES_INACTIVAS)))
+
+    def tearDown(self):
+        for pantalla in self.pantallas:
+            pantalla.disconnect()
+
+    def crear_turno(self, _) -> float:
+        """Crear un turno y entregar cuántos milisegundos tardó"""
+        payload = {
+            "usuario_id": int(config["usuarios_ids"][0]),
+            "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+            "unidad_id": int(config["unidades_ids"][0]),
+            "comentarios": "Turno de prueba de carga",
+        }
+        inicio = time.perf_counter()
+        response = requests.post(
+            url=f"{config['api_base_url']}/crear_turno",
+            headers={"X-Api-Key": config["api_key"]},
+            json=payload,
+            timeout=config["timeout"],
+        )
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["success"])
+        return milisegundos
+
+    def test_post_crear_turno_con_pantallas_inactivas(self):
+        """Test POST crear_turno, el p99 no debe crecer con las pantallas conectadas"""
+        self.assertTrue(all(pantalla.connected for pantalla in self.pantallas))
+        with ThreadPoolExecutor(max_workers=CANTIDAD_HILOS) as ejecutor:
+            latencias = list(ejecutor.map(self.crear_turno, range(PETICIONES_MEDIDAS)))
+        percentiles = statistics.quantiles(latencias, n=100)
+        print(
+            f"{CONEXIONES_INACTIVAS} pantallas inactivas, {PETICIONES_MEDIDAS} turnos: "
+            f"p50 {percentiles[49]:.1f} ms, p99 {percentiles[98]:.1f} ms, máximo {max(latencias):.1f} ms"
+        )
+        self.assertLessEqual(percentiles[98], P99_MAXIMO_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
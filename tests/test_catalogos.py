@@ -0,0 +1,96 @@
+"""
+Unit test catálogos
+
+Una unidad creada en otro worker no está en la copia en memoria; al buscarla por id
+el catálogo se vuelve a cargar una vez y la encuentra, y un id inexistente sólo provoca una carga.
+Las pantallas muestran los turnos de un tipo creado después de cargar el catálogo.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+import uuid
+
+from lib import catalogos
+from lib.instantaneas import instantaneas
+from tauro.app import create_app
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_tipos.models import TurnoTipo
+from tauro.blueprints.unidades.models import Unidad
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+
+class TestCatalogos(unittest.TestCase):
+    """Test catálogos"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.clave = f"T{uuid.uuid4().hex[:8].upper()}"
+        catalogos.unidades.invalidar()
+
+    def tearDown(self):
+        with self.app.app_context():
+            turnos_tipos_ids = [turno_tipo.id for turno_tipo in TurnoTipo.query.filter_by(nombre=self.clave).all()]
+            Turno.query.filter(Turno.turno_tipo_id.in_(turnos_tipos_ids)).delete(synchronize_session=False)
+            TurnoTipo.query.filter_by(nombre=self.clave).delete()
+            Unidad.query.filter_by(clave=self.clave).delete()
+            database.session.commit()
+        catalogos.unidades.invalidar()
+        catalogos.turnos_tipos.invalidar()
+        instantaneas.invalidar()
+
+    def test_por_id_creada_en_otro_worker(self):
+        """Test por_id encuentra una unidad creada después de cargar el catálogo, sin invalidarlo"""
+        with self.app.app_context():
+            catalogos.unidades.todos()
+            unidad = Unidad(clave=self.clave, nombre="UNIDAD DE PRUEBA CATALOGOS")
+            database.session.add(unidad)
+            database.session.commit()
+            unidad_id = unidad.id
+            self.assertEqual(catalogos.unidades.por_id(unidad_id).clave, self.clave)
+
+    def test_por_id_inexistente(self):
+        """Test un id inexistente vuelve a cargar una sola vez"""
+        with self.app.app_context(), ContadorConsultas(database.engine) as contador:
+            catalogos.unidades.todos()
+            self.assertIsNone(catalogos.unidades.por_id(0))
+            self.assertIsNone(catalogos.unidades.por_id(0))
+        self.assertEqual(len([sentencia for sentencia in contador.sentencias if "FROM unidades" in sentencia]), 2)
+
+    def test_get_consultar_turnos_tipo_nuevo(self):
+        """Test GET consultar_turnos de una unidad con un turno de un tipo que no estaba en el catálogo"""
+        client = self.app.test_client()
+        self.assertEqual(client.get(f"/api_oauth2/v1/consultar_turnos/{config['unidades_ids'][0]}").status_code, 200)
+        with self.app.app_context():
+            unidad = Unidad(clave=self.clave, nombre="UNIDAD DE PRUEBA CATALOGOS")
+            database.session.add(unidad)
+            turno_tipo = TurnoTipo(nombre=self.clave, nivel=100 + int(uuid.uuid4().int % 100000))
+            database.session.add(turno_tipo)
+            database.session.flush()
+            unidad_id = unidad.id
+            en_espera = catalogos.turnos_estados.por_nombre("EN ESPERA")
+            ubicacion = catalogos.ubicaciones.por_nombre("NO DEFINIDO")
+            turno = Turno(
+                usuario_id=int(config["usuarios_ids"][0]),
+                turno_estado_id=en_espera.id,
+                turno_tipo_id=turno_tipo.id,
+                ubicacion_id=ubicacion.id,
+                unidad_id=unidad_id,
+                numero=0,
+                numero_cubiculo=0,
+            )
+            database.session.add(turno)
+            database.session.commit()
+            turno_id = turno.id
+        response = client.get(f"/api_oauth2/v1/consultar_turnos/{unidad_id}")
+        self.assertEqual(response.status_code, 200)
+        turnos = {turno["turno_id"]: turno for turno in response.get_json()["data"]["turnos"]}
+        self.assertEqual(turnos[turno_id]["turno_tipo"]["nombre"], self.clave)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Unit test cola de mensajes
+
+Levanta el distribuidor en un hilo y dos servidores de Socket.IO independientes,
+como si fueran dos workers de Gunicorn, y verifica que lo que envía uno
+lo reciban los clientes conectados al otro.
+"""
+
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import socketio as socketio_cliente
+from flask import Flask, request
+from flask_socketio import SocketIO, join_room
+from werkzeug.serving import make_server
+
+from lib.cola_mensajes import ColaMensajesManager, Distribuidor
+
+ESPERA_SEG = 5
+
+
+def puerto_libre() -> int:
+    """Entregar un puerto TCP libre"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Worker:
+    """Aplicación con su propio servidor de Socket.IO conectado a la cola de mensajes"""
+
+    def __init__(self, url: str):
+        self.app = Flask(__name__)
+        self.socketio = SocketIO(self.app, async_mode="threading", client_manager=ColaMensajesManager(url))
+        self.socketio.on_event("connect", self.conectar)
+        self.clientes = []
+        self.puerto = puerto_libre()
+        self.servidor = make_server("127.0.0.1", self.puerto, self.app, threaded=True)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def conectar(auth=None):
+        """Unirse a la sala de la unidad, como en lib/salas.py"""
+        if "unidad_id" in request.args:
+            join_room(f"unidad_{request.args['unidad_id']}")
+
+    def conectar_cliente(self, unidad_id: int = None) -> queue.Queue:
+        """Conectar un cliente y entregar la cola donde se guardan los mensajes que recibe"""
+        recibidos = queue.Queue()
+        cliente = socketio_cliente.Client()
+        cliente.on("message", recibidos.put)
+        url = f"http://127.0.0.1:{self.puerto}"
+        if unidad_id is not None:
+            url = f"{url}?unidad_id={unidad_id}"
+        cliente.connect(url, transports=["polling"])
+        self.clientes.append(cliente)
+        return recibidos
+
+    def detener(self):
+        """Desconectar los clientes y detener el servidor"""
+        for cliente in self.clientes:
+            cliente.disconnect()
+        self.servidor.shutdown()
+
+
+class TestColaMensajes(unittest.TestCase):
+    """Test cola de mensajes"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        url = f"tauro+unix://{os.path.join(directorio.name, 'socketio.sock')}"
+        distribuidor = Distribuidor(url)
+        distribuidor.iniciar_en_hilo()
+        self.addCleanup(distribuidor.detener)
+        self.worker_a = Worker(url)
+        self.worker_b = Worker(url)
+        self.addCleanup(self.worker_a.detener)
+        self.addCleanup(self.worker_b.detener)
+
+    def test_enviar_entre_workers(self):
+        """Test un envío del worker A llega a los clientes de los workers A y B"""
+        recibidos_a = self.worker_a.conectar_cliente()
+        recibidos_b = self.worker_b.conectar_cliente()
+        time.sleep(0.5)  # Que la escucha de los workers ya esté suscrita
+        self.worker_a.socketio.send({"turno_numero": 1})
+        self.assertEqual(recibidos_a.get(timeout=ESPERA_SEG), {"turno_numero": 1})
+        self.assertEqual(recibidos_b.get(timeout=ESPERA_SEG), {"turno_numero": 1})
+
+    def test_enviar_a_sala_entre_workers(self):
+        """Test un envío a una sala sólo llega a los clientes de esa sala en el otro worker"""
+        recibidos_u1 = self.worker_b.conectar_cliente(unidad_id=1)
+        recibidos_u2 = self.worker_b.conectar_cliente(unidad_id=2)
+        self.worker_a.conectar_cliente()
+        time.sleep(0.5)
+        self.worker_a.socketio.send({"turno_numero": 2}, to="unidad_2")
+        self.assertEqual(recibidos_u2.get(timeout=ESPERA_SEG), {"turno_numero": 2})
+        with self.assertRaises(queue.Empty):
+            recibidos_u1.get(timeout=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit test compresiones
+
+Las respuestas se comprimen según Accept-Encoding y las instantáneas de las pantallas
+se comprimen una sola vez, las consultas repetidas reciben los mismos bytes ya comprimidos.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import gzip
+import json
+import unittest
+
+from config.settings import get_settings
+from lib.compresiones import comprimir_respuesta
+from lib.instantaneas import GLOBAL, instantaneas
+from tauro.app import create_app
+
+URL = "/api_oauth2/v1/consultar_turnos"
+
+settings = get_settings()
+
+
+class TestCompresiones(unittest.TestCase):
+    """Test compresiones"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+
+    def setUp(self):
+        # Sin mínimo para no depender de cuántos turnos haya en la base de datos
+        self.minimo = settings.COMPRESION_MINIMO_BYTES
+        settings.COMPRESION_MINIMO_BYTES = 0
+        instantaneas.invalidar()
+
+    def tearDown(self):
+        settings.COMPRESION_MINIMO_BYTES = self.minimo
+
+    def test_get_consultar_turnos_comprimido_una_vez(self):
+        """Test GET consultar_turnos con gzip, la segunda petición recibe la misma compresión guardada"""
+        sin_comprimir = self.client.get(URL)
+        self.assertNotIn("Content-Encoding", sin_comprimir.headers)
+        self.assertIn("Accept-Encoding", sin_comprimir.headers["Vary"])
+        primera = self.client.get(URL, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(primera.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(primera.get_data()), sin_comprimir.get_data())
+        self.assertNotEqual(primera.headers["ETag"], sin_comprimir.headers["ETag"])
+        comprimido = instantaneas.obtener(GLOBAL, None).comprimidos["gzip"]
+        segunda = self.client.get(URL, headers={"Accept-Encoding": "gzip"})
+        self.assertIs(instantaneas.obtener(GLOBAL, None).comprimidos["gzip"], comprimido)
+        self.assertEqual(segunda.get_data(), primera.get_data())
+        no_modificada = self.client.get(URL, headers={"Accept-Encoding": "gzip", "If-None-Match": primera.headers["ETag"]})
+        self.assertEqual(no_modificada.status_code, 304)
+
+    def test_comprimir_respuesta(self):
+        """Test comprimir_respuesta con gzip, con el mínimo y con tipos que no se comprimen"""
+        datos = {"data": [{"id": numero, "nombre": "TURNO"} for numero in range(200)]}
+        with self.app.test_request_context(headers={"Accept-Encoding": "gzip, deflate"}):
+            response = comprimir_respuesta(self.app.response_class(json.dumps(datos), mimetype="application/json"))
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            self.assertEqual(json.loads(gzip.decompress(response.get_data())), datos)
+            imagen = comprimir_respuesta(self.app.response_class(b"\x89PNG" * 1000, mimetype="image/png"))
+            self.assertNotIn("Content-Encoding", imagen.headers)
+            pagina = comprimir_respuesta(self.app.response_class("<p>TURNO</p>" * 1000, mimetype="text/html"))
+            self.assertNotIn("Content-Encoding", pagina.headers)
+            settings.COMPRESION_MINIMO_BYTES = 1024
+            chica = comprimir_respuesta(self.app.response_class('{"success": true}', mimetype="application/json"))
+            self.assertNotIn("Content-Encoding", chica.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Unit test consultar_turnos cantidad de consultas
+
+Las pantallas consultan los turnos cada pocos segundos, así que estos endpoints
+deben resolverse con un número fijo de consultas sin importar cuántos turnos haya.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+
+from lib.instantaneas import instantaneas
+from tauro.app import create_app
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+MAXIMO_CONSULTAS = 2  # Los turnos listados y el último turno atendiendo
+
+
+class TestConsultarTurnosConsultas(unittest.TestCase):
+    """Test cantidad de consultas de consultar_turnos"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            cls.engine = database.engine
+
+    def contar_consultas(self, url: str) -> ContadorConsultas:
+        """Hacer la petición dos veces y contar las consultas de la segunda, la primera carga los catálogos"""
+        self.assertEqual(self.client.get(url).status_code, 200)
+        instantaneas.invalidar()  # Para contar las consultas al elaborar la respuesta
+        with ContadorConsultas(self.engine) as contador:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["success"])
+        return contador
+
+    def test_get_consultar_turnos(self):
+        """Test GET consultar_turnos"""
+        contador = self.contar_consultas("/api_oauth2/v1/consultar_turnos")
+        self.assertLessEqual(len(contador.sentencias), MAXIMO_CONSULTAS, str(contador))
+
+    def test_get_consultar_turnos_unidad(self):
+        """Test GET consultar_turnos de una unidad"""
+        contador = self.contar_consultas(f"/api_oauth2/v1/consultar_turnos/{config['unidades_ids'][0]}")
+        self.assertLessEqual(len(contador.sentencias), MAXIMO_CONSULTAS, str(contador))
+
+    def test_get_consultar_turnos_instantanea(self):
+        """Test GET consultar_turnos con If-None-Match, debe entregar 304 sin consultar la base de datos"""
+        url = "/api_oauth2/v1/consultar_turnos"
+        etag = self.client.get(url).headers["ETag"]
+        with ContadorConsultas(self.engine) as contador:
+            response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(contador.sentencias), 0, str(contador))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Unit test crear_turno concurrente
+
+Dispara cientos de creaciones de turnos en paralelo contra una misma unidad,
+como si fueran muchos kioscos al mismo tiempo, y verifica que no se repitan los números.
+"""
+
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from tests import config
+
+CANTIDAD_TURNOS = 300
+CANTIDAD_HILOS = 50
+
+
+class TestCrearTurnoConcurrente(unittest.TestCase):
+    """Test crear_turno concurrente"""
+
+    def crear_turno(self, payload: dict) -> dict:
+        """Crear un turno por medio de la API"""
+        response = requests.post(
+            url=f"{config['api_base_url']}/crear_turno",
+            headers={"X-Api-Key": config["api_key"]},
+            json=payload,
+            timeout=config["timeout"],
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_post_crear_turno_concurrente(self):
+        """Test POST crear_turno, crear cientos de turnos en paralelo sin números repetidos"""
+        # Todos los turnos van a la misma unidad, así los números no se repiten sea la numeración general o por unidad
+        payload = {
+            "usuario_id": int(config["usuarios_ids"][0]),
+            "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+            "unidad_id": int(config["unidades_ids"][0]),
+            "comentarios": "Turno de prueba concurrente",
+        }
+        # Disparar en paralelo
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CANTIDAD_HILOS) as ejecutor:
+            resultados = list(ejecutor.map(lambda _: self.crear_turno(payload), range(CANTIDAD_TURNOS)))
+        segundos = time.perf_counter() - inicio
+        ritmo = CANTIDAD_TURNOS / segundos
+        print(f"{CANTIDAD_TURNOS} turnos con {CANTIDAD_HILOS} hilos en {segundos:.2f} s ({ritmo:.1f} turnos/s)")
+        # Validar que todos se hayan creado
+        for resultado in resultados:
+            self.assertTrue(resultado["success"])
+        # Validar que no se repitan los números
+        numeros = [resultado["data"]["turno_numero"] for resultado in resultados]
+        self.assertEqual(len(numeros), len(set(numeros)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Unit test crear_turnos
+
+Los turnos válidos se crean con números consecutivos en una sola sentencia INSERT y un solo commit,
+con una sola bitácora y una sola señal a las pantallas; los inválidos reciben su mensaje en su misma posición.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from lib.llaves_api import llaves_api
+from tauro.app import create_app
+from tauro.blueprints.api_keys.models import APIKey
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.turnos.models import Turno
+from tauro.extensions import database, socketio
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+MARCA = "TURNO CREADO POR TEST CREAR TURNOS"  # Como queda después de safe_string
+CANTIDAD = 5
+
+
+class TestCrearTurnos(unittest.TestCase):
+    """Test crear_turnos"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.api_key = uuid.uuid4().hex
+        with cls.app.app_context():
+            APIKey(api_key=cls.api_key, api_key_expiracion=datetime.now() + timedelta(days=1), es_activo=True).save()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            APIKey.query.filter_by(api_key=cls.api_key).delete()
+            database.session.commit()
+        llaves_api.invalidar()
+
+    def tearDown(self):
+        with self.app.app_context():
+            Turno.query.filter(Turno.comentarios == MARCA).delete(synchronize_session=False)
+            Bitacora.query.filter(Bitacora.descripcion.like("Se crearon % turnos por Api-Key, del %")).delete(
+                synchronize_session=False
+            )
+            database.session.commit()
+
+    def test_post_crear_turnos(self):
+        """Test POST crear_turnos"""
+        turno = {
+            "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+            "unidad_id": int(config["unidades_ids"][0]),
+            "comentarios": MARCA,
+        }
+        turnos = [turno] * CANTIDAD
+        turnos.insert(2, {**turno, "turno_tipo_id": 0})
+        pantalla = socketio.test_client(self.app, query_string=f"unidad_id={turno['unidad_id']}")
+        pantalla.get_received()
+        with self.app.app_context(), ContadorConsultas(database.engine) as contador:
+            datos = self.client.post(
+                "/api_key/v1/crear_turnos",
+                json={"usuario_id": int(config["usuarios_ids"][0]), "turnos": turnos},
+                headers={"X-Api-Key": self.api_key},
+            ).get_json()
+        self.assertTrue(datos["success"], datos["message"])
+        self.assertEqual([resultado["success"] for resultado in datos["data"]], [True, True, False, True, True, True])
+        self.assertEqual(datos["data"][2]["message"], "Tipo de turno no encontrado")
+        numeros = [resultado["data"]["turno_numero"] for resultado in datos["data"] if resultado["success"]]
+        self.assertEqual(numeros, list(range(numeros[0], numeros[0] + CANTIDAD)))
+        inserciones = [sentencia for sentencia in contador.sentencias if sentencia.startswith("INSERT INTO")]
+        self.assertEqual(len([sentencia for sentencia in inserciones if sentencia.startswith("INSERT INTO turnos ")]), 1)
+        self.assertEqual(len([sentencia for sentencia in inserciones if sentencia.startswith("INSERT INTO bitacoras ")]), 1)
+        recibidos = pantalla.get_received()
+        self.assertEqual([recibido["name"] for recibido in recibidos], ["refresh_screens"])
+        pantalla.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Unit test motor de DataTables
+
+Las páginas consultadas por llave deben ser iguales a las de OFFSET, las siguientes páginas del mismo cliente
+no deben usar OFFSET, las de otro cliente o los saltos sí, y los totales grandes deben estimarse sin contar la tabla.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+from datetime import datetime
+
+from lib.datatables import MotorDataTables
+from tauro.app import create_app
+from tauro.blueprints.bitacoras.models import Bitacora
+from tauro.blueprints.modulos.models import Modulo
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+BITACORAS_SEMBRADAS = 2500
+MARCA = "Bitacora de prueba para datatables"
+RENGLONES_POR_PAGINA = 100
+
+
+class TestDataTables(unittest.TestCase):
+    """Test motor de DataTables"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        with cls.app.app_context():
+            cls.engine = database.engine
+            modulo_id = Modulo.query.first().id
+            usuarios_ids = [int(usuario_id) for usuario_id in config["usuarios_ids"]]
+            ahora = datetime.now()
+            database.session.execute(
+                Bitacora.__table__.insert(),
+                [
+                    {
+                        "modulo_id": modulo_id,
+                        "usuario_id": usuarios_ids[numero % len(usuarios_ids)],
+                        "descripcion": f"{MARCA} {numero}",
+                        "url": "",
+                        "creado": ahora,
+                        "modificado": ahora,
+                    }
+                    for numero in range(BITACORAS_SEMBRADAS)
+                ],
+            )
+            database.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            Bitacora.query.filter(Bitacora.descripcion.startswith(MARCA)).delete(synchronize_session=False)
+            database.session.commit()
+
+    def setUp(self):
+        self.contexto = self.app.app_context()
+        self.contexto.push()
+        self.consulta = Bitacora.query.filter(Bitacora.descripcion.startswith(MARCA))
+
+    def tearDown(self):
+        database.session.rollback()
+        self.contexto.pop()
+
+    def por_offset(self, orden: list, start: int) -> list:
+        """Consultar la página con OFFSET, como antes"""
+        return [bitacora.id for bitacora in self.consulta.order_by(*orden).offset(start).limit(RENGLONES_POR_PAGINA).all()]
+
+    def test_paginas_siguientes_sin_offset(self):
+        """Test recorrer las páginas en orden, son iguales a las de OFFSET y desde la segunda no usan OFFSET"""
+        motor = MotorDataTables()
+        for start in range(0, BITACORAS_SEMBRADAS, RENGLONES_POR_PAGINA):
+            with ContadorConsultas(self.engine) as contador:
+                registros, _ = motor.paginar(self.consulta, [Bitacora.id.desc()], start, RENGLONES_POR_PAGINA, "1")
+            self.assertEqual([bitacora.id for bitacora in registros], self.por_offset([Bitacora.id.desc()], start))
+            pagina = [
+                sentencia for sentencia in contador.sentencias if "FROM bitacoras" in sentencia and "count" not in sentencia
+            ]
+            if start > 0:
+                self.assertNotIn("OFFSET", pagina[-1])
+
+    def test_salto_y_orden_mixto(self):
+        """Test saltar a una página lejana y ordenar con direcciones mezcladas, igual que con OFFSET"""
+        motor = MotorDataTables()
+        orden = [Bitacora.usuario_id, Bitacora.id.desc()]
+        for start in [0, 100, 1700, 1800, 200, 2400]:
+            registros, _ = motor.paginar(self.consulta, orden, start, RENGLONES_POR_PAGINA, "1")
+            self.assertEqual([bitacora.id for bitacora in registros], self.por_offset(orden, start))
+
+    def test_marcador_de_otro_cliente(self):
+        """Test el marcador de un cliente no lo usa otro, su página es la de OFFSET aunque haya renglones nuevos"""
+        motor = MotorDataTables()
+        orden = [Bitacora.id.desc()]
+        motor.paginar(self.consulta, orden, 0, RENGLONES_POR_PAGINA, "1")
+        nueva = Bitacora(
+            modulo_id=Modulo.query.first().id,
+            usuario_id=int(config["usuarios_ids"][0]),
+            descripcion=f"{MARCA} nueva",
+            url="",
+        )
+        database.session.add(nueva)
+        database.session.commit()
+        with ContadorConsultas(self.engine) as contador:
+            registros, _ = motor.paginar(self.consulta, orden, RENGLONES_POR_PAGINA, RENGLONES_POR_PAGINA, "2")
+        esperados = self.por_offset(orden, RENGLONES_POR_PAGINA)
+        database.session.delete(nueva)
+        database.session.commit()
+        self.assertEqual([bitacora.id for bitacora in registros], esperados)
+        self.assertTrue(any("OFFSET" in sentencia for sentencia in contador.sentencias))
+
+    def test_total_estimado(self):
+        """Test con un mínimo bajo el total se toma del plan, sin contar"""
+        motor = MotorDataTables(estimado_minimo=1, conteo_ttl_seg=0)
+        with ContadorConsultas(self.engine) as contador:
+            total = motor.contar(Bitacora.query)
+        self.assertGreater(total, 0)
+        self.assertFalse(any("count(" in sentencia for sentencia in contador.sentencias))
+
+    def test_total_exacto_guardado(self):
+        """Test sin estimado el total es exacto, y con los mismos filtros se toma de memoria"""
+        motor = MotorDataTables(estimado_minimo=0, conteo_ttl_seg=60)
+        self.assertEqual(motor.contar(self.consulta), BITACORAS_SEMBRADAS)
+        with ContadorConsultas(self.engine) as contador:
+            self.assertEqual(motor.contar(self.consulta), BITACORAS_SEMBRADAS)
+        self.assertEqual(contador.sentencias, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit test esperas estimadas
+
+Los eventos de los turnos deben actualizar el estimado en memoria sin consultar la base de datos,
+crear_turno debe entregar la espera estimada y la pantalla de la unidad la de cada turno en espera.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+import jwt
+
+from lib.esperas import Esperas, esperas
+from lib.instantaneas import instantaneas
+from tauro.app import create_app
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+MARCA = "TURNO CREADO POR TEST ESPERAS"  # Como queda después de safe_string
+
+
+class TestEsperas(unittest.TestCase):
+    """Test esperas estimadas"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.grupo = (int(config["unidades_ids"][0]), int(config["turnos_tipos_ids"][0]))
+        with cls.app.app_context():
+            cls.email = Usuario.query.get(int(config["usuarios_ids"][0])).email
+
+    def tearDown(self):
+        with self.app.app_context():
+            Turno.query.filter(Turno.comentarios == MARCA).delete(synchronize_session=False)
+            database.session.commit()
+        instantaneas.invalidar()
+        esperas.invalidar()
+
+    def test_eventos_sin_consultas(self):
+        """Test formar, salir y completar no consultan y el estimado es adelante * atención / ventanillas"""
+        alfa = self.app.config["ESPERAS_ALFA"]
+        prueba = Esperas()
+        with self.app.app_context():
+            prueba.estimar_fila([], None)  # Carga las ventanillas y los turnos en espera
+            prueba._ventanillas[self.grupo] = 2
+            prueba._en_espera[self.grupo] = 3
+            prueba._atenciones.pop(self.grupo, None)
+            with ContadorConsultas(database.engine) as contador:
+                prueba.completar(*self.grupo, 100)
+                prueba.completar(*self.grupo, 200)
+                atencion = alfa * 200 + (1 - alfa) * 100
+                self.assertEqual(prueba.formar(*self.grupo), round(3 * atencion / 2))
+                prueba.salir(*self.grupo)
+                prueba.salir(*self.grupo)
+                self.assertEqual(prueba.formar(*self.grupo), round(2 * atencion / 2))
+        self.assertEqual(contador.sentencias, [])
+
+    def test_sin_ventanillas_no_hay_estimado(self):
+        """Test un grupo sin ventanillas no tiene estimado"""
+        prueba = Esperas()
+        with self.app.app_context():
+            prueba.estimar_fila([], None)
+            prueba._ventanillas[self.grupo] = 0
+            self.assertIsNone(prueba.formar(*self.grupo))
+
+    def test_post_crear_turno_y_pantalla(self):
+        """Test POST crear_turno entrega la espera estimada y la pantalla de la unidad la de sus turnos en espera"""
+        ahora = datetime.now()
+        token = jwt.encode(
+            {"sub": self.email, "iat": ahora, "exp": ahora + timedelta(minutes=5)},
+            self.app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+        with self.app.app_context():
+            esperas.estimar_fila([], None)
+            esperas._ventanillas[self.grupo] = 1
+        creados = []
+        for _ in range(2):
+            datos = self.client.post(
+                "/api_oauth2/v1/crear_turno",
+                json={"turno_tipo_id": self.grupo[1], "unidad_id": self.grupo[0], "comentarios": MARCA},
+                headers={"Authorization": f"Bearer {token}"},
+            ).get_json()
+            self.assertTrue(datos["success"], datos["message"])
+            creados.append(datos["data"])
+        self.assertIsNotNone(creados[0]["turno_espera_estimada"])
+        self.assertGreater(creados[1]["turno_espera_estimada"], creados[0]["turno_espera_estimada"])
+        pantalla = self.client.get(f"/api_oauth2/v1/consultar_turnos/{self.grupo[0]}").get_json()
+        estimados = {turno["turno_id"]: turno["turno_espera_estimada"] for turno in pantalla["data"]["turnos"]}
+        for creado in creados:
+            if creado["turno_id"] in estimados:
+                self.assertIsNotNone(estimados[creado["turno_id"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
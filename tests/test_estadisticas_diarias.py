@@ -0,0 +1,152 @@
+"""
+Unit test estadísticas diarias
+
+Siembra turnos completados con tiempos conocidos en un día antiguo, los calcula con cli estadisticas recalcular
+y compara contra los tiempos calculados en Python. Al completar o editar un turno su grupo se vuelve a calcular
+y el resultado debe ser el mismo que el del comando. La API y el listado sólo leen la tabla de agregados.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env, antes ejecute cli db migrar.
+"""
+
+import re
+import unittest
+from datetime import date, datetime, timedelta
+
+import jwt
+
+from lib import catalogos
+from tauro.app import create_app
+from tauro.blueprints.estadisticas_diarias.models import EstadisticaDiaria
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+FECHA = date(2001, 2, 3)
+ESPERAS = [60, 120, 180, 240, 300, 360, 420, 480, 540, 3600]  # Segundos de la creación al inicio
+ATENCIONES = [30, 30, 60, 60, 90, 90, 120, 120, 150, 900]  # Segundos del inicio al término
+MARCA = "Sembrado por test_estadisticas_diarias"
+
+
+def percentil(valores: list, fraccion: float) -> float:
+    """Percentil con interpolación lineal, igual que percentile_cont de PostgreSQL"""
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * fraccion
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+class TestEstadisticasDiarias(unittest.TestCase):
+    """Test estadísticas diarias"""
+
+    @classmethod
+    def setUpClass(cls):
+        from cli.commands.cmd_estadisticas import recalcular  # Al importarse crea su propia aplicación
+
+        cls.recalcular = recalcular
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            cls.completado_id = catalogos.turnos_estados.por_nombre("COMPLETADO").id
+            cls.cancelado_id = catalogos.turnos_estados.por_nombre("CANCELADO").id
+            cls.email = Usuario.query.get(int(config["usuarios_ids"][0])).email
+        cls.grupo = (
+            FECHA,
+            int(config["unidades_ids"][0]),
+            int(config["turnos_tipos_ids"][0]),
+            int(config["ubicaciones_ids"][0]),
+        )
+
+    def setUp(self):
+        with self.app.app_context():
+            for numero, (espera, atencion) in enumerate(zip(ESPERAS, ATENCIONES), start=1):
+                creado = datetime.combine(FECHA, datetime.min.time()) + timedelta(hours=9, minutes=numero)
+                database.session.add(
+                    Turno(
+                        usuario_id=int(config["usuarios_ids"][0]),
+                        turno_estado_id=self.completado_id,
+                        turno_tipo_id=self.grupo[2],
+                        ubicacion_id=self.grupo[3],
+                        unidad_id=self.grupo[1],
+                        numero=numero,
+                        numero_cubiculo=0,
+                        comentarios=MARCA,
+                        creado=creado,
+                        inicio=creado + timedelta(seconds=espera),
+                        termino=creado + timedelta(seconds=espera + atencion),
+                    )
+                )
+            database.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            Turno.query.filter(Turno.comentarios == MARCA).delete(synchronize_session=False)
+            EstadisticaDiaria.query.filter(EstadisticaDiaria.fecha == FECHA).delete(synchronize_session=False)
+            database.session.commit()
+
+    def consultar(self) -> EstadisticaDiaria:
+        """Consultar la estadística del grupo sembrado"""
+        fecha, unidad_id, turno_tipo_id, ubicacion_id = self.grupo
+        return EstadisticaDiaria.query.filter_by(
+            fecha=fecha, unidad_id=unidad_id, turno_tipo_id=turno_tipo_id, ubicacion_id=ubicacion_id
+        ).one()
+
+    def assert_tiempos(self, estadistica: EstadisticaDiaria, esperas: list, atenciones: list):
+        """La estadística debe coincidir con los tiempos calculados en Python"""
+        self.assertEqual(estadistica.cantidad, len(esperas))
+        for prefijo, valores in (("espera", esperas), ("atencion", atenciones)):
+            self.assertAlmostEqual(getattr(estadistica, f"{prefijo}_promedio"), sum(valores) / len(valores), places=3)
+            self.assertAlmostEqual(getattr(estadistica, f"{prefijo}_p50"), percentil(valores, 0.5), places=3)
+            self.assertAlmostEqual(getattr(estadistica, f"{prefijo}_p90"), percentil(valores, 0.9), places=3)
+            self.assertAlmostEqual(getattr(estadistica, f"{prefijo}_maximo"), max(valores), places=3)
+
+    def test_recalcular(self):
+        """Test cli estadisticas recalcular"""
+        with self.app.app_context():
+            self.recalcular.callback(
+                desde=datetime.combine(FECHA, datetime.min.time()), hasta=datetime.combine(FECHA, datetime.min.time())
+            )
+            self.assert_tiempos(self.consultar(), ESPERAS, ATENCIONES)
+
+    def test_recalcular_grupo_al_cambiar_turno(self):
+        """Test al dejar de estar completado un turno su grupo se vuelve a calcular sin él"""
+        with self.app.app_context():
+            EstadisticaDiaria.recalcular(self.grupo)
+            database.session.commit()
+            self.assert_tiempos(self.consultar(), ESPERAS, ATENCIONES)
+            turno = Turno.query.filter(Turno.comentarios == MARCA).order_by(Turno.numero.desc()).first()
+            turno.turno_estado_id = self.cancelado_id
+            EstadisticaDiaria.recalcular(EstadisticaDiaria.grupo(turno))
+            turno.save()
+            database.session.expire_all()
+            self.assert_tiempos(self.consultar(), ESPERAS[:-1], ATENCIONES[:-1])
+
+    def test_get_consultar_estadisticas_diarias(self):
+        """Test GET consultar_estadisticas_diarias, sólo lee la tabla de agregados"""
+        with self.app.app_context():
+            EstadisticaDiaria.recalcular(self.grupo)
+            database.session.commit()
+            ahora = datetime.now()
+            token = jwt.encode(
+                {"sub": self.email, "iat": ahora, "exp": ahora + timedelta(minutes=5)},
+                self.app.config["SECRET_KEY"],
+                algorithm="HS256",
+            )
+            with ContadorConsultas(database.engine) as contador:
+                datos = self.client.get(
+                    "/api_oauth2/v1/consultar_estadisticas_diarias",
+                    query_string={
+                        "fecha_desde": FECHA.isoformat(),
+                        "fecha_hasta": FECHA.isoformat(),
+                        "unidad_id": self.grupo[1],
+                    },
+                    headers={"Authorization": f"Bearer {token}"},
+                ).get_json()
+        self.assertTrue(datos["success"], datos["message"])
+        self.assertEqual([estadistica["cantidad"] for estadistica in datos["data"]], [len(ESPERAS)])
+        self.assertFalse(any(re.search(r"\bturnos(_archivados)?\b", sentencia) for sentencia in contador.sentencias))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Unit test filas de despacho
+
+Siembra turnos en espera en una unidad y los toma con la fila en memoria, deben salir por (nivel, numero),
+con una sola consulta por turno tomado y en el mismo orden que la consulta SQL.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env,
+la última de UNIDADES_IDS sin turnos en espera.
+"""
+
+import unittest
+
+from sqlalchemy import text
+
+from lib import catalogos
+from lib.filas import Filas
+from tauro.app import create_app
+from tauro.blueprints.turnos.models import Turno
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+MARCA = "Sembrado por test_filas"
+
+
+class TestFilas(unittest.TestCase):
+    """Test filas de despacho"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.unidad_id = int(config["unidades_ids"][-1])
+        cls.turnos_tipos_ids = [int(turno_tipo_id) for turno_tipo_id in config["turnos_tipos_ids"]]
+        with cls.app.app_context():
+            cls.en_espera_id = catalogos.turnos_estados.por_nombre("EN ESPERA").id
+            cls.tomado_id = catalogos.turnos_estados.por_nombre("PASE A VENTANILLA").id
+            cls.niveles = {tipo_id: catalogos.turnos_tipos.por_id(tipo_id).nivel for tipo_id in cls.turnos_tipos_ids}
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        self.filas = Filas()
+
+    def tearDown(self):
+        database.session.rollback()
+        Turno.query.filter(Turno.comentarios == MARCA).delete(synchronize_session=False)
+        database.session.commit()
+        self.context.pop()
+
+    def sembrar(self, turno_tipo_id: int, numero: int) -> Turno:
+        """Crear un turno en espera en la unidad de prueba"""
+        turno = Turno(
+            usuario_id=int(config["usuarios_ids"][0]),
+            turno_estado_id=self.en_espera_id,
+            turno_tipo_id=turno_tipo_id,
+            ubicacion_id=int(config["ubicaciones_ids"][0]),
+            unidad_id=self.unidad_id,
+            numero=numero,
+            numero_cubiculo=0,
+            comentarios=MARCA,
+        )
+        database.session.add(turno)
+        database.session.commit()
+        return turno
+
+    def tomar(self, turnos_tipos_ids: list) -> int | None:
+        """Tomar el siguiente turno como lo hace TomarTurno, confirmar el cambio de estado y entregar su id"""
+        turno = self.filas.tomar(self.unidad_id, turnos_tipos_ids, self.en_espera_id)
+        if turno is None:
+            return None
+        turno.turno_estado_id = self.tomado_id
+        turno_id = turno.id
+        database.session.commit()
+        return turno_id
+
+    def test_orden_por_nivel_y_numero(self):
+        """Test los turnos salen por nivel del tipo de turno y luego por número, igual que la consulta SQL"""
+        tipos = self.turnos_tipos_ids
+        sembrados = [self.sembrar(tipos[numero % len(tipos)], numero) for numero in range(1, 10)]
+        esperados = [
+            turno.id for turno in sorted(sembrados, key=lambda turno: (self.niveles[turno.turno_tipo_id], turno.numero))
+        ]
+        self.assertEqual([turno.id for turno in Filas.consulta(self.unidad_id, self.en_espera_id)], esperados)
+        self.assertIsNone(self.tomar([]))  # Carga la fila de la unidad
+        self.assertEqual(self.filas.verificar(self.unidad_id, self.en_espera_id), [])
+        tomados = []
+        with ContadorConsultas(database.engine) as contador:
+            for _ in sembrados:
+                tomados.append(self.tomar(tipos))
+        self.assertEqual(tomados, esperados)
+        self.assertEqual(
+            len([sentencia for sentencia in contador.sentencias if sentencia.startswith("SELECT")]), len(sembrados)
+        )
+
+    def test_tipos_de_la_ventanilla(self):
+        """Test sólo se toman turnos de los tipos de la ventanilla"""
+        tipos = sorted(self.turnos_tipos_ids, key=self.niveles.get)
+        self.sembrar(tipos[0], 1)
+        segundo = self.sembrar(tipos[-1], 2)
+        self.assertEqual(self.tomar(tipos[1:]), segundo.id)
+        self.assertIsNone(self.tomar(tipos[1:]))
+
+    def test_agregar_y_quitar(self):
+        """Test agregar y quitar mantienen la fila igual a la consulta SQL"""
+        tipos = self.turnos_tipos_ids
+        self.assertIsNone(self.tomar(tipos))
+        primero = self.sembrar(tipos[0], 1)
+        self.filas.agregar(primero)
+        segundo = self.sembrar(tipos[0], 2)
+        self.filas.agregar(segundo)
+        self.assertEqual(self.filas.verificar(self.unidad_id, self.en_espera_id), [])
+        primero.turno_estado_id = self.tomado_id
+        database.session.commit()
+        self.filas.quitar(primero)
+        self.assertEqual(self.filas.verificar(self.unidad_id, self.en_espera_id), [])
+        self.assertEqual(self.tomar(tipos), segundo.id)
+
+    def test_turno_de_otro_worker(self):
+        """Test un turno que no está en la fila, como los creados en otro worker, se toma de la base de datos"""
+        tipos = self.turnos_tipos_ids
+        self.assertIsNone(self.tomar(tipos))
+        ajeno = self.sembrar(tipos[0], 1)
+        self.assertEqual(
+            self.filas.verificar(self.unidad_id, self.en_espera_id), [f"Turno {ajeno.id} en espera pero no en la fila"]
+        )
+        self.assertEqual(
+            self.filas.verificar_cargadas(self.en_espera_id),
+            {self.unidad_id: [f"Turno {ajeno.id} en espera pero no en la fila"]},
+        )
+        self.assertEqual(self.tomar(tipos), ajeno.id)
+
+    def test_turno_bloqueado_regresa_a_la_fila(self):
+        """Test un turno bloqueado por otra transacción que sigue en espera se regresa a la fila"""
+        tipos = self.turnos_tipos_ids
+        self.assertIsNone(self.tomar(tipos))
+        bloqueado = self.sembrar(tipos[0], 1)
+        self.filas.agregar(bloqueado)
+        siguiente = self.sembrar(tipos[0], 2)
+        self.filas.agregar(siguiente)
+        with database.engine.connect() as otra:
+            otra.execute(text("SELECT id FROM turnos WHERE id = :id FOR UPDATE"), {"id": bloqueado.id})
+            self.assertEqual(self.tomar(tipos), siguiente.id)
+            otra.rollback()
+        self.assertEqual(self.filas.verificar(self.unidad_id, self.en_espera_id), [])
+        self.assertEqual(self.tomar(tipos), bloqueado.id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Unit test idempotencia de crear_turno
+
+Los reintentos con el mismo Idempotency-Key deben recibir el turno original sin insertar otro,
+de memoria o, si el worker no la tiene, desde la tabla turnos_idempotencias.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env, antes ejecute cli db migrar.
+"""
+
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+
+from lib.idempotencias import idempotencias
+from tauro.app import create_app
+from tauro.blueprints.turnos.models import Turno
+from tauro.blueprints.turnos_idempotencias.models import TurnoIdempotencia
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+MARCA = "TURNO CREADO POR TEST IDEMPOTENCIAS"  # Como queda después de safe_string
+
+
+class TestIdempotencias(unittest.TestCase):
+    """Test idempotencia de crear_turno"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            email = Usuario.query.get(int(config["usuarios_ids"][0])).email
+        ahora = datetime.now()
+        cls.token = jwt.encode(
+            {"sub": email, "iat": ahora, "exp": ahora + timedelta(minutes=5)},
+            cls.app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+
+    def tearDown(self):
+        with self.app.app_context():
+            turnos_ids = [turno.id for turno in Turno.query.filter(Turno.comentarios == MARCA).all()]
+            TurnoIdempotencia.query.filter(TurnoIdempotencia.turno_id.in_(turnos_ids)).delete(synchronize_session=False)
+            Turno.query.filter(Turno.id.in_(turnos_ids)).delete(synchronize_session=False)
+            database.session.commit()
+
+    def crear_turno(self, llave: str) -> dict:
+        """POST crear_turno con el Idempotency-Key"""
+        datos = self.client.post(
+            "/api_oauth2/v1/crear_turno",
+            json={
+                "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+                "unidad_id": int(config["unidades_ids"][0]),
+                "comentarios": MARCA,
+            },
+            headers={"Authorization": f"Bearer {self.token}", "Idempotency-Key": llave},
+        ).get_json()
+        self.assertTrue(datos["success"], datos["message"])
+        return datos
+
+    def contar_turnos(self) -> int:
+        """Contar los turnos creados por esta prueba"""
+        with self.app.app_context():
+            return Turno.query.filter(Turno.comentarios == MARCA).count()
+
+    def test_reintento_desde_memoria(self):
+        """Test el reintento recibe la misma respuesta sin insertar"""
+        llave = str(uuid.uuid4())
+        original = self.crear_turno(llave)
+        with self.app.app_context(), ContadorConsultas(database.engine) as contador:
+            reintento = self.crear_turno(llave)
+        self.assertEqual(reintento, original)
+        self.assertFalse([sentencia for sentencia in contador.sentencias if sentencia.startswith("INSERT")])
+        self.assertEqual(self.contar_turnos(), 1)
+
+    def test_reintento_desde_la_base_de_datos(self):
+        """Test el reintento que llega a un worker sin la respuesta en memoria recibe el mismo turno"""
+        llave = str(uuid.uuid4())
+        original = self.crear_turno(llave)
+        idempotencias._respuestas.clear()
+        reintento = self.crear_turno(llave)
+        self.assertEqual(reintento["data"]["turno_id"], original["data"]["turno_id"])
+        self.assertEqual(reintento["data"]["turno_numero"], original["data"]["turno_numero"])
+        self.assertEqual(self.contar_turnos(), 1)
+
+    def test_llaves_distintas(self):
+        """Test con otra llave o sin llave se crea otro turno"""
+        primero = self.crear_turno(str(uuid.uuid4()))
+        segundo = self.crear_turno(str(uuid.uuid4()))
+        self.assertNotEqual(primero["data"]["turno_id"], segundo["data"]["turno_id"])
+        self.assertEqual(self.contar_turnos(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit test API keys verificadas
+
+Una vez verificado, el API key de un kiosco no debe consultarse en cada petición,
+y un API key expirado o deshabilitado desde la administración debe dejar de servir.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from lib.llaves_api import llaves_api
+from tauro.app import create_app
+from tauro.blueprints.api_keys.models import APIKey
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+URL = "/api_key/v1/test_conexion"
+
+
+class TestLlavesAPI(unittest.TestCase):
+    """Test API keys verificadas"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            cls.engine = database.engine
+
+    def setUp(self):
+        self.api_key_temporal = None
+
+    def tearDown(self):
+        if self.api_key_temporal is not None:
+            with self.app.app_context():
+                APIKey.query.filter_by(api_key=self.api_key_temporal).delete()
+                database.session.commit()
+        llaves_api.invalidar()
+
+    def crear_api_key(self, expiracion: datetime, es_activo: bool = True) -> str:
+        """Crear un API key temporal para la prueba"""
+        self.api_key_temporal = uuid.uuid4().hex
+        with self.app.app_context():
+            APIKey(api_key=self.api_key_temporal, api_key_expiracion=expiracion, es_activo=es_activo).save()
+        return self.api_key_temporal
+
+    def test_get_test_conexion_sin_consultas(self):
+        """Test GET test_conexion, la segunda petición con el mismo API key no consulta api_keys"""
+        self.assertEqual(self.client.get(URL, headers={"X-Api-Key": config["api_key"]}).status_code, 200)
+        with ContadorConsultas(self.engine) as contador:
+            response = self.client.get(URL, headers={"X-Api-Key": config["api_key"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([sentencia for sentencia in contador.sentencias if "api_keys" in sentencia], [])
+
+    def test_get_test_conexion_expirado(self):
+        """Test GET test_conexion con un API key expirado"""
+        api_key = self.crear_api_key(datetime.now() - timedelta(days=1))
+        response = self.client.get(URL, headers={"X-Api-Key": api_key})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.get_json()["success"])
+
+    def test_get_test_conexion_deshabilitado_e_invalidado(self):
+        """Test GET test_conexion, al deshabilitarlo e invalidar deja de servir aunque ya estuviera verificado"""
+        api_key = self.crear_api_key(datetime.now() + timedelta(days=1))
+        self.assertEqual(self.client.get(URL, headers={"X-Api-Key": api_key}).status_code, 200)
+        with self.app.app_context():
+            registro = APIKey.query.filter_by(api_key=api_key).one()
+            registro.es_activo = False
+            registro.save()
+        llaves_api.invalidar()
+        self.assertEqual(self.client.get(URL, headers={"X-Api-Key": api_key}).status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
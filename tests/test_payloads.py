@@ -0,0 +1,67 @@
+"""
+Unit test payloads
+
+Los recursos validan el cuerpo con payload_required, un payload que no es válido
+recibe 422 con los errores por campo en lugar de un error 500.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from lib.llaves_api import llaves_api
+from tauro.app import create_app
+from tauro.blueprints.api_keys.models import APIKey
+from tauro.extensions import database
+from tests import config
+
+URL = "/api_key/v1/crear_turnos"
+
+
+class TestPayloads(unittest.TestCase):
+    """Test payloads"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        cls.api_key = uuid.uuid4().hex
+        cls.headers = {"X-Api-Key": cls.api_key}
+        with cls.app.app_context():
+            APIKey(api_key=cls.api_key, api_key_expiracion=datetime.now() + timedelta(days=1), es_activo=True).save()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            APIKey.query.filter_by(api_key=cls.api_key).delete()
+            database.session.commit()
+        llaves_api.invalidar()
+
+    def test_post_sin_campos(self):
+        """Test POST con campos faltantes y de otro tipo entrega 422 con cada campo"""
+        response = self.client.post(
+            URL,
+            json={"turnos": [{"turno_tipo_id": "uno", "unidad_id": int(config["unidades_ids"][0])}]},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 422)
+        datos = response.get_json()
+        self.assertFalse(datos["success"])
+        campos = {error["campo"]: error["tipo"] for error in datos["data"]}
+        self.assertEqual(campos, {"usuario_id": "missing", "turnos.0.turno_tipo_id": "int_parsing"})
+
+    def test_post_json_invalido(self):
+        """Test POST con un cuerpo que no es JSON entrega 422"""
+        response = self.client.post(URL, data=b"{no es json", content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual([error["tipo"] for error in response.get_json()["data"]], ["json_invalid"])
+
+    def test_post_sin_api_key(self):
+        """Test POST sin X-Api-Key no valida el payload"""
+        response = self.client.post(URL, data=b"{no es json", content_type="application/json")
+        self.assertNotEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Unit test principales de la API OAuth2
+
+Una vez que token_required carga el principal de un usuario, las siguientes peticiones
+no deben volver a consultar el usuario, sus roles ni sus tipos de turno hasta que se invalide.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import re
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import jwt
+
+from lib.principales import principales
+from tauro.app import create_app
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+URL = "/api_oauth2/v1/consultar_configuracion_usuario"
+CONSULTA_USUARIO = re.compile(r"\bFROM (usuarios|usuarios_roles|usuarios_turnos_tipos)\b")
+
+
+class TestPrincipales(unittest.TestCase):
+    """Test principales de la API OAuth2"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            cls.engine = database.engine
+            cls.email = Usuario.query.get(int(config["usuarios_ids"][0])).email
+        token = jwt.encode(
+            {"sub": cls.email, "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=5)},
+            cls.app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+        cls.headers = {"Authorization": f"Bearer {token}"}
+
+    def consultas_de_usuario(self) -> list:
+        """Hacer la petición y entregar las sentencias que consultaron al usuario"""
+        with ContadorConsultas(self.engine) as contador:
+            response = self.client.get(URL, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["success"])
+        return [sentencia for sentencia in contador.sentencias if CONSULTA_USUARIO.search(sentencia)]
+
+    def test_get_consultar_configuracion_usuario_sin_consultar_usuario(self):
+        """Test GET consultar_configuracion_usuario, la segunda petición no consulta al usuario"""
+        principales.invalidar()
+        self.assertNotEqual(self.consultas_de_usuario(), [])
+        self.assertEqual(self.consultas_de_usuario(), [])
+
+    def test_get_consultar_configuracion_usuario_invalidado(self):
+        """Test GET consultar_configuracion_usuario, al invalidar el principal se vuelve a consultar"""
+        self.consultas_de_usuario()
+        principales.invalidar(self.email)
+        self.assertNotEqual(self.consultas_de_usuario(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
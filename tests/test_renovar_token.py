@@ -0,0 +1,112 @@
+"""
+Unit test renovar token de la API OAuth2
+
+El token de acceso dura TOKEN_OAUTH2_EXPIRES_IN_SEG y se renueva con el token de renovación sin verificar la contraseña.
+Cada token de renovación sirve una sola vez; si se presenta de nuevo se revoca su familia completa.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import unittest
+
+import jwt
+
+from lib.contrasenas import intentos_acceso
+from tauro.app import create_app
+from tauro.blueprints.tokens_renovacion.models import TokenRenovacion
+from tauro.blueprints.usuarios.models import Usuario
+from tauro.blueprints.usuarios_roles.models import UsuarioRol
+from tauro.extensions import database, pwd_context
+from tests import config
+
+CONTRASENA = "Prueba2024"
+EMAIL = "prueba.renovar.token@pjecz.gob.mx"
+MARCA = "PRUEBA RENOVAR TOKEN"
+
+
+class TestRenovarToken(unittest.TestCase):
+    """Test renovar token de la API OAuth2"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            usuario = Usuario.query.get(int(config["usuarios_ids"][0]))
+            rol_id = UsuarioRol.query.filter_by(usuario_id=usuario.id).filter_by(estatus="A").first().rol_id
+            nuevo = Usuario(
+                unidad_id=usuario.unidad_id,
+                ubicacion_id=usuario.ubicacion_id,
+                email=EMAIL,
+                nombres=MARCA,
+                apellido_paterno="PRUEBA",
+                apellido_materno="PRUEBA",
+                contrasena=pwd_context.hash(CONTRASENA),
+                es_acceso_frontend=True,
+            )
+            database.session.add(nuevo)
+            database.session.flush()
+            database.session.add(UsuarioRol(rol_id=rol_id, usuario_id=nuevo.id, descripcion=MARCA))
+            database.session.commit()
+            cls.usuario_id = nuevo.id
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            TokenRenovacion.query.filter_by(usuario_id=cls.usuario_id).delete()
+            UsuarioRol.query.filter_by(usuario_id=cls.usuario_id).delete()
+            Usuario.query.filter_by(id=cls.usuario_id).delete()
+            database.session.commit()
+
+    def setUp(self):
+        intentos_acceso.reiniciar()
+
+    def ingresar(self) -> dict:
+        """Pedir el token con la contraseña"""
+        datos = self.client.post("/api_oauth2/v1/token", data={"username": EMAIL, "password": CONTRASENA}).get_json()
+        self.assertTrue(datos["success"], datos["message"])
+        return datos
+
+    def renovar(self, refresh_token: str):
+        """Pedir otro token con el token de renovación"""
+        return self.client.post("/api_oauth2/v1/renovar_token", json={"refresh_token": refresh_token})
+
+    def test_post_token_expira_segun_configuracion(self):
+        """Test POST token, el token de acceso dura TOKEN_OAUTH2_EXPIRES_IN_SEG"""
+        datos = self.ingresar()
+        payload = jwt.decode(datos["access_token"], self.app.config["SECRET_KEY"], algorithms=["HS256"])
+        self.assertEqual(payload["exp"] - payload["iat"], self.app.config["TOKEN_OAUTH2_EXPIRES_IN_SEG"])
+        self.assertIsNotNone(datos["refresh_token"])
+
+    def test_post_renovar_token_rota(self):
+        """Test POST renovar_token, entrega otro token de renovación y el anterior deja de servir"""
+        datos = self.ingresar()
+        response = self.renovar(datos["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        renovado = response.get_json()
+        self.assertTrue(renovado["success"])
+        self.assertNotEqual(renovado["refresh_token"], datos["refresh_token"])
+        headers = {"Authorization": f"Bearer {renovado['access_token']}"}
+        self.assertTrue(self.client.get("/api_oauth2/v1/validar_token", headers=headers).get_json()["success"])
+        self.assertTrue(self.renovar(renovado["refresh_token"]).get_json()["success"])
+
+    def test_post_renovar_token_reusado_revoca_familia(self):
+        """Test POST renovar_token, presentar de nuevo un token usado revoca también al que lo reemplazó"""
+        datos = self.ingresar()
+        renovado = self.renovar(datos["refresh_token"]).get_json()
+        self.assertEqual(self.renovar(datos["refresh_token"]).status_code, 401)
+        self.assertEqual(self.renovar(renovado["refresh_token"]).status_code, 401)
+
+    def test_post_revocar_token(self):
+        """Test POST revocar_token, después ya no se puede renovar"""
+        datos = self.ingresar()
+        response = self.client.post("/api_oauth2/v1/revocar_token", data={"refresh_token": datos["refresh_token"]})
+        self.assertTrue(response.get_json()["success"])
+        self.assertEqual(self.renovar(datos["refresh_token"]).status_code, 401)
+
+    def test_post_renovar_token_no_valido(self):
+        """Test POST renovar_token con un token que no existe"""
+        self.assertEqual(self.renovar("no-existe").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
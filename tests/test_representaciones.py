@@ -0,0 +1,63 @@
+"""
+Unit test representaciones
+
+La representación application/json de las API serializa el modelo de pydantic directo
+y debe entregar el mismo JSON que model_dump() codificado con el módulo json.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env
+"""
+
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import jwt
+
+from lib.representaciones import representar_json
+from tauro.app import create_app
+from tauro.blueprints.usuarios.models import Usuario
+from tests import config
+from tests.benchmark_representaciones import camino_anterior, camino_nuevo, elaborar_carga
+
+
+class TestRepresentaciones(unittest.TestCase):
+    """Test representaciones"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            email = Usuario.query.get(int(config["usuarios_ids"][0])).email
+        token = jwt.encode(
+            {"sub": email, "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=5)},
+            cls.app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+        cls.headers = {"Authorization": f"Bearer {token}"}
+
+    def test_mismo_json_que_model_dump(self):
+        """Test el modelo serializado directo es igual al de model_dump() con json"""
+        modelo = elaborar_carga()
+        with self.app.app_context():
+            self.assertEqual(json.loads(camino_nuevo(modelo)), json.loads(camino_anterior(modelo)))
+            respuesta = representar_json(modelo, 201, {"X-Prueba": "1"})
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.headers["X-Prueba"], "1")
+        self.assertTrue(respuesta.get_data().endswith(b"\n"))
+
+    def test_get_consultar_turnos_estados(self):
+        """Test GET consultar_turnos_estados entrega el modelo como application/json"""
+        response = self.client.get("/api_oauth2/v1/consultar_turnos_estados", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertTrue(response.get_json()["success"])
+
+    def test_error_de_flask_restful(self):
+        """Test los errores de flask_restful, que son diccionarios, también se representan"""
+        response = self.client.get("/api_oauth2/v1/consultar_turnos_estados")
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertIsInstance(response.get_json(), dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
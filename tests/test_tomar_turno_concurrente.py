@@ -0,0 +1,81 @@
+"""
+Unit test tomar_turno concurrente
+
+Crea mil turnos en espera y luego cincuenta ventanillas los toman al mismo tiempo,
+cada turno debe salir exactamente una vez.
+
+El usuario de USUARIOS_IDS debe pertenecer a la primera unidad de UNIDADES_IDS
+y atender el primer tipo de turno de TURNOS_TIPOS_IDS.
+"""
+
+import time
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from tests import config
+
+CANTIDAD_TURNOS = 1000
+CANTIDAD_VENTANILLAS = 50
+CANTIDAD_HILOS_CREAR = 10
+TIEMPO_ESPERA_SEG = max(config["timeout"], 60)  # Con cincuenta ventanillas a la vez una petición puede tardar más
+
+
+class TestTomarTurnoConcurrente(unittest.TestCase):
+    """Test tomar_turno concurrente"""
+
+    def post(self, endpoint: str, payload: dict) -> dict:
+        """Enviar una petición POST a la API"""
+        response = requests.post(
+            url=f"{config['api_base_url']}/{endpoint}",
+            headers={"X-Api-Key": config["api_key"]},
+            json=payload,
+            timeout=TIEMPO_ESPERA_SEG,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def crear_turno(self, _) -> int:
+        """Crear un turno en espera y entregar su ID"""
+        resultado = self.post(
+            "crear_turno",
+            {
+                "usuario_id": int(config["usuarios_ids"][0]),
+                "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+                "unidad_id": int(config["unidades_ids"][0]),
+                "comentarios": "Turno de prueba para tomar concurrente",
+            },
+        )
+        self.assertTrue(resultado["success"])
+        return resultado["data"]["turno_id"]
+
+    def ventanilla(self, _) -> list:
+        """Tomar turnos hasta que ya no haya en espera, entregar los IDs tomados"""
+        tomados = []
+        while True:
+            resultado = self.post("tomar_turno", {"usuario_id": int(config["usuarios_ids"][0])})
+            if not resultado["success"]:
+                self.assertEqual(resultado["message"], "No hay turnos en espera")
+                return tomados
+            tomados.append(resultado["data"]["turno_id"])
+
+    def test_post_tomar_turno_concurrente(self):
+        """Test POST tomar_turno, cincuenta ventanillas toman mil turnos sin repetir ninguno"""
+        with ThreadPoolExecutor(max_workers=CANTIDAD_HILOS_CREAR) as ejecutor:
+            creados = set(ejecutor.map(self.crear_turno, range(CANTIDAD_TURNOS)))
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CANTIDAD_VENTANILLAS) as ejecutor:
+            tomados = [turno_id for lote in ejecutor.map(self.ventanilla, range(CANTIDAD_VENTANILLAS)) for turno_id in lote]
+        segundos = time.perf_counter() - inicio
+        print(f"{len(tomados)} turnos tomados por {CANTIDAD_VENTANILLAS} ventanillas en {segundos:.2f} s")
+        # Ningún turno se tomó dos veces
+        repetidos = [turno_id for turno_id, veces in Counter(tomados).items() if veces > 1]
+        self.assertEqual(repetidos, [])
+        # Todos los turnos creados se tomaron
+        self.assertEqual(creados - set(tomados), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Unit test índices de turnos
+
+Siembra muchos turnos terminados de días anteriores, como una base de datos con meses de uso,
+ejecuta las consultas de las filas de turnos y repite con EXPLAIN cada sentencia sobre la tabla turnos.
+Ninguna debe recorrer la tabla completa (Seq Scan), para eso están los índices del modelo Turno.
+Usa la aplicación en el mismo proceso con la base de datos configurada en .env, antes ejecute cli db migrar.
+El comando cancelar_turnos_pasados sólo se ejecuta sobre el rango de IDs de los turnos sembrados, con --desde y --hasta.
+
+Variables de entorno opcionales
+
+- TURNOS_SEMBRADOS, cantidad de turnos terminados a sembrar, por defecto 200000
+"""
+
+import os
+import re
+import unittest
+
+from sqlalchemy import text
+
+from lib import catalogos
+from tauro.app import create_app
+from tauro.extensions import database
+from tests import config
+from tests.contador_consultas import ContadorConsultas
+
+TURNOS_SEMBRADOS = int(os.getenv("TURNOS_SEMBRADOS", "200000"))
+TURNOS_EN_ESPERA = 300
+MARCA = "Turno sembrado por test_turnos_indices"
+SENTENCIA_TURNOS = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b.*\bturnos\b", re.DOTALL | re.IGNORECASE)
+SEQ_SCAN_TURNOS = re.compile(r"Seq Scan on turnos\b")
+
+
+class TestTurnosIndices(unittest.TestCase):
+    """Test índices de turnos"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            cls.engine = database.engine
+            estados = {estado.nombre: estado.id for estado in catalogos.turnos_estados.todos()}
+            parametros = {
+                "usuario_id": int(config["usuarios_ids"][0]),
+                "turno_tipo_id": int(config["turnos_tipos_ids"][0]),
+                "ubicacion_id": int(config["ubicaciones_ids"][0]),
+                "unidades_ids": [int(unidad_id) for unidad_id in config["unidades_ids"]],
+                "completado_id": estados["COMPLETADO"],
+                "cancelado_id": estados["CANCELADO"],
+                "en_espera_id": estados["EN ESPERA"],
+                "marca": MARCA,
+            }
+            # Turnos terminados de hasta un año atrás, repartidos entre las unidades
+            database.session.execute(
+                text(
+                    """
+                    INSERT INTO turnos (usuario_id, turno_estado_id, turno_tipo_id, ubicacion_id, numero, numero_cubiculo,
+                        unidad_id, comentarios, creado)
+                    SELECT :usuario_id, CASE WHEN i % 50 = 0 THEN :cancelado_id ELSE :completado_id END,
+                        :turno_tipo_id, :ubicacion_id, 1 + i % 500, 0,
+                        (CAST(:unidades_ids AS INTEGER[]))[1 + i % cardinality(CAST(:unidades_ids AS INTEGER[]))],
+                        :marca, now() - (1 + i % 365) * INTERVAL '1 day'
+                    FROM generate_series(1, :cantidad) AS i
+                    """
+                ),
+                {**parametros, "cantidad": TURNOS_SEMBRADOS},
+            )
+            # Turnos de hoy en espera en la primera unidad
+            database.session.execute(
+                text(
+                    """
+                    INSERT INTO turnos (usuario_id, turno_estado_id, turno_tipo_id, ubicacion_id, numero, numero_cubiculo,
+                        unidad_id, comentarios, creado)
+                    SELECT :usuario_id, :en_espera_id, :turno_tipo_id, :ubicacion_id, i, 0,
+                        (CAST(:unidades_ids AS INTEGER[]))[1], :marca, now()
+                    FROM generate_series(1, :cantidad) AS i
+                    """
+                ),
+                {**parametros, "cantidad": TURNOS_EN_ESPERA},
+            )
+            database.session.commit()
+            cls.desde, cls.hasta = database.session.execute(
+                text("SELECT min(id), max(id) FROM turnos WHERE comentarios = :marca"), {"marca": MARCA}
+            ).one()
+        # Actualizar las estadísticas para que el planificador conozca el tamaño de la tabla
+        with cls.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexion:
+            conexion.exec_driver_sql("ANALYZE turnos")
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            database.session.execute(text("DELETE FROM turnos WHERE comentarios = :marca"), {"marca": MARCA})
+            database.session.commit()
+
+    def assert_sin_seq_scan(self, contador: ContadorConsultas):
+        """Repetir con EXPLAIN las sentencias sobre turnos y fallar si alguna recorre la tabla completa"""
+        revisadas = 0
+        with self.engine.connect() as conexion:
+            for sentencia, parametros in zip(contador.sentencias, contador.parametros):
+                if not SENTENCIA_TURNOS.match(sentencia):
+                    continue
+                plan = "\n".join(renglon[0] for renglon in conexion.exec_driver_sql(f"EXPLAIN {sentencia}", parametros))
+                self.assertIsNone(SEQ_SCAN_TURNOS.search(plan), f"{sentencia}\n{plan}")
+                revisadas += 1
+            conexion.rollback()
+        self.assertGreater(revisadas, 0, str(contador))
+
+    def peticion(self, metodo: str, url: str, **kwargs) -> ContadorConsultas:
+        """Hacer la petición y entregar las sentencias que ejecutó"""
+        with ContadorConsultas(self.engine) as contador:
+            response = self.client.open(url, method=metodo, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return contador
+
+    def test_get_consultar_turnos(self):
+        """Test GET consultar_turnos"""
+        self.assert_sin_seq_scan(self.peticion("GET", "/api_oauth2/v1/consultar_turnos"))
+
+    def test_get_consultar_turnos_unidad(self):
+        """Test GET consultar_turnos de una unidad"""
+        self.assert_sin_seq_scan(self.peticion("GET", f"/api_oauth2/v1/consultar_turnos/{config['unidades_ids'][0]}"))
+
+    def test_post_tomar_turno(self):
+        """Test POST tomar_turno"""
+        contador = self.peticion(
+            "POST",
+            "/api_key/v1/tomar_turno",
+            headers={"X-Api-Key": config["api_key"]},
+            json={"usuario_id": int(config["usuarios_ids"][0])},
+        )
+        self.assert_sin_seq_scan(contador)
+
+    def test_post_consultar_configuracion_usuario(self):
+        """Test POST consultar_configuracion_usuario"""
+        contador = self.peticion(
+            "POST",
+            "/api_key/v1/consultar_configuracion_usuario",
+            headers={"X-Api-Key": config["api_key"]},
+            json={"usuario_id": int(config["usuarios_ids"][0])},
+        )
+        self.assert_sin_seq_scan(contador)
+
+    def test_cancelar_turnos_pasados(self):
+        """Test cli turnos cancelar_turnos_pasados"""
+        from cli.commands.cmd_turnos import cancelar_turnos_pasados  # Al importarse crea su propia aplicación
+
+        with self.app.app_context():
+            with ContadorConsultas(self.engine) as contador:
+                cancelar_turnos_pasados.callback(lote=0, email=None, desde=self.desde, hasta=self.hasta)
+        self.assert_sin_seq_scan(contador)
+
+
+if __name__ == "__main__":
+    unittest.main()